@@ -0,0 +1,18 @@
+"""
+Reproducible performance benchmarks of typical simulations.
+
+Each `Scenario` sets up a simulation at a given resolution and batch size.
+`run()` times the scenarios on all requested backends and records steps per second, solver iterations and peak memory.
+`run_import()` measures the time it takes to import PhiFlow in a fresh process.
+Results can be stored with `save()` and compared to those of a previous version using `compare()`.
+
+The benchmarks can also be run from the command line:
+```bash
+python -m phi.benchmarks --scenarios smoke_plume_2d hw2d --import-time --output new.json --baseline old.json
+```
+The command exits with a non-zero status if any regressions compared to the baseline were found.
+"""
+from ._scenarios import Scenario, SCENARIOS
+from ._run import run, run_scenario, run_import, save, load, compare
+
+__all__ = [key for key in globals().keys() if not key.startswith('_')]
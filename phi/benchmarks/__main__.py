@@ -0,0 +1,40 @@
+import argparse
+import sys
+
+from . import SCENARIOS, run, run_import, save, load, compare
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(prog='python -m phi.benchmarks', description="Runs the PhiFlow benchmark scenarios and optionally compares the results to a baseline.")
+    parser.add_argument('--scenarios', nargs='+', choices=tuple(SCENARIOS), help="Scenarios to run. Runs all scenarios by default.")
+    parser.add_argument('--resolutions', nargs='+', type=int, help="Resolutions to run. Defaults to the resolutions of each scenario.")
+    parser.add_argument('--batch-sizes', nargs='+', type=int, help="Batch sizes to run. Defaults to the batch sizes of each scenario.")
+    parser.add_argument('--backends', nargs='+', help="Backends to run, e.g. numpy, torch, jax, tensorflow. Defaults to all available backends.")
+    parser.add_argument('--steps', type=int, default=10, help="Number of timed steps.")
+    parser.add_argument('--warmup', type=int, default=2, help="Number of untimed steps before timing.")
+    parser.add_argument('--import-time', action='store_true', help="Also measure the time of 'from phi.flow import *' in a fresh process.")
+    parser.add_argument('--output', help="JSON file to write the results to.")
+    parser.add_argument('--baseline', help="JSON file with results of a previous run to compare against.")
+    parser.add_argument('--tolerance', type=float, default=0.1, help="Relative deviation from the baseline that is not reported as regression.")
+    args = parser.parse_args(args)
+    results = run(args.scenarios, args.resolutions, args.batch_sizes, args.backends, steps=args.steps, warmup=args.warmup)
+    if args.import_time:
+        results.append(run_import())
+    for r in results:
+        if r['scenario'] == 'import':
+            print(f"{r['statement']:<55} {r['import_seconds']:8.3f} s import time")
+            continue
+        iterations = '' if r['solver_iterations'] is None else f", {r['solver_iterations']} solver iterations"
+        print(f"{r['scenario']:<22} {r['backend']:<10} resolution={r['resolution']:<4} batch_size={r['batch_size']:<3} {r['steps_per_second']:8.2f} steps/s, {r['peak_memory'] / 2 ** 20:.1f} MB{iterations}")
+    if args.output:
+        save(results, args.output)
+    if args.baseline:
+        regressions = compare(load(args.baseline), results, args.tolerance)
+        for regression in regressions:
+            print(f"Regression: {regression}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,215 @@
+import json
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from typing import List, Tuple
+
+import phi
+from phi import math
+from phi.math.backend import Backend
+from ._scenarios import Scenario, SCENARIOS
+
+
+def run(scenarios: tuple or list = None,
+        resolutions: tuple or list = None,
+        batch_sizes: tuple or list = None,
+        backends: tuple or list = None,
+        steps: int = 10,
+        warmup: int = 2) -> List[dict]:
+    """
+    Runs all combinations of the given scenarios, resolutions, batch sizes and backends.
+
+    Args:
+        scenarios: `Scenario` objects or names of `SCENARIOS`. Runs all built-in scenarios by default.
+        resolutions: Resolutions to run. Defaults to the resolutions listed by each scenario.
+        batch_sizes: Batch sizes to run. Defaults to the batch sizes listed by each scenario.
+            Batch sizes not supported by a scenario are skipped.
+        backends: `Backend` objects or backend names, such as `'numpy'` or `'torch'`. Defaults to all available backends.
+        steps: Number of timed steps per benchmark.
+        warmup: Number of untimed steps before the timing starts. These include tracing and compilation.
+
+    Returns:
+        `list` of results as returned by `run_scenario()`.
+    """
+    scenarios = [SCENARIOS[s] if isinstance(s, str) else s for s in (scenarios or SCENARIOS.values())]
+    backends = [_backend_by_name(b) if isinstance(b, str) else b for b in (backends or phi.detect_backends())]
+    results = []
+    for backend in backends:
+        for scenario in scenarios:
+            for batch_size in batch_sizes or scenario.batch_sizes:
+                if batch_size > 1 and max(scenario.batch_sizes) == 1:  # scenario does not support batching
+                    continue
+                for resolution in resolutions or scenario.resolutions:
+                    results.append(run_scenario(scenario, resolution, batch_size, backend, steps=steps, warmup=warmup))
+    return results
+
+
+def run_scenario(scenario: Scenario, resolution: int, batch_size: int, backend: Backend, steps: int = 10, warmup: int = 2) -> dict:
+    """
+    Times `steps` steps of `scenario` and runs one additional step to record solver iterations and peak memory.
+
+    Memory is measured with `tracemalloc` and includes all allocations made through Python, such as NumPy arrays, but not device memory.
+
+    Returns:
+        `dict` with the entries `scenario`, `resolution`, `batch_size`, `backend`, `steps`, `seconds_per_step`, `steps_per_second`,
+        `solver_iterations` (total iterations of all solves in one step, `None` if no iterative solve was performed)
+        and `peak_memory` (bytes allocated during one step).
+    """
+    with backend:
+        state, step = scenario.setup(resolution, batch_size)
+        for _ in range(warmup):
+            state = step(*state)
+        _block_until_ready(backend, state)
+        t = time.perf_counter()
+        for _ in range(steps):
+            state = step(*state)
+        _block_until_ready(backend, state)
+        elapsed = time.perf_counter() - t
+        was_tracing = tracemalloc.is_tracing()
+        if not was_tracing:
+            tracemalloc.start()
+        memory_before = tracemalloc.get_traced_memory()[0]
+        with math.SolveTape() as solves:
+            state = step(*state)
+            _block_until_ready(backend, state)
+        peak_memory = tracemalloc.get_traced_memory()[1] - memory_before
+        if not was_tracing:
+            tracemalloc.stop()
+    iterations = [int(solve.iterations.max) for solve in solves if solve.iterations is not None]
+    return {
+        'scenario': scenario.name,
+        'resolution': resolution,
+        'batch_size': batch_size,
+        'backend': backend.name,
+        'steps': steps,
+        'seconds_per_step': elapsed / steps,
+        'steps_per_second': steps / elapsed,
+        'solver_iterations': sum(iterations) if iterations else None,
+        'peak_memory': peak_memory,
+    }
+
+
+def run_import(statement: str = "from phi.flow import *", repeat: int = 5, modules: int = 10) -> dict:
+    """
+    Measures how long `statement` takes in a fresh Python process using `python -X importtime`.
+    Since import times fluctuate strongly, the fastest of `repeat` runs is reported.
+
+    Args:
+        statement: Python code to time, typically an import.
+        repeat: Number of processes to run.
+        modules: Number of slowest modules to list.
+
+    Returns:
+        `dict` with the entries `scenario` (`'import'`), `statement`, `import_seconds` (total import time)
+        and `modules` (`dict` mapping the slowest modules to their cumulative import time in seconds).
+        The result can be saved and compared together with the results of `run()`.
+    """
+    best = None
+    for _ in range(repeat):
+        output = subprocess.run([sys.executable, '-X', 'importtime', '-c', statement], stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True, check=True).stderr
+        times = _parse_importtime(output)
+        total = sum(seconds for name, seconds in times if not name.startswith(' '))
+        if best is None or total < best[0]:
+            best = total, times
+    total, times = best
+    slowest = sorted(times, key=lambda t: t[1], reverse=True)[:modules]
+    return {
+        'scenario': 'import',
+        'resolution': None,
+        'batch_size': None,
+        'backend': None,
+        'statement': statement,
+        'import_seconds': total,
+        'modules': {name.strip(): seconds for name, seconds in slowest},
+    }
+
+
+def _parse_importtime(output: str) -> List[Tuple[str, float]]:
+    """ Returns `(name, cumulative seconds)` for each line written by `-X importtime`. Nested modules keep their indentation. """
+    times = []
+    for line in output.splitlines():
+        if line.startswith('import time:') and not line.endswith('imported package'):
+            _, cumulative, name = line[len('import time:'):].split('|')
+            times.append((name[1:], int(cumulative) * 1e-6))
+    return times
+
+
+def _backend_by_name(name: str) -> Backend:
+    for backend in phi.detect_backends():
+        if backend.name.lower() in (name.lower(), {'torch': 'pytorch', 'tf': 'tensorflow'}.get(name.lower())):
+            return backend
+    raise ValueError(f"Backend '{name}' is not available. Available backends: {[b.name for b in phi.detect_backends()]}")
+
+
+def _block_until_ready(backend: Backend, state: tuple):
+    _, tensors = math._tensors.disassemble_tree([s for s in state if s is not None])
+    backend.block_until_ready([native for tensor in tensors for native in tensor._natives()])
+
+
+def save(results: List[dict], path: str):
+    """
+    Writes benchmark results together with version and platform information to a JSON file.
+
+    Args:
+        results: Results as returned by `run()`.
+        path: JSON file path.
+    """
+    data = {
+        'phi_version': phi.__version__,
+        'python_version': platform.python_version(),
+        'platform': platform.platform(),
+        'time': time.strftime('%Y-%m-%d %H:%M:%S'),
+        'results': results,
+    }
+    with open(path, 'w') as file:
+        json.dump(data, file, indent=2)
+
+
+def load(path: str) -> List[dict]:
+    """
+    Reads benchmark results written by `save()`.
+
+    Returns:
+        `list` of results.
+    """
+    with open(path) as file:
+        return json.load(file)['results']
+
+
+def compare(baseline: List[dict], results: List[dict], tolerance: float = 0.1) -> List[str]:
+    """
+    Compares benchmark results to a baseline and lists all regressions.
+    Results without a matching baseline entry (same scenario, resolution, batch size and backend) are ignored.
+
+    Args:
+        baseline: Results of a previous run.
+        results: Current results.
+        tolerance: Relative deviation that is not considered a regression.
+
+    Returns:
+        `list` of `str` describing each regression. Empty if no regressions were found.
+    """
+    baseline = {_key(b): b for b in baseline}
+    regressions = []
+    for result in results:
+        if _key(result) not in baseline:
+            continue
+        old = baseline[_key(result)]
+        if 'import_seconds' in result:
+            if result['import_seconds'] > old['import_seconds'] * (1 + tolerance):
+                regressions.append(f"'{result['statement']}' import time increased from {old['import_seconds']:.3g} s to {result['import_seconds']:.3g} s")
+            continue
+        name = "{scenario} resolution={resolution} batch_size={batch_size} backend={backend}".format(**result)
+        if result['steps_per_second'] < old['steps_per_second'] * (1 - tolerance):
+            regressions.append(f"{name}: steps/s dropped from {old['steps_per_second']:.3g} to {result['steps_per_second']:.3g}")
+        if result['peak_memory'] > old['peak_memory'] * (1 + tolerance):
+            regressions.append(f"{name}: peak memory increased from {old['peak_memory'] / 2 ** 20:.1f} MB to {result['peak_memory'] / 2 ** 20:.1f} MB")
+        if old['solver_iterations'] is not None and result['solver_iterations'] is not None and result['solver_iterations'] > old['solver_iterations'] * (1 + tolerance):
+            regressions.append(f"{name}: solver iterations increased from {old['solver_iterations']} to {result['solver_iterations']}")
+    return regressions
+
+
+def _key(result: dict) -> Tuple:
+    return result['scenario'], result['resolution'], result['batch_size'], result['backend'], result.get('statement')
@@ -0,0 +1,184 @@
+import warnings
+from typing import Callable
+
+import numpy as np
+
+from phi import math, field, geom
+from phi.field import CenteredGrid, StaggeredGrid, Noise
+from phi.geom import Box, Sphere, union
+from phi.math import batch, channel, instance, extrapolation, Solve
+from phi.physics import advect, fluid, diffuse, flip
+from phi.physics._boundaries import Domain, Obstacle, STICKY as CLOSED
+
+
+class Scenario:
+    """
+    Simulation setup that can be instantiated at different resolutions and batch sizes.
+    All built-in scenarios are listed in `SCENARIOS`.
+    """
+
+    def __init__(self, name: str, setup: Callable, resolutions: tuple, batch_sizes: tuple = (1, 4)):
+        """
+        Args:
+            name: Unique name used to identify results of this scenario.
+            setup: Function `(resolution: int, batch_size: int) -> (state: tuple, step: Callable)`.
+                `step(*state)` must return the next state as `tuple`.
+            resolutions: Default resolutions, given as number of cells along each spatial dimension.
+            batch_sizes: Default batch sizes. Scenarios that do not support batching list only `1`.
+        """
+        self.name = name
+        self.setup = setup
+        self.resolutions = resolutions
+        self.batch_sizes = batch_sizes
+
+    def __repr__(self):
+        return self.name
+
+
+def _smoke_plume(rank: int):
+    def setup(resolution: int, batch_size: int):
+        res = {dim: resolution for dim in 'xyz'[:rank]}
+        bounds = Box(**{dim: 100 for dim in res})
+        velocity = StaggeredGrid(Noise(batch(batch=batch_size), vector=rank), extrapolation.ZERO, bounds=bounds, **res)
+        smoke = CenteredGrid(0, extrapolation.BOUNDARY, bounds=bounds, **res)
+        inflow = 0.2 * CenteredGrid(Sphere(center=math.wrap([50] * (rank - 1) + [10], channel(vector=tuple(res))), radius=5), 0, bounds=bounds, **res)
+        buoyancy_factor = (0,) * (rank - 1) + (0.1,)
+
+        def step(v, s, p, dt=1.):
+            s = advect.mac_cormack(s, v, dt) + inflow
+            buoyancy = s * buoyancy_factor @ v
+            v = advect.semi_lagrangian(v, v, dt) + buoyancy * dt
+            v, p = fluid.make_incompressible(v, (), Solve('auto', 1e-5, 0, x0=p))
+            return v, s, p
+        return (velocity, smoke, None), step
+    return setup
+
+
+def _karman_vortex_street(resolution: int, batch_size: int):
+    speed = 2.
+    bounds = Box(x=128, y=64)
+    velocity = StaggeredGrid((speed, 0), extrapolation.BOUNDARY, x=resolution, y=resolution, bounds=bounds)
+    velocity += 0.1 * StaggeredGrid(Noise(batch(batch=batch_size), vector=2), extrapolation.BOUNDARY, x=resolution, y=resolution, bounds=bounds)
+    cylinder = Obstacle(geom.infinite_cylinder(x=15, y=32, radius=5, inf_dim=None))
+    boundary_mask = StaggeredGrid(Box(x=(-math.INF, 0.5), y=None), velocity.extrapolation, velocity.bounds, velocity.resolution)
+
+    def step(v, p, dt=1.):
+        v = advect.semi_lagrangian(v, v, dt)
+        v = v * (1 - boundary_mask) + boundary_mask * (speed, 0)
+        return fluid.make_incompressible(v, [cylinder], Solve('auto', 1e-5, 0, x0=p))
+    return (velocity, None), step
+
+
+def _flip_liquid(resolution: int, batch_size: int):
+    assert batch_size == 1, "The FLIP scenario does not support batching"
+    domain = Domain(x=resolution, y=resolution, boundaries=CLOSED, bounds=Box(x=64, y=64))
+    gravity = math.tensor([0, -9.81])
+    dt = 0.1
+    obstacle = Box(x=(1, 25), y=(30, 33)).rotated(-20)
+    accessible = field.stagger(CenteredGrid(~obstacle, extrapolation.ZERO, x=resolution, y=resolution, bounds=domain.bounds), math.minimum, extrapolation.ZERO)
+    particles = domain.distribute_points(union(Box(x=(15, 30), y=(50, 60)), Box(x=None, y=(-math.INF, 5)))) * (0, 0)
+    velocity = particles @ domain.staggered_grid()
+
+    def step(particles, velocity):
+        div_free_velocity, _, occupied = flip.make_incompressible(velocity + dt * gravity, domain, particles, accessible)
+        particles = flip.map_velocity_to_particles(particles, div_free_velocity, occupied, previous_velocity_grid=velocity)
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', DeprecationWarning)
+            particles = advect.runge_kutta_4(particles, div_free_velocity, dt, accessible=accessible, occupied=occupied)
+        particles = flip.respect_boundaries(particles, domain, [obstacle])
+        return particles, particles @ domain.staggered_grid()
+    return (particles, velocity), step
+
+
+def _hw2d(resolution: int, batch_size: int):
+    """ Hasegawa-Wakatani plasma model with RK4 time integration, see `demos/hw2d.py`. """
+    c1, nu, hyper_order, dt = 0.1, -0.0005, 3, 0.05
+    length = 2 * np.pi / 0.15
+    dx = length / resolution
+    domain = dict(extrapolation=extrapolation.PERIODIC, bounds=Box(x=length, y=length), x=resolution, y=resolution)
+    density = CenteredGrid(Noise(batch(batch=batch_size)), **domain) * 0.01
+    omega = CenteredGrid(Noise(batch(batch=batch_size)), **domain) * 0.01
+
+    def gradient(n, o):
+        phi = o.with_values(math.fourier_poisson(o.values, dx))
+        dy_phi = field.spatial_gradient(phi).values.vector[1]
+        diff = phi.values - n.values
+        hyper_n, hyper_o = n, o
+        for _ in range(hyper_order):
+            hyper_n, hyper_o = field.laplace(hyper_n), field.laplace(hyper_o)
+        dn = c1 * diff - math._nd._periodic_2d_arakawa_poisson_bracket(phi.values, n.values, dx) - dy_phi + nu * hyper_n.values
+        do = c1 * diff - math._nd._periodic_2d_arakawa_poisson_bracket(phi.values, o.values, dx) + nu * hyper_o.values
+        return n.with_values(dn), o.with_values(do)
+
+    def step(n, o):
+        k1 = gradient(n, o)
+        k2 = gradient(n + 0.5 * dt * k1[0], o + 0.5 * dt * k1[1])
+        k3 = gradient(n + 0.5 * dt * k2[0], o + 0.5 * dt * k2[1])
+        k4 = gradient(n + dt * k3[0], o + dt * k3[1])
+        n = n + dt / 6 * (k1[0] + 2 * k2[0] + 2 * k3[0] + k4[0])
+        o = o + dt / 6 * (k1[1] + 2 * k2[1] + 2 * k3[1] + k4[1])
+        return n, o
+    return (density, omega), step
+
+
+def _diffusion(method: str):
+    def setup(resolution: int, batch_size: int):
+        ext = extrapolation.PERIODIC if method == 'fourier' else extrapolation.ZERO
+        temperature = CenteredGrid(Noise(batch(batch=batch_size)), ext, x=resolution, y=resolution, bounds=Box(x=100, y=100))
+
+        def step(t, dt=1.):
+            if method == 'fourier':
+                return diffuse.fourier(t, 0.5, dt),
+            return diffuse.implicit(t, 0.5, dt, solve=Solve('CG', 1e-5, 0)),
+        return (temperature,), step
+    return setup
+
+
+def _differential_operator(operator: str):
+    """ Repeatedly evaluates a finite-difference operator on a 3D grid, isolating the cost of the stencil evaluation. """
+    def setup(resolution: int, batch_size: int):
+        res = dict(x=resolution, y=resolution, z=resolution)
+        if operator == 'divergence':
+            grid = StaggeredGrid(Noise(batch(batch=batch_size), vector=3), extrapolation.ZERO, bounds=Box(x=100, y=100, z=100), **res)
+            op = field.divergence
+        else:
+            grid = CenteredGrid(Noise(batch(batch=batch_size)), extrapolation.BOUNDARY, bounds=Box(x=100, y=100, z=100), **res)
+            op = {'laplace': field.laplace, 'gradient': field.spatial_gradient}[operator]
+
+        def step(g, _):
+            return g, op(g)
+        return (grid, None), step
+    return setup
+
+
+def _union_query(accelerated: bool):
+    """ Evaluates the signed distance to a union of many spheres on grid points, with or without `geom.accelerate()`. """
+    def setup(resolution: int, batch_size: int):
+        assert batch_size == 1, "Union queries do not support batching"
+        rnd = np.random.RandomState(0)
+        centers = math.tensor(rnd.uniform(0, 100, (2000, 2)), instance('spheres'), channel(vector='x,y'))
+        spheres = Sphere(center=centers, radius=math.tensor(rnd.uniform(.5, 2, 2000), instance('spheres')))
+        obstacles = geom.accelerate(spheres) if accelerated else spheres
+        points = CenteredGrid(0, x=resolution, y=resolution, bounds=Box(x=100, y=100)).points
+
+        def step(p, _):
+            return p, obstacles.approximate_signed_distance(p)
+        return (points, None), step
+    return setup
+
+
+SCENARIOS = {scenario.name: scenario for scenario in [
+    Scenario('smoke_plume_2d', _smoke_plume(2), resolutions=(64, 128, 256)),
+    Scenario('smoke_plume_3d', _smoke_plume(3), resolutions=(16, 32, 64)),
+    Scenario('karman_vortex_street', _karman_vortex_street, resolutions=(64, 128, 256)),
+    Scenario('flip_liquid', _flip_liquid, resolutions=(32, 64), batch_sizes=(1,)),
+    Scenario('hw2d', _hw2d, resolutions=(64, 128, 256)),
+    Scenario('diffusion_implicit', _diffusion('implicit'), resolutions=(64, 128, 256)),
+    Scenario('diffusion_fourier', _diffusion('fourier'), resolutions=(64, 128, 256, 512)),
+    Scenario('laplace_3d', _differential_operator('laplace'), resolutions=(64, 128, 256), batch_sizes=(1,)),
+    Scenario('gradient_3d', _differential_operator('gradient'), resolutions=(64, 128, 256), batch_sizes=(1,)),
+    Scenario('divergence_3d', _differential_operator('divergence'), resolutions=(64, 128, 256), batch_sizes=(1,)),
+    Scenario('union_query', _union_query(accelerated=True), resolutions=(64, 128, 256), batch_sizes=(1,)),
+    Scenario('union_query_brute_force', _union_query(accelerated=False), resolutions=(64, 128, 256), batch_sizes=(1,)),
+]}
+""" Built-in benchmark scenarios by name. """
@@ -46,7 +46,7 @@ from ._field_math import (
     integrate,
     pack_dims,
 )
-from ._field_io import write, read
+from ._field_io import write, read, write_frame, read_frame
 from ._scene import Scene
 
 __all__ = [key for key in globals().keys() if not key.startswith('_')]
@@ -1,3 +1,7 @@
+import json
+import os
+from typing import Callable, Tuple
+
 import numpy as np
 
 from phi import math, geom
@@ -7,6 +11,10 @@ from ._field_math import stack
 from ..math._tensors import NativeTensor
 
 
+MEMMAP_EXTENSION = '.phimm'
+""" File extension of memory-mapped field files, see `write_frame()`. """
+
+
 def write(field: SampledField, file: str or math.Tensor):
     """
     Writes a field to disc using a NumPy file format.
@@ -15,7 +23,7 @@ def write(field: SampledField, file: str or math.Tensor):
     All characteristics of the field are serialized so that it can be fully restored using `read()`.
 
     See Also:
-        `read()`
+        `read()`, `write_frame()`
 
     Args:
         field: Field to be saved.
@@ -24,44 +32,115 @@ def write(field: SampledField, file: str or math.Tensor):
             Dimensions of `file` that are missing in `field` result in data duplication.
             Dimensions of `field` that are missing in `file` result in larger files.
     """
+    _write(field, file, write_single_field)
+
+
+def _write(field: SampledField, file: str or math.Tensor, write_single: Callable):
     if isinstance(file, str):
-        write_single_field(field, file)
+        write_single(field, file)
     elif isinstance(file, math.Tensor):
         if file.rank == 0:
-            write_single_field(field, file.native())
+            write_single(field, file.native())
         else:
             dim = file.shape.names[0]
             files = file.unstack(dim)
             fields = field.dimension(dim).unstack(file.shape.get_size(dim))
             for field_, file_ in zip(fields, files):
-                write(field_, file_)
+                _write(field_, file_, write_single)
     else:
         raise ValueError(file)
 
 
-def write_single_field(field: SampledField, file: str):
+def _grid_data_and_metadata(field: SampledField) -> Tuple[np.ndarray, dict]:
+    if not isinstance(field, Grid):
+        raise NotImplementedError(f"{type(field)} not implemented. Only Grid allowed.")
     if isinstance(field, StaggeredGrid):
         data = field.staggered_tensor().numpy(field.values.shape.names)
     else:
         data = field.values.numpy(field.values.shape.names)
-    dim_names = field.values.shape.names
-    if isinstance(field, Grid):
-        lower = field.bounds.lower.numpy()
-        upper = field.bounds.upper.numpy()
-        bounds_item_names = field.bounds.size.vector.item_names
-        extrap = field.extrapolation.to_dict()
-        np.savez_compressed(file,
-                            dim_names=dim_names,
-                            dim_types=field.values.shape.types,
-                            dim_item_names=field.values.shape.item_names,
-                            field_type=type(field).__name__,
-                            lower=lower,
-                            upper=upper,
-                            bounds_item_names=bounds_item_names,
-                            extrapolation=extrap,
-                            data=data)
-    else:
-        raise NotImplementedError(f"{type(field)} not implemented. Only Grid allowed.")
+    metadata = dict(dim_names=field.values.shape.names,
+                    dim_types=field.values.shape.types,
+                    dim_item_names=field.values.shape.item_names,
+                    field_type=type(field).__name__,
+                    lower=field.bounds.lower.numpy(),
+                    upper=field.bounds.upper.numpy(),
+                    bounds_item_names=field.bounds.size.vector.item_names,
+                    extrapolation=field.extrapolation.to_dict())
+    return data, metadata
+
+
+def write_single_field(field: SampledField, file: str):
+    data, metadata = _grid_data_and_metadata(field)
+    np.savez_compressed(file, **metadata, data=data)
+
+
+def write_frame(field: SampledField, file: str or math.Tensor, frame: int):
+    """
+    Writes one frame of a field to a memory-mapped file that holds all frames of that field.
+
+    Each file stores the raw data of all frames consecutively, followed by a JSON header in `<file>.json` which lists the stored frames and all characteristics of the field.
+    Frames can be added in any order and existing frames are overwritten.
+    All frames of a file must have the same shape and data type.
+
+    Unlike `write()`, reading a frame with `read_frame()` maps only the requested data into memory instead of decompressing the whole file.
+
+    See Also:
+        `read_frame()`, `stored_frames()`, `write()`
+
+    Args:
+        field: Field to be saved.
+        file: Single file as `str` or `Tensor` of string type, see `write()`.
+        frame: Frame number.
+    """
+    _write(field, file, lambda field_, file_: _write_single_frame(field_, file_, frame))
+
+
+def _write_single_frame(field: SampledField, file: str, frame: int):
+    data, metadata = _grid_data_and_metadata(field)
+    data = np.ascontiguousarray(data)
+    header = _read_header(file)
+    if header is None:
+        header = dict(metadata, dtype=data.dtype.str, shape=data.shape, frames=[])
+    elif tuple(header['shape']) != data.shape or np.dtype(header['dtype']) != data.dtype:
+        raise ValueError(f"Cannot write frame {frame} with shape {data.shape} and dtype {data.dtype} to '{file}' which stores frames of shape {tuple(header['shape'])} and dtype {np.dtype(header['dtype'])}")
+    frames = list(header['frames'])
+    if frame not in frames:
+        frames.append(frame)
+    with open(file, 'r+b' if os.path.isfile(file) else 'wb') as stream:
+        stream.seek(frames.index(frame) * data.nbytes)
+        stream.write(data.tobytes())
+    header = dict(header, frames=frames)
+    tmp_file = f"{file}.json.{os.getpid()}.tmp"
+    with open(tmp_file, 'w') as stream:
+        json.dump(header, stream, default=_to_json)
+    os.replace(tmp_file, f"{file}.json")
+
+
+def _to_json(obj):
+    if isinstance(obj, (np.ndarray, np.generic)):
+        return obj.tolist()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def _read_header(file: str) -> dict or None:
+    if not os.path.isfile(f"{file}.json"):
+        return None
+    with open(f"{file}.json") as stream:
+        return json.load(stream)
+
+
+def stored_frames(file: str) -> tuple:
+    """
+    Returns the frame numbers stored in a memory-mapped field file written by `write_frame()`.
+
+    Args:
+        file: Path to the file.
+
+    Returns:
+        `tuple` of frame numbers, empty if `file` does not exist.
+    """
+    header = _read_header(file)
+    return tuple(sorted(header['frames'])) if header is not None else ()
 
 
 def read(file: str or math.Tensor, convert_to_backend=True) -> SampledField:
@@ -96,20 +175,74 @@ def read(file: str or math.Tensor, convert_to_backend=True) -> SampledField:
 def read_single_field(file: str, convert_to_backend=True) -> SampledField:
     stored = np.load(file, allow_pickle=True)
     ftype = stored['field_type']
+    data = stored['data']
+    return _assemble_grid(data, stored, stored['extrapolation'][()], str(ftype), convert_to_backend)
+
+
+def read_frame(file: str or math.Tensor, frame: int, convert_to_backend=True) -> SampledField:
+    """
+    Loads one frame of a field written by `write_frame()`.
+
+    The data is memory-mapped, not read into memory.
+    Slicing the returned field, e.g. `field.x[10:20]`, yields views so that only the accessed sub-region is loaded from disc.
+    This requires `convert_to_backend=False` or NumPy as default backend.
+
+    See Also:
+        `write_frame()`, `read()`.
+
+    Args:
+        file: Single file as `str` or `Tensor` of string type, see `read()`.
+        frame: Frame number.
+        convert_to_backend: Whether to convert the read data to the data format of the default backend, e.g. TensorFlow tensors.
+
+    Returns:
+        Loaded `SampledField`.
+    """
+    if isinstance(file, str):
+        return _read_single_frame(file, frame, convert_to_backend)
+    if isinstance(file, math.Tensor):
+        if file.rank == 0:
+            return _read_single_frame(file.native(), frame, convert_to_backend)
+        else:
+            dim = file.shape[0]
+            fields = [read_frame(file_, frame, convert_to_backend) for file_ in file.unstack(dim.name)]
+            return stack(fields, dim)
+    else:
+        raise ValueError(file)
+
+
+def _read_single_frame(file: str, frame: int, convert_to_backend: bool) -> SampledField:
+    header = _read_header(file)
+    if header is None:
+        raise IOError(f"No memory-mapped field at '{file}'")
+    if frame not in header['frames']:
+        raise IOError(f"Frame {frame} is not stored in '{file}'. Available frames: {stored_frames(file)}")
+    dtype = np.dtype(header['dtype'])
+    shape = tuple(header['shape'])
+    frame_bytes = int(np.prod(shape)) * dtype.itemsize
+    data = np.memmap(file, dtype=dtype, mode='r', offset=header['frames'].index(frame) * frame_bytes, shape=shape)
+    stored = dict(header, lower=np.asarray(header['lower']), upper=np.asarray(header['upper']))
+    return _assemble_grid(data, stored, header['extrapolation'], header['field_type'], convert_to_backend)
+
+
+def _assemble_grid(data: np.ndarray, stored, extrapolation: dict, ftype: str, convert_to_backend: bool) -> SampledField:
     implemented_types = ('CenteredGrid', 'StaggeredGrid')
     if ftype in implemented_types:
-        data = stored['data']
         dim_item_names = stored.get('dim_item_names', (None,) * len(data.shape))
-        data = NativeTensor(data, math.Shape(data.shape, tuple(stored['dim_names']), tuple(stored['dim_types']), tuple(dim_item_names)))
+        data = NativeTensor(data, math.Shape(data.shape, tuple(stored['dim_names']), tuple(stored['dim_types']), tuple(_item_names(n) for n in dim_item_names)))
         if convert_to_backend:
             data = math.tensor(data, convert=convert_to_backend)
         bounds_item_names = stored.get('bounds_item_names', (None,) * len(stored['lower'] + stored['upper']))
         lower = math.wrap(stored['lower'], math.channel(vector=tuple(bounds_item_names))) if stored['lower'].ndim > 0 else math.wrap(stored['lower'])
         upper = math.wrap(stored['upper'], math.channel(vector=tuple(bounds_item_names)))
-        extrapolation = math.extrapolation.from_dict(stored['extrapolation'][()])
+        extrapolation = math.extrapolation.from_dict(extrapolation)
         if ftype == 'CenteredGrid':
             return CenteredGrid(data, bounds=geom.Box(lower, upper), extrapolation=extrapolation)
         elif ftype == 'StaggeredGrid':
             data_ = unstack_staggered_tensor(data, extrapolation)
             return StaggeredGrid(data_, bounds=geom.Box(lower, upper), extrapolation=extrapolation)
     raise NotImplementedError(f"{ftype} not implemented ({implemented_types})")
+
+
+def _item_names(item_names):
+    return tuple(item_names) if isinstance(item_names, list) else item_names  # JSON stores tuples as lists
@@ -1,17 +1,14 @@
 from numbers import Number
-from typing import Callable, List, Tuple
+from typing import Callable, List
 
 from phi import geom
 from phi import math
 from phi.math import Tensor, spatial, instance, tensor
 from phi.geom import Box, Geometry, Sphere
-from phi.math import extrapolate_valid_values, channel, Shape, batch
+from phi.math import extrapolate_valid_values, channel, Shape
 from ._field import Field, SampledField, unstack, SampledFieldType
 from ._grid import CenteredGrid, Grid, StaggeredGrid, GridType
-from ._mask import HardGeometryMask
 from ._point_cloud import PointCloud
-from ..math._tensors import variable_attributes, copy_with
-from ..math.backend import Backend
 
 
 def bake_extrapolation(grid: GridType) -> GridType:
@@ -163,14 +160,11 @@ def divergence(field: Grid) -> CenteredGrid:
         for dim in field.shape.spatial.names:
             div_dim = math.spatial_gradient(field.values.vector[dim], field.dx, 'forward', None, dims=dim, stack_dim=None)
             components.append(div_dim)
-        data = math.sum(components, dim='0')
+        data = sum(components)
         return CenteredGrid(data, bounds=field.bounds, extrapolation=field.extrapolation.spatial_gradient())
     elif isinstance(field, CenteredGrid):
-        left, right = shift(field, (-1, 1), stack_dim=batch('div_'))
-        grad = (right - left) / (field.dx * 2)
-        components = [grad.vector[i].div_[i] for i in range(grad.div_.size)]
-        result = sum(components)
-        return result
+        components = [math.spatial_gradient(field.values.vector[i], field.dx.vector[i], 'central', field.extrapolation[{'vector': i}], dims=dim, stack_dim=None) for i, dim in enumerate(field.shape.spatial.names)]
+        return field.with_values(sum(components))
     else:
         raise NotImplementedError(f"{type(field)} not supported. Only StaggeredGrid allowed.")
 
@@ -394,7 +388,7 @@ def concat(fields: List[SampledFieldType], dim: Shape) -> SampledFieldType:
         elements = geom.concat([f.elements for f in fields], dim, sizes=[f.shape.get_size(dim) for f in fields])
         values = math.concat([math.expand(f.values, f.shape.only(dim)) for f in fields], dim)
         colors = math.concat([math.expand(f.color, f.shape.only(dim)) for f in fields], dim)
-        return PointCloud(elements=elements, values=values, color=colors, extrapolation=fields[0].extrapolation, add_overlapping=fields[0]._add_overlapping, bounds=fields[0]._bounds)
+        return PointCloud(elements=elements, values=values, color=colors, extrapolation=fields[0].extrapolation, add_overlapping=fields[0]._add_overlapping, bounds=fields[0]._bounds, kernel=fields[0].kernel)
     raise NotImplementedError(type(fields[0]))
 
 
@@ -428,7 +422,7 @@ def stack(fields, dim: Shape, dim_bounds: Box = None):
         elements = geom.stack([f.elements for f in fields], dim=dim)
         values = math.stack([f.values for f in fields], dim=dim)
         colors = math.stack([f.color for f in fields], dim=dim)
-        return PointCloud(elements=elements, values=values, color=colors, extrapolation=fields[0].extrapolation, add_overlapping=fields[0]._add_overlapping, bounds=fields[0]._bounds)
+        return PointCloud(elements=elements, values=values, color=colors, extrapolation=fields[0].extrapolation, add_overlapping=fields[0]._add_overlapping, bounds=fields[0]._bounds, kernel=fields[0].kernel)
     raise NotImplementedError(type(fields[0]))
 
 
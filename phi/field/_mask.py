@@ -1,5 +1,6 @@
 from phi import math
-from phi.geom import Geometry
+from phi.geom import Geometry, coverage
+from phi.geom._box import BaseBox
 from ._field import Field
 from ..math import Tensor
 
@@ -29,12 +30,27 @@ class SoftGeometryMask(HardGeometryMask):
     """
     When sampled given another geometry, the approximate overlap between the geometries is computed, allowing for fractional values between 0 and 1.
     """
-    def __init__(self, geometry: Geometry, balance: Tensor or float = 0.5):
+    def __init__(self, geometry: Geometry, balance: Tensor or float = 0.5, method: str = 'approximate', samples: int = 4):
+        """
+        Args:
+            geometry: `Geometry` to rasterize.
+            balance: Mid-level between 0 and 1, see `Geometry.approximate_fraction_inside()`. Only used by `method='approximate'`.
+            method: One of
+                `'approximate'`: Approximates cells as spheres, see `Geometry.approximate_fraction_inside()`.
+                `'exact'`: Computes the covered fraction of box-shaped cells using `phi.geom.coverage()`.
+                This is exact for axis-aligned boxes and 2D spheres and supersamples the cells near the surface of other geometries.
+            samples: Number of supersampling points per axis for `method='exact'`.
+        """
         super().__init__(geometry)
+        assert method in ('approximate', 'exact'), f"method must be 'approximate' or 'exact' but got '{method}'"
         self.balance = balance
+        self.method = method
+        self.samples = samples
 
     def _sample(self, geometry: Geometry) -> Tensor:
+        if self.method == 'exact' and isinstance(geometry, BaseBox):
+            return coverage(self.geometry, geometry, self.samples)
         return self.geometry.approximate_fraction_inside(geometry, self.balance)
 
     def __getitem__(self, item: dict):
-        return SoftGeometryMask(self.geometry[item], self.balance)
+        return SoftGeometryMask(self.geometry[item], self.balance, self.method, self.samples)
@@ -28,7 +28,8 @@ class PointCloud(SampledField):
                  extrapolation: float or math.extrapolation = 0,
                  add_overlapping=False,
                  bounds: Box = None,
-                 color: str or Tensor or tuple or list or None = None):
+                 color: str or Tensor or tuple or list or None = None,
+                 kernel: str = 'nearest'):
         """
         Args:
           elements: `Tensor` or `Geometry` object specifying the sample points and sizes
@@ -37,11 +38,14 @@ class PointCloud(SampledField):
           add_overlapping: True: values of overlapping geometries are summed. False: values between overlapping geometries are interpolated
           bounds: (optional) size of the fixed domain in which the points should get visualized. None results in max and min coordinates of points.
           color: (optional) hex code for color or tensor of colors (same length as elements) in which points should get plotted.
+          kernel: Particle-to-grid kernel used when sampling this field on a grid, one of `'nearest'`, `'linear'`, `'quadratic'`. See `phi.math.splat()`.
         """
         if isinstance(elements, Tensor):
             elements = Point(elements)
         SampledField.__init__(self, elements, math.wrap(values), extrapolation, bounds)
         self._add_overlapping = add_overlapping
+        assert kernel in ('nearest', 'linear', 'quadratic'), f"kernel must be 'nearest', 'linear' or 'quadratic' but got '{kernel}'"
+        self._kernel = kernel
         color = '#0060ff' if color is None else color
         self._color = math.wrap(color, instance('points')) if isinstance(color, (tuple, list)) else math.wrap(color)
 
@@ -60,22 +64,30 @@ class PointCloud(SampledField):
         values = self._values[item]
         color = self._color[item]
         extrapolation = self._extrapolation[item]
-        return PointCloud(elements, values, extrapolation, self._add_overlapping, self._bounds, color)
+        return PointCloud(elements, values, extrapolation, self._add_overlapping, self._bounds, color, self._kernel)
 
     def with_elements(self, elements: Geometry):
-        return PointCloud(elements=elements, values=self.values, extrapolation=self.extrapolation, add_overlapping=self._add_overlapping, bounds=self._bounds, color=self._color)
+        return PointCloud(elements=elements, values=self.values, extrapolation=self.extrapolation, add_overlapping=self._add_overlapping, bounds=self._bounds, color=self._color, kernel=self._kernel)
 
     def with_values(self, values):
-        return PointCloud(elements=self.elements, values=values, extrapolation=self.extrapolation, add_overlapping=self._add_overlapping, bounds=self._bounds, color=self._color)
+        return PointCloud(elements=self.elements, values=values, extrapolation=self.extrapolation, add_overlapping=self._add_overlapping, bounds=self._bounds, color=self._color, kernel=self._kernel)
 
     def with_extrapolation(self, extrapolation: math.Extrapolation):
-        return PointCloud(elements=self.elements, values=self.values, extrapolation=extrapolation, add_overlapping=self._add_overlapping, bounds=self._bounds, color=self._color)
+        return PointCloud(elements=self.elements, values=self.values, extrapolation=extrapolation, add_overlapping=self._add_overlapping, bounds=self._bounds, color=self._color, kernel=self._kernel)
 
     def with_color(self, color: str or Tensor or tuple or list):
-        return PointCloud(elements=self.elements, values=self.values, extrapolation=self.extrapolation, add_overlapping=self._add_overlapping, bounds=self._bounds, color=color)
+        return PointCloud(elements=self.elements, values=self.values, extrapolation=self.extrapolation, add_overlapping=self._add_overlapping, bounds=self._bounds, color=color, kernel=self._kernel)
 
     def with_bounds(self, bounds: Box):
-        return PointCloud(elements=self.elements, values=self.values, extrapolation=self.extrapolation, add_overlapping=self._add_overlapping, bounds=bounds, color=self._color)
+        return PointCloud(elements=self.elements, values=self.values, extrapolation=self.extrapolation, add_overlapping=self._add_overlapping, bounds=bounds, color=self._color, kernel=self._kernel)
+
+    def with_kernel(self, kernel: str):
+        return PointCloud(elements=self.elements, values=self.values, extrapolation=self.extrapolation, add_overlapping=self._add_overlapping, bounds=self._bounds, color=self._color, kernel=kernel)
+
+    @property
+    def kernel(self) -> str:
+        """ Particle-to-grid kernel used when sampling this field on a grid. """
+        return self._kernel
 
     def __value_attrs__(self):
         return '_values', '_extrapolation'
@@ -93,6 +105,8 @@ class PointCloud(SampledField):
             return False
         if self._add_overlapping != other._add_overlapping:
             return False
+        if self._kernel != other._kernel:
+            return False
         if self.values is None:
             return other.values is None
         if other.values is None:
@@ -131,7 +145,7 @@ class PointCloud(SampledField):
 
     def grid_scatter(self, bounds: Box, resolution: math.Shape, outside_handling: str):
         """
-        Approximately samples this field on a regular grid using math.scatter().
+        Approximately samples this field on a regular grid using `math.scatter()` for the `'nearest'` kernel and `math.splat()` otherwise.
 
         Args:
           outside_handling: `str` passed to `phi.math.scatter()`.
@@ -147,7 +161,10 @@ class PointCloud(SampledField):
         base = math.zeros(resolution)
         if isinstance(self.extrapolation, math.extrapolation.ConstantExtrapolation):
             base += self.extrapolation.value
-        scattered = math.scatter(base, closest_index, self.values, mode=mode, outside_handling=outside_handling)
+        if self._kernel == 'nearest':
+            scattered = math.scatter(base, closest_index, self.values, mode=mode, outside_handling=outside_handling)
+        else:
+            scattered = math.splat(base, closest_index, self.values, kernel=self._kernel, mode=mode, outside_handling='discard' if outside_handling == 'discard' else 'clamp')
         return scattered
 
     def __repr__(self):
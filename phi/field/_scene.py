@@ -10,7 +10,7 @@ from os.path import join, isfile, isdir, abspath, expanduser, basename, split
 
 from phi import struct, math, __version__ as phi_version
 from ._field import Field, SampledField
-from ._field_io import read, write
+from ._field_io import read, write, read_frame, write_frame, stored_frames, MEMMAP_EXTENSION
 from ..math import Shape, batch
 from ..math._tensors import Sliceable
 from ..math.backend import PHI_LOGGER
@@ -22,6 +22,9 @@ def read_sim_frame(directory: math.Tensor,
                    convert_to_backend=True):
     def single_read(name):
         name = _slugify_filename(name)
+        if isfile(_memmap_filename(next(iter(math.flatten(directory))), name) + '.json'):
+            files = math.map(lambda dir_: _memmap_filename(dir_, name), directory)
+            return read_frame(files, frame, convert_to_backend=convert_to_backend)
         files = math.map(lambda dir_: _filename(dir_, name, frame), directory)
         return read(files, convert_to_backend=convert_to_backend)
 
@@ -31,7 +34,8 @@ def read_sim_frame(directory: math.Tensor,
 def write_sim_frame(directory: math.Tensor,
                     fields: Field or tuple or list or dict or struct.Struct,
                     frame: int,
-                    names: str or tuple or list or struct.Struct or None = None):
+                    names: str or tuple or list or struct.Struct or None = None,
+                    storage: str = 'npz'):
     """
     Write a Field or structure of Fields to files.
     The filenames are created from the provided names and the frame index in accordance with the
@@ -48,7 +52,9 @@ def write_sim_frame(directory: math.Tensor,
         frame: Number < 1000000, typically time step index.
         names: (Optional) Structure matching fields, holding the filename for each respective Field.
             If not provided, names are automatically generated based on the structure of fields.
+        storage: `'npz'` to write one compressed file per field and frame or `'memmap'` to append the frame to one memory-mapped file per field, see `phi.field.write_frame()`.
     """
+    assert storage in ('npz', 'memmap'), f"Unsupported storage: '{storage}'"
     if names is None:
         names = struct.names(fields)
     if frame > 1000000:
@@ -56,6 +62,9 @@ def write_sim_frame(directory: math.Tensor,
 
     def single_write(f, name):
         name = _slugify_filename(name)
+        if isinstance(f, SampledField) and storage == 'memmap':
+            write_frame(f, math.map(lambda dir_: _memmap_filename(dir_, name), directory), frame)
+            return
         files = math.map(lambda dir_: _filename(dir_, name, frame), directory)
         if isinstance(f, SampledField):
             write(f, files)
@@ -73,6 +82,10 @@ def _filename(simpath, name, frame):
     return join(simpath, f"{slugify(name)}_{frame:06d}.npz")
 
 
+def _memmap_filename(simpath, name):
+    return join(simpath, f"{slugify(name)}{MEMMAP_EXTENSION}")
+
+
 def _str(bytes_or_str):  # on Linux, os.listdir returns bytes instead of strings
     if isinstance(bytes_or_str, str):
         return bytes_or_str
@@ -82,12 +95,14 @@ def _str(bytes_or_str):  # on Linux, os.listdir returns bytes instead of strings
 
 def get_fieldnames(simpath) -> tuple:
     fieldnames_set = {_str(f)[:-11] for f in os.listdir(simpath) if _str(f).endswith(".npz")}
+    fieldnames_set.update(_str(f)[:-len(MEMMAP_EXTENSION + '.json')] for f in os.listdir(simpath) if _str(f).endswith(MEMMAP_EXTENSION + '.json'))
     return tuple(sorted(fieldnames_set))
 
 
 def get_frames(path: str, field_name: str = None, mode=set.intersection) -> tuple:
     if field_name is not None:
         all_frames = {int(f[-10:-4]) for f in os.listdir(path) if _str(f).startswith(field_name) and _str(f).endswith(".npz")}
+        all_frames.update(stored_frames(_memmap_filename(path, field_name)))
         return tuple(sorted(all_frames))
     else:
         fields = get_fieldnames(path)
@@ -106,6 +121,7 @@ class Scene(Sliceable):
 
     All data of a `Scene` is located inside a single directory with name `sim_xxxxxx` where `xxxxxx` is the `id`.
     The data of the scene is organized into NumPy files by *name* and *frame*.
+    Alternatively, scenes created with `storage='memmap'` store all frames of a field in one memory-mapped file, see `phi.field.write_frame()`.
 
     To create a new scene, use `Scene.create()`.
     To reference an existing scene, use `Scene.at()`.
@@ -149,6 +165,7 @@ class Scene(Sliceable):
                shape: math.Shape = math.EMPTY_SHAPE,
                name='sim',
                copy_calling_script=True,
+               storage: str = 'npz',
                **dimensions) -> 'Scene':
         """
         Creates a new `Scene` or a batch of new scenes inside `parent_directory`.
@@ -162,6 +179,11 @@ class Scene(Sliceable):
             name: Name of the directory (excluding index). Default is `'sim'`.
             copy_calling_script: Whether to copy the Python file that invoked this method into the `src` folder of all created scenes.
                 See `Scene.copy_calling_script()`.
+            storage: How `Scene.write()` stores fields.
+                `'npz'` writes one compressed NumPy file per field and frame.
+                `'memmap'` writes one uncompressed file per field holding all frames.
+                `Scene.read()` then memory-maps the data instead of loading it, so that reading single frames or sub-regions of large fields is fast.
+                The choice is stored in the scene properties.
             dimensions: Additional batch dimensions
 
         Returns:
@@ -180,6 +202,9 @@ class Scene(Sliceable):
         paths = math.map(lambda id_: join(parent_directory, f"{name}_{id_:06d}"), ids)
         scene = Scene(paths)
         scene.mkdir()
+        assert storage in ('npz', 'memmap'), f"Unsupported storage: '{storage}'"
+        if storage != 'npz':
+            scene.put_property('storage', storage)
         if copy_calling_script:
             try:
                 scene.copy_calling_script()
@@ -350,12 +375,13 @@ class Scene(Sliceable):
                 json.dump(instance_properties, out, indent=2)
 
     def write_sim_frame(self, arrays, fieldnames, frame):
-        write_sim_frame(self._paths, arrays, names=fieldnames, frame=frame)
+        write_sim_frame(self._paths, arrays, names=fieldnames, frame=frame, storage=self.storage)
 
     def write(self, data: dict = None, frame=0, **kw_data):
         """
         Writes fields to this scene.
-        One NumPy file will be created for each `phi.field.Field`
+        One NumPy file will be created for each `phi.field.Field`.
+        For scenes created with `storage='memmap'`, the frame is added to one file per `phi.field.Field` instead.
 
         See Also:
             `Scene.read()`.
@@ -367,7 +393,14 @@ class Scene(Sliceable):
         """
         data = dict(data) if data else {}
         data.update(kw_data)
-        write_sim_frame(self._paths, data, names=None, frame=frame)
+        write_sim_frame(self._paths, data, names=None, frame=frame, storage=self.storage)
+
+    @property
+    def storage(self) -> str:
+        """ Storage format used by `Scene.write()`, either `'npz'` or `'memmap'`. See `Scene.create()`. """
+        if not self.exist_properties():
+            return 'npz'
+        return self.properties.get('storage', 'npz')
 
     def read_array(self, field_name, frame):
         return read_sim_frame(self._paths, field_name, frame=frame)
@@ -379,6 +412,8 @@ class Scene(Sliceable):
         """
         Reads one or multiple fields from disc.
 
+        Fields stored with `storage='memmap'` are memory-mapped so that only the accessed data is loaded from disc, see `phi.field.read_frame()`.
+
         See Also:
             `Scene.write()`.
 
@@ -12,6 +12,8 @@ See the `phi.geom` module documentation at https://tum-pbs.github.io/PhiFlow/Geo
 
 from ._geom import Geometry, Point, assert_same_rank
 from ._union import union
+from ._grid_index import accelerate
+from ._coverage import coverage
 from ._box import Box, GridCell, BaseBox, Cuboid
 from ._sphere import Sphere
 from ._stack import stack
@@ -0,0 +1,102 @@
+"""
+Accurate cell-coverage fractions for rasterizing geometries onto grids.
+
+`Geometry.approximate_fraction_inside()` treats each cell as a sphere and evaluates the signed distance once.
+The functions in this module compute the covered fraction of each box-shaped cell exactly where a closed form exists
+and by supersampling the narrow band of cells that intersect the surface otherwise.
+"""
+from typing import Callable
+
+from phi import math
+from ._geom import Geometry
+from ._box import BaseBox
+from ._sphere import Sphere
+from ..math import Tensor, spatial, channel
+
+
+def coverage(geometry: Geometry, cells: BaseBox, samples: int = 4) -> Tensor:
+    """
+    Computes the fraction of each cell in `cells` that lies inside `geometry`.
+
+    Only cells that `geometry.approximate_signed_distance()` places close to the surface are evaluated, the remaining cells are either fully inside or fully outside.
+    Axis-aligned boxes and spheres up to two dimensions are rasterized analytically.
+    All other geometries, including `RotatedGeometry` and unions, are supersampled with `samples` points per axis.
+
+    Args:
+        geometry: `Geometry` to rasterize.
+        cells: Box-shaped cells, typically a `GridCell`.
+        samples: Number of supersampling points per axis for boundary cells.
+
+    Returns:
+        Covered fraction between 0 and 1 as `Tensor` with the non-channel dimensions of `cells` and `geometry`.
+    """
+    assert isinstance(cells, BaseBox), f"coverage() requires box-shaped cells but got {type(cells).__name__}"
+    if geometry.shape.instance.is_empty and isinstance(geometry, BaseBox):
+        fraction = lambda lower, upper: _box_coverage(geometry.lower, geometry.upper, lower, upper)
+    elif geometry.shape.instance.is_empty and isinstance(geometry, Sphere) and geometry.spatial_rank == 1:
+        fraction = lambda lower, upper: _box_coverage(geometry.center - geometry.radius, geometry.center + geometry.radius, lower, upper)
+    elif geometry.shape.instance.is_empty and isinstance(geometry, Sphere) and geometry.spatial_rank == 2:
+        fraction = lambda lower, upper: _circle_coverage(geometry.center, geometry.radius, lower, upper)
+    else:
+        fraction = lambda lower, upper: _supersampled_coverage(geometry, lower, upper, samples)
+    return _narrow_band(geometry, cells, fraction)
+
+
+def _narrow_band(geometry: Geometry, cells: BaseBox, fraction: Callable) -> Tensor:
+    """ Evaluates `fraction(lower, upper)` only for cells that intersect the surface of `geometry`. """
+    center = cells.center
+    half_size = math.expand(cells.half_size, center.shape.only('vector'))
+    distance = geometry.approximate_signed_distance(center)
+    cell_dims = center.shape.non_channel
+    if cell_dims.volume == 0 or not geometry.shape.batch.is_empty or not math.all_available(distance, center):  # evaluate all cells
+        return fraction(center - half_size, center + half_size)
+    inside = math.to_float(distance < 0)
+    flat_boundary = math.pack_dims(math.abs(distance) < math.sqrt(math.vec_squared(half_size)), cell_dims, spatial('_cells'))
+    boundary = math.nonzero(flat_boundary)
+    if boundary.shape.get_size('nonzero') == 0:
+        return inside
+    boundary_center = math.pack_dims(center, cell_dims, spatial('_cells'))[{'_cells': boundary}]
+    boundary_half_size = math.pack_dims(math.expand(half_size, cell_dims), cell_dims, spatial('_cells'))[{'_cells': boundary}]
+    boundary_center = math.rename_dims(boundary_center, 'nonzero', spatial('_boundary'))
+    boundary_half_size = math.rename_dims(boundary_half_size, 'nonzero', spatial('_boundary'))
+    boundary_fraction = fraction(boundary_center - boundary_half_size, boundary_center + boundary_half_size)
+    flat_fraction = math.scatter(math.pack_dims(inside, cell_dims, spatial('_cells')), boundary, math.rename_dims(boundary_fraction, '_boundary', boundary.shape.instance))
+    return math.unpack_dims(flat_fraction, '_cells', cell_dims)
+
+
+def _box_coverage(lower: Tensor, upper: Tensor, cell_lower: Tensor, cell_upper: Tensor) -> Tensor:
+    overlap = math.maximum(math.minimum(upper, cell_upper) - math.maximum(lower, cell_lower), 0)
+    return math.prod(overlap / (cell_upper - cell_lower), 'vector')
+
+
+def _circle_coverage(center: Tensor, radius: Tensor, cell_lower: Tensor, cell_upper: Tensor) -> Tensor:
+    """ Exact area of the intersection between a circle and each cell, divided by the cell area. """
+    x0, y0 = (cell_lower - center).vector.unstack(2)
+    x1, y1 = (cell_upper - center).vector.unstack(2)
+    corner = channel('_corner')
+    area = math.sum(_quadrant_area(math.stack([x1, x0, x1, x0], corner), math.stack([y1, y1, y0, y0], corner), radius) * math.wrap([1, -1, -1, 1], corner), '_corner')
+    return math.clip(area / math.prod(cell_upper - cell_lower, 'vector'), 0, 1)
+
+
+def _quadrant_area(a: Tensor, b: Tensor, r: Tensor) -> Tensor:
+    """ Area of the intersection between the circle of radius `r` around the origin and the quadrant `x <= a, y <= b`. """
+    def column_integral(x):  # integral of sqrt(r² - x²) from 0 to x
+        x = math.clip(x, -r, r)
+        return 0.5 * (x * math.sqrt(math.maximum(r ** 2 - x ** 2, 0)) + r ** 2 * math.arcsin(math.clip(x / r, -1, 1)))
+    a = math.clip(a, -r, r)
+    c = math.sqrt(math.maximum(r ** 2 - b ** 2, 0))  # columns |x| < c are cut off at y = b
+    inner = math.clip(a, -c, c)
+    area = (b * (inner + c) + column_integral(inner) + column_integral(c)) * math.to_float(a > -c)
+    full_columns = 2 * (column_integral(math.minimum(a, -c)) + column_integral(r)) + 2 * (column_integral(math.maximum(a, c)) - column_integral(c))
+    return area + math.where(b >= 0, full_columns, 0)
+
+
+def _supersampled_coverage(geometry: Geometry, cell_lower: Tensor, cell_upper: Tensor, samples: int) -> Tensor:
+    """ Fraction of `samples` stratified points per axis lying inside `geometry`. """
+    vector = cell_lower.shape['vector']
+    sample_dims = [f'_sample_{i}' for i in range(vector.size)]
+    points_1d = math.linspace(0.5 / samples, 1 - 0.5 / samples, samples, spatial('_s'))
+    local = math.meshgrid(stack_dim=vector, assign_item_names=False, **{dim: points_1d for dim in sample_dims})
+    local = math.pack_dims(local, sample_dims, spatial('_sample'))
+    points = cell_lower + local * (cell_upper - cell_lower)
+    return math.mean(math.to_float(geometry.lies_inside(points)), '_sample')
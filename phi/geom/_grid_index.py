@@ -0,0 +1,238 @@
+"""
+Uniform-grid bucket index for fast point queries on large unions of geometries.
+
+`union()` stacks geometries of the same type along an instance dimension and their `lies_inside()` and `approximate_signed_distance()`
+evaluate every member at every query point before reducing.
+The index assigns each member to all grid cells overlapped by its bounding box so that each query point only evaluates the members listed in its cell.
+"""
+import numpy as np
+
+from phi import math
+from ._geom import Geometry
+from ._union import Union
+from ..math import Tensor, spatial, instance, channel
+from ..math._tensors import variable_attributes, copy_with
+
+
+class _GridIndex:
+    """
+    Lookup table from grid cells to the indices of all member geometries whose bounding boxes, enlarged by `max_distance`, overlap the cell.
+    The table is built once with NumPy while queries use backend-agnostic `Tensor` operations.
+    """
+
+    def __init__(self, lower: np.ndarray, cell_size: float, resolution: np.ndarray, table: np.ndarray, max_distance: float, vector_names: tuple):
+        self.lower = lower
+        self.cell_size = cell_size
+        self.resolution = resolution
+        self.table = table
+        self.max_distance = max_distance
+        self.vector_names = vector_names
+        strides = np.cumprod([1, *resolution[:0:-1]])[::-1]
+        vector = channel(vector=vector_names)
+        self._lower = math.wrap(lower, vector)
+        self._resolution = math.wrap(resolution, vector)
+        self._strides = math.wrap(strides, vector)
+        self._table = math.wrap(table, instance('cells'), instance('_candidate'))
+        self._far = math.wrap(lower + 2 * cell_size * resolution + max_distance + 1, vector)
+
+    @staticmethod
+    def build(lower_bounds: np.ndarray, upper_bounds: np.ndarray, cell_size: float or None, max_distance: float or None, vector_names: tuple) -> '_GridIndex':
+        """
+        Args:
+            lower_bounds: Lower corners of the member bounding boxes as array of shape `(members, rank)`.
+            upper_bounds: Upper corners of the member bounding boxes as array of shape `(members, rank)`.
+            cell_size: Edge length of the grid cells. If `None`, it is chosen so that the grid has at most one cell per member and no cell is much smaller than a typical member.
+            max_distance: Members are listed in all cells within this distance of their bounding box. Defaults to `cell_size`.
+            vector_names: Order of the spatial components.
+        """
+        members, rank = lower_bounds.shape
+        if cell_size is None:
+            extent = np.maximum(upper_bounds.max(0) - lower_bounds.min(0), 1e-6)
+            cell_size = max(float(np.median((upper_bounds - lower_bounds).max(1))), float(np.prod(extent) / members) ** (1 / rank))
+        max_distance = cell_size if max_distance is None else max_distance
+        lo = lower_bounds - max_distance
+        hi = upper_bounds + max_distance
+        lower = lo.min(0)
+        extent = np.maximum(hi.max(0) - lower, 1e-6)
+        resolution = np.maximum(1, np.ceil(extent / cell_size)).astype(np.int64)
+        cell_lo = np.clip(np.floor((lo - lower) / cell_size).astype(np.int64), 0, resolution - 1)
+        cell_hi = np.clip(np.floor((hi - lower) / cell_size).astype(np.int64), 0, resolution - 1)
+        cell_extent = cell_hi - cell_lo + 1
+        counts = np.prod(cell_extent, 1)
+        member = np.repeat(np.arange(members), counts)
+        local = np.arange(len(member)) - np.repeat(np.cumsum(counts) - counts, counts)
+        strides = np.cumprod([1, *resolution[:0:-1]])[::-1]
+        cell = np.zeros(len(member), np.int64)
+        for dim in reversed(range(rank)):  # unravel the local index within each member's block of cells
+            size = cell_extent[member, dim]
+            cell += (cell_lo[member, dim] + local % size) * strides[dim]
+            local //= size
+        order = np.argsort(cell, kind='stable')
+        cell, member = cell[order], member[order]
+        per_cell = np.bincount(cell, minlength=int(np.prod(resolution)))
+        slot = np.arange(len(cell)) - (np.cumsum(per_cell) - per_cell)[cell]
+        table = np.full((len(per_cell), max(1, per_cell.max())), -1, np.int32)
+        table[cell, slot] = member
+        return _GridIndex(lower, cell_size, resolution, table, max_distance, vector_names)
+
+    @property
+    def max_candidates(self) -> int:
+        """ Largest number of members listed in any cell. """
+        return self.table.shape[1]
+
+    def shifted(self, delta: np.ndarray) -> '_GridIndex':
+        return _GridIndex(self.lower + delta, self.cell_size, self.resolution, self.table, self.max_distance, self.vector_names)
+
+    def candidates(self, location: Tensor):
+        """
+        Looks up the candidate members for each query point.
+
+        Args:
+            location: Query points with a single non-channel dimension and a `vector` dimension.
+
+        Returns:
+            index: Member indices with the dimensions of `location` and the instance dimension `_candidate`. Invalid entries are set to 0.
+            valid: `bool` `Tensor` of the same shape marking entries that reference an actual member.
+        """
+        cell = math.to_int32(math.floor((location - self._lower) / self.cell_size))
+        in_grid = math.all((cell >= 0) & (cell < self._resolution), 'vector')
+        cell = math.clip(cell, 0, self._resolution - 1)
+        flat = math.sum(cell * self._strides, 'vector')
+        index = self._table[{'cells': math.expand(flat, channel(index='cells'))}]
+        valid = (index >= 0) & in_grid
+        return math.where(valid, index, 0), valid
+
+
+class GridIndexedGeometry(Geometry):
+    """
+    Union of geometries stacked along one instance dimension with a `_GridIndex` accelerating `lies_inside()` and `approximate_signed_distance()`.
+    All other properties are taken from the wrapped geometry.
+
+    Create instances using `accelerate()`.
+    """
+
+    def __init__(self, geometry: Geometry, index: _GridIndex):
+        self._geometry = geometry
+        self._index = index
+        self._dim = geometry.shape.instance.name
+
+    @property
+    def geometry(self) -> Geometry:
+        """ The wrapped geometry. """
+        return self._geometry
+
+    @property
+    def shape(self):
+        return self._geometry.shape
+
+    @property
+    def center(self):
+        return self._geometry.center
+
+    @property
+    def volume(self):
+        return self._geometry.volume
+
+    @property
+    def shape_type(self):
+        return self._geometry.shape_type
+
+    def _query(self, location: Tensor, evaluate):
+        points = location.shape.non_channel
+        flat_location = math.pack_dims(location, points, spatial('_points'))
+        index, valid = self._index.candidates(flat_location)
+        index = math.expand(index, channel(index=self._dim))
+        attrs = {a: getattr(self._geometry, a) for a in variable_attributes(self._geometry)}
+        attrs = {a: v[{self._dim: index}] if self._dim in v.shape else v for a, v in attrs.items()}
+        candidates = copy_with(self._geometry, **attrs)
+        candidate_location = math.where(valid, flat_location, self._index._far)  # moves unused candidate slots far away from all members
+        result = evaluate(candidates, candidate_location)
+        return math.unpack_dims(result, '_points', points)
+
+    def lies_inside(self, location: Tensor) -> Tensor:
+        return self._query(location, lambda g, loc: g.lies_inside(loc))
+
+    def approximate_signed_distance(self, location: Tensor) -> Tensor:
+        """
+        Computes the distance to the closest member that is listed in the cell of each query point.
+        The result is exact up to the `max_distance` of the index and is clamped to `max_distance` beyond that.
+        """
+        distance = self._query(location, lambda g, loc: g.approximate_signed_distance(loc))
+        return math.minimum(distance, self._index.max_distance)
+
+    def push(self, positions: Tensor, outward: bool = True, shift_amount: float = 0) -> Tensor:
+        return self._geometry.push(positions, outward, shift_amount)
+
+    def sample_uniform(self, *shape: math.Shape) -> Tensor:
+        return self._geometry.sample_uniform(*shape)
+
+    def bounding_radius(self):
+        return self._geometry.bounding_radius()
+
+    def bounding_half_extent(self):
+        return self._geometry.bounding_half_extent()
+
+    def shifted(self, delta: Tensor) -> Geometry:
+        if not delta.shape.non_channel.is_empty:  # members move individually
+            return accelerate(self._geometry.shifted(delta), max_distance=self._index.max_distance)
+        delta_np = math.expand(delta, channel(vector=self._index.vector_names)).numpy('vector')
+        return GridIndexedGeometry(self._geometry.shifted(delta), self._index.shifted(delta_np))
+
+    def rotated(self, angle) -> Geometry:
+        return accelerate(self._geometry.rotated(angle), max_distance=self._index.max_distance)
+
+    def scaled(self, factor: float or Tensor) -> Geometry:
+        return accelerate(self._geometry.scaled(factor), max_distance=self._index.max_distance)
+
+    def unstack(self, dimension: str) -> tuple:
+        return self._geometry.unstack(dimension)
+
+    def __getitem__(self, item: dict):
+        return self._geometry[item]
+
+    def __eq__(self, other):
+        return isinstance(other, GridIndexedGeometry) and self._index.max_distance == other._index.max_distance and self._geometry == other._geometry
+
+    def __hash__(self):
+        return hash(self._geometry)
+
+    def __repr__(self):
+        return f"{self._geometry} indexed on {'x'.join(str(r) for r in self._index.resolution)} cells"
+
+
+def accelerate(geometry: Geometry, cell_size: float = None, max_distance: float = None) -> Geometry:
+    """
+    Builds a uniform-grid bucket index over the members of a union so that `lies_inside()` and `approximate_signed_distance()`
+    only evaluate members close to each query point.
+    For `n` query points and `m` members, the cost drops from `O(n·m)` to `O(n·k)` where `k` is the largest number of members overlapping a grid cell.
+
+    The index is built from the member bounds given by `Geometry.bounding_half_extent()` and must be rebuilt when the members move.
+    It is built using NumPy and cannot be created inside jit-compiled functions but may be queried with any backend.
+
+    Args:
+        geometry: Union of geometries, as created by `union()`.
+            Geometries stacked along one instance dimension are indexed.
+            For a `Union` of mixed geometry types, each stacked member is indexed separately.
+            Geometries without instance dimension are returned unchanged.
+        cell_size: Edge length of the grid cells. By default, the cell size is chosen based on the member sizes and number.
+        max_distance: `approximate_signed_distance()` is exact for points within this distance of any member.
+            Points farther than `max_distance` from all members get the value `max_distance` instead of their true distance.
+            Larger values list each member in more cells. Defaults to the cell size.
+
+    Returns:
+        `Geometry` with the same shape and properties as `geometry`.
+    """
+    if isinstance(geometry, GridIndexedGeometry):
+        geometry = geometry.geometry
+    if isinstance(geometry, Union):
+        return Union([accelerate(g, cell_size, max_distance) for g in geometry.geometries])
+    if geometry.shape.instance.is_empty:
+        return geometry
+    assert geometry.shape.instance.rank == 1 and geometry.shape.batch.is_empty, f"accelerate() requires geometries with a single instance dimension and no batch dimensions but got {geometry.shape}"
+    vector_names = geometry.center.shape.get_item_names('vector') or geometry.center.shape.spatial.names
+    vector = channel(vector=vector_names)
+    members = geometry.shape.instance
+    center = math.expand(geometry.center, members & vector).numpy([members.name, 'vector'])
+    half_extent = math.expand(geometry.bounding_half_extent(), members & vector).numpy([members.name, 'vector'])
+    index = _GridIndex.build(center - half_extent, center + half_extent, cell_size, max_distance, vector_names)
+    return GridIndexedGeometry(geometry, index)
@@ -47,6 +47,12 @@ class JaxBackend(Backend):
                 pass  # this is just Jax not finding anything. jaxlib.xla_client._get_local_backends() could help but isn't currently available on GitHub actions
         return devices
 
+    def get_memory_usage(self, device: ComputeDevice = None) -> int or None:
+        device = device or self.get_default_device()
+        memory_stats = getattr(device.ref, 'memory_stats', None)  # only available in newer versions of Jax
+        stats = memory_stats() if memory_stats is not None else None
+        return stats.get('bytes_in_use') if stats else None
+
     # def set_default_device(self, device: ComputeDevice or str):
     #     Backend.set_default_device(self, device)
     #     jax.config.update('jax_platform_name', self._default_device.device_type.lower())  # this does not work
@@ -397,6 +403,9 @@ class JaxBackend(Backend):
             result.append(scatter(b_grid, b_indices, b_values, dnums))
         return jnp.stack(result)
 
+    def bincount(self, x, weights, bins: int):
+        return jnp.bincount(x, weights=weights, minlength=bins, length=bins)
+
     def quantile(self, x, quantiles):
         return jnp.quantile(x, quantiles, axis=-1)
 
@@ -432,8 +441,8 @@ class JaxBackend(Backend):
             array = jnp.array(array)
         return from_numpy_dtype(array.dtype)
 
-    def linear_solve(self, method: str, lin, y, x0, rtol, atol, max_iter, trj: bool) -> SolveResult or List[SolveResult]:
+    def linear_solve(self, method: str, lin, y, x0, rtol, atol, max_iter, trj: bool, preconditioner=None, batch_strategy: str = None) -> SolveResult or List[SolveResult]:
         if method == 'auto' and not trj and not self.is_available(y):
-            return self.conjugate_gradient(lin, y, x0, rtol, atol, max_iter, trj)
+            return self.conjugate_gradient(lin, y, x0, rtol, atol, max_iter, trj, preconditioner)
         else:
-            return Backend.linear_solve(self, method, lin, y, x0, rtol, atol, max_iter, trj)
+            return Backend.linear_solve(self, method, lin, y, x0, rtol, atol, max_iter, trj, preconditioner, batch_strategy)
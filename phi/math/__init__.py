@@ -18,7 +18,7 @@ from .backend import NUMPY, precision, set_global_precision, get_precision
 
 from ._config import GLOBAL_AXIS_ORDER
 from ._shape import Shape, EMPTY_SHAPE, spatial, channel, batch, instance, merge_shapes, concat_shapes, IncompatibleShapes
-from ._tensors import wrap, tensor, layout, Tensor, TensorDim, TensorLike, Dict, to_dict, from_dict, shape
+from ._tensors import wrap, tensor, layout, Tensor, TensorDim, TensorLike, Dict, to_dict, from_dict, shape, fuse
 from .extrapolation import Extrapolation
 from ._ops import (
     choose_backend_t as choose_backend, all_available, convert, seed,
@@ -42,7 +42,7 @@ from ._ops import (
     degrees,
     boolean_mask,
     isfinite,
-    closest_grid_values, grid_sample, scatter, gather,
+    closest_grid_values, grid_sample, scatter, splat, gather,
     fft, ifft, convolve, cumulative_sum,
     dtype, cast,
     close, assert_close,
@@ -59,11 +59,12 @@ from ._nd import (
     extrapolate_valid_values,
 )
 from ._functional import (
-    LinearFunction, jit_compile_linear, jit_compile,
+    LinearFunction, jit_compile_linear, jit_compile, jit_cache_info,
     functional_gradient, functional_gradient as gradient, custom_gradient, print_gradient, hessian,
     solve_linear, solve_nonlinear, minimize, Solve, SolveInfo, ConvergenceException, NotConverged, Diverged, SolveTape,
     map_types, map_s2b,
 )
+from ._trace_cache import set_trace_cache_directory, get_trace_cache_directory
 
 
 PI = 3.14159265358979323846
@@ -2,6 +2,8 @@ import time
 import types
 import uuid
 import warnings
+import weakref
+from collections import OrderedDict, namedtuple
 from functools import wraps
 from typing import Tuple, Callable, Dict, Generic, List, TypeVar, Any
 
@@ -111,11 +113,79 @@ def key_from_args_pack_batch(*args, cache=False, **kwargs) -> Tuple[SignatureKey
     return key, natives, batch_shape
 
 
+TraceCacheInfo = namedtuple('TraceCacheInfo', ['hits', 'misses', 'evictions', 'traces', 'max_traces', 'trace_time'])
+TraceCacheInfo.__doc__ = """
+Statistics of the trace cache of a function compiled with `jit_compile()` or `jit_compile_linear()`, see `jit_cache_info()`.
+
+Attributes:
+    hits: Number of calls that reused an existing trace.
+    misses: Number of calls that required a new trace.
+    evictions: Number of traces that were discarded because the cache was full.
+    traces: Number of traces currently held.
+    max_traces: Maximum number of traces held or `None` if unbounded.
+    trace_time: Total time in seconds spent tracing and compiling.
+"""
+
+
+class TraceCache(OrderedDict):
+    """
+    Least-recently-used mapping from `SignatureKey` to traces.
+    Once more than `max_traces` traces are stored, the least recently used ones are discarded.
+    """
+
+    def __init__(self, max_traces: int = None):
+        assert max_traces is None or max_traces >= 1, f"max_traces must be at least 1 but got {max_traces}"
+        super().__init__()
+        self.max_traces = max_traces
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.trace_time = 0.
+
+    def lookup(self, key: SignatureKey):
+        """ Returns the trace stored for `key` or `None` and updates the hit/miss counters. """
+        if key in self:
+            self.move_to_end(key)
+            self.hits += 1
+            return self[key]
+        self.misses += 1
+        return None
+
+    def store(self, key: SignatureKey, trace, trace_time: float) -> list:
+        """
+        Adds `trace` to the cache.
+
+        Returns:
+            Keys of the evicted traces.
+        """
+        self[key] = trace
+        self.move_to_end(key)
+        self.trace_time += trace_time
+        evicted = []
+        while self.max_traces is not None and len(self) > self.max_traces:
+            evicted_key, _ = self.popitem(last=False)
+            evicted.append(evicted_key)
+            self.evictions += 1
+        return evicted
+
+    def info(self) -> TraceCacheInfo:
+        return TraceCacheInfo(self.hits, self.misses, self.evictions, len(self), self.max_traces, self.trace_time)
+
+
+_COMPILED_FUNCTIONS = weakref.WeakSet()
+
+
+def _warm_up_args(signature) -> tuple:
+    if not isinstance(signature, (tuple, list)):
+        signature = (signature,)
+    return tuple(math.zeros(s) if isinstance(s, Shape) else s for s in signature)
+
+
 class JitFunction:
 
-    def __init__(self, f: Callable):
+    def __init__(self, f: Callable, max_traces: int = None):
         self.f = f
-        self.traces: Dict[SignatureKey, Callable] = {}
+        self.traces: TraceCache = TraceCache(max_traces)
         self.recorded_mappings: Dict[SignatureKey, SignatureKey] = {}
         self.grad_jit = GradientFunction(f.f, f.wrt, f.get_output, jit=True) if isinstance(f, GradientFunction) else None
 
@@ -144,13 +214,31 @@ class JitFunction:
         if not key.backend.supports(Backend.jit_compile):
             warnings.warn(f"jit_copmile() not supported by {key.backend}. Running function '{self.f.__name__}' as-is.", RuntimeWarning)
             return self.f(*args, **kwargs)
-        if key not in self.traces:
-            self.traces[key] = self._jit_compile(key)
-        native_result = self.traces[key](*natives)
+        trace = self.traces.lookup(key)
+        if trace is None:
+            t0 = time.perf_counter()
+            trace = self._jit_compile(key)
+            native_result = trace(*natives)  # the backend traces and compiles on the first call
+            for evicted_key in self.traces.store(key, trace, time.perf_counter() - t0):
+                self.recorded_mappings.pop(evicted_key, None)
+        else:
+            native_result = trace(*natives)
         output_key = match_output_signature(key, self.recorded_mappings, self)
         output_tensors = assemble_tensors(native_result, output_key.shapes)
         return assemble_tree(output_key.tree, output_tensors)
 
+    def warm_up(self, *signatures, **kwargs):
+        """
+        Traces and compiles this function ahead of time for the given input signatures.
+
+        Args:
+            *signatures: One entry per call. Each entry is a `Shape`, a `Tensor` or a `tuple` of these, specifying the positional arguments.
+                `Shape` arguments are replaced by zero-filled tensors.
+            **kwargs: Keyword arguments passed to all calls.
+        """
+        for signature in signatures:
+            self(*_warm_up_args(signature), **kwargs)
+
     def __repr__(self):
         return f"jit({self.f.__name__})"
 
@@ -159,7 +247,7 @@ class JitFunction:
         return self.f.__name__
 
 
-def jit_compile(f: Callable) -> Callable:
+def jit_compile(f: Callable = None, max_traces: int = None) -> Callable:
     """
     Compiles a graph based on the function `f`.
     The graph compilation is performed just-in-time (jit), e.g. when the returned function is called for the first time.
@@ -190,17 +278,33 @@ def jit_compile(f: Callable) -> Callable:
     Jit-compilations cannot be nested, i.e. you cannot call `jit_compile()` while another function is being compiled.
     An exception to this is `jit_compile_linear()` which can be called from within a jit-compiled function.
 
+    Traces are kept in a least-recently-used cache.
+    To limit memory usage, e.g. when the function is called with many different resolutions, pass `max_traces`:
+    ```python
+    @math.jit_compile(max_traces=4)
+    def my_function(x: math.Tensor) -> math.Tensor:
+    ```
+    Use `jit_cache_info()` to inspect the cache and `JitFunction.warm_up()` to trace ahead of time.
+
     See Also:
         `jit_compile_linear()`
 
     Args:
         f: Function to be traced.
             All positional arguments must be of type `Tensor` or `TensorLike` returning a single `Tensor` or `TensorLike`.
+            If `None`, returns a decorator.
+        max_traces: Maximum number of traces to keep. `None` keeps all traces.
 
     Returns:
         Function with similar signature and return values as `f`.
     """
-    return f if isinstance(f, (JitFunction, LinearFunction)) else JitFunction(f)
+    if f is None:
+        return lambda f_: jit_compile(f_, max_traces)
+    if isinstance(f, (JitFunction, LinearFunction)):
+        return f
+    jit_f = JitFunction(f, max_traces)
+    _COMPILED_FUNCTIONS.add(jit_f)
+    return jit_f
 
 
 class LinearFunction(Generic[X, Y], Callable[[X], Y]):
@@ -210,10 +314,10 @@ class LinearFunction(Generic[X, Y], Callable[[X], Y]):
     Use `jit_compile_linear()` to create a linear function representation.
     """
 
-    def __init__(self, f):
+    def __init__(self, f, max_traces: int = None):
         self.f = f
-        self.tracers: Dict[SignatureKey, ShiftLinTracer] = {}
-        self.nl_jit = JitFunction(f)  # for backends that do not support sparse matrices
+        self.tracers: TraceCache = TraceCache(max_traces)
+        self.nl_jit = JitFunction(f, max_traces)  # for backends that do not support sparse matrices
 
     def _trace(self, in_key: SignatureKey) -> 'ShiftLinTracer':
         assert in_key.shapes[0].is_uniform, f"math.jit_compile_linear() only supports uniform tensors for function input and output but input shape was {in_key.shapes[0]}"
@@ -232,14 +336,24 @@ class LinearFunction(Generic[X, Y], Callable[[X], Y]):
         return result_tensor
 
     def _get_or_trace(self, key: SignatureKey):
-        if not key.tracing and key in self.tracers:
-            return self.tracers[key]
+        tracer = self.tracers.lookup(key) if not key.tracing else None
+        if tracer is not None:
+            return tracer
         else:
-            tracer = self._trace(key)
+            from ._trace_cache import trace_cache_path, load_trace, save_trace
+            t0 = time.perf_counter()
+            cache_path = trace_cache_path(self.f, key) if not key.tracing else None
+            tracer = load_trace(cache_path, key.backend) if cache_path is not None else None
+            if tracer is None:
+                tracer = self._trace(key)
+                if cache_path is not None:
+                    save_trace(cache_path, tracer)
+            else:
+                PHI_LOGGER.debug(f"Φ-lin: Loaded trace of '{self.f.__name__}' from '{cache_path}'")
             if not key.tracing:
-                self.tracers[key] = tracer
-                if len(self.tracers) >= 4:
-                    warnings.warn(f"Φ-lin: The compiled linear function '{self.f.__name__}' was traced {len(self.tracers)} times. Performing many traces may be slow and cause memory leaks. A trace is performed when the function is called with different keyword arguments. Multiple linear traces can be avoided by jit-compiling the code that calls jit_compile_linear().", RuntimeWarning)
+                self.tracers.store(key, tracer, time.perf_counter() - t0)
+                if len(self.tracers) >= 4 and self.tracers.max_traces is None:
+                    warnings.warn(f"Φ-lin: The compiled linear function '{self.f.__name__}' was traced {len(self.tracers)} times. Performing many traces may be slow and cause memory leaks. A trace is performed when the function is called with different keyword arguments. Multiple linear traces can be avoided by jit-compiling the code that calls jit_compile_linear(). To bound the memory usage, pass max_traces to jit_compile_linear().", RuntimeWarning)
             return tracer
 
     def __call__(self, *args: X, **kwargs) -> Y:
@@ -280,6 +394,26 @@ class LinearFunction(Generic[X, Y], Callable[[X], Y]):
         # assert key.backend.supports(Backend.sparse_coo_tensor)
         return key
 
+    def warm_up(self, *signatures, **kwargs):
+        """
+        Traces this function ahead of time for the given input signatures.
+
+        Args:
+            *signatures: One entry per call. Each entry is a `Shape`, a `Tensor` or a `tuple` of these, specifying the linear argument followed by the condition arguments.
+                `Shape` arguments are replaced by zero-filled tensors.
+            **kwargs: Keyword arguments passed to all calls.
+        """
+        for signature in signatures:
+            x, *condition_args = _warm_up_args(signature)
+            self._get_or_trace(self._condition_key(x, condition_args, dict(kwargs)))
+
+    def __repr__(self):
+        return f"jit_linear({self.f.__name__})"
+
+    @property
+    def __name__(self):
+        return self.f.__name__
+
     def stencil_inspector(self, *args, **kwargs):
         key, _ = key_from_args(*args, cache=True, **kwargs)
         tracer = self._get_or_trace(key)
@@ -291,7 +425,7 @@ class LinearFunction(Generic[X, Y], Callable[[X], Y]):
         return print_stencil
 
 
-def jit_compile_linear(f: Callable[[X], Y]) -> 'LinearFunction[X, Y]':  # TODO add cache control method, e.g. max_traces
+def jit_compile_linear(f: Callable[[X], Y] = None, max_traces: int = None) -> 'LinearFunction[X, Y]':
     """
     Compile an optimized representation of the linear function `f`.
     For backends that support sparse tensors, a sparse matrix will be constructed for `f`.
@@ -305,20 +439,49 @@ def jit_compile_linear(f: Callable[[X], Y]) -> 'LinearFunction[X, Y]':  # TODO a
     Unlike `jit_compile()`, `jit_compile_linear()` can be called during a regular jit compilation.
 
     See Also:
-        `jit_compile()`
+        `jit_compile()`, `jit_cache_info()`
 
     Args:
         f: Function that is linear in its positional arguments.
             All positional arguments must be of type `Tensor` and `f` must return a `Tensor`.
             `f` may be conditioned on keyword arguments.
             However, passing different values for these will cause `f` to be re-traced unless the conditioning arguments are also being traced.
+            If `None`, returns a decorator.
+        max_traces: Maximum number of traces to keep. The least recently used traces are discarded first. `None` keeps all traces.
 
     Returns:
         `LinearFunction` with similar signature and return values as `f`.
     """
+    if f is None:
+        return lambda f_: jit_compile_linear(f_, max_traces)
     if isinstance(f, JitFunction):
         f = f.f  # cannot trace linear function from jitted version
-    return f if isinstance(f, LinearFunction) else LinearFunction(f)
+    if isinstance(f, LinearFunction):
+        return f
+    linear_f = LinearFunction(f, max_traces)
+    _COMPILED_FUNCTIONS.add(linear_f)
+    return linear_f
+
+
+def jit_cache_info(f: Callable = None) -> TraceCacheInfo or Dict[Callable, TraceCacheInfo]:
+    """
+    Returns statistics about the traces of functions compiled with `jit_compile()` or `jit_compile_linear()`.
+
+    Args:
+        f: Compiled function. If `None`, returns the statistics of all compiled functions that are still referenced.
+
+    Returns:
+        `TraceCacheInfo` for `f` or `dict` mapping all compiled functions to their `TraceCacheInfo`.
+    """
+    if f is None:
+        return {f_: jit_cache_info(f_) for f_ in list(_COMPILED_FUNCTIONS)}
+    if isinstance(f, JitFunction):
+        return f.traces.info()
+    elif isinstance(f, LinearFunction):
+        info = f.tracers.info()
+        nl_info = f.nl_jit.traces.info()  # used by backends without sparse matrix support
+        return TraceCacheInfo(info.hits + nl_info.hits, info.misses + nl_info.misses, info.evictions + nl_info.evictions, info.traces + nl_info.traces, info.max_traces, info.trace_time + nl_info.trace_time)
+    raise ValueError(f"{f} is not a compiled function. Use jit_compile() or jit_compile_linear() to compile functions.")
 
 
 class GradientFunction:
@@ -733,6 +896,8 @@ class ShiftLinTracer(Tensor):
         self.bias = bias
         self._shape = shape
         self._sparse_coo = self._sparse_csr = self._sparse_csc = None
+        self._multigrid = None
+        self._stencil = None
 
     def native(self, order: str or tuple or list or Shape = None):
         """
@@ -767,6 +932,39 @@ class ShiftLinTracer(Tensor):
         native_out = backend.reshape(native_out, order_out.sizes)
         return NativeTensor(native_out, order_out)
 
+    def _stencil_columns(self, out_shape: Shape, src_shape: Shape):
+        """
+        Computes the flat source index of every stencil entry.
+
+        Returns:
+            Integer array of shape `(out_shape.volume, len(self.val))`.
+            Entry `[i, j]` is the source cell that output cell `i` reads for the `j`-th shift.
+        """
+        index_dtype = np.int32 if src_shape.volume * len(self.val) < 2 ** 31 else np.int64
+        shifts = list(self.val.keys())
+        cell_dims = list(out_shape.names)  # which output dimension provides the index for each source dimension
+        for missing_dim in src_shape.without(self._shape).names:
+            cell_dims.insert(self.source.shape.index(missing_dim), None)
+        cols = np.zeros((1,) * out_shape.rank + (1,), index_dtype)
+        stride = 1
+        for dim, cell_dim in reversed(list(zip(src_shape.names, cell_dims))):
+            size = src_shape.get_size(dim)
+            offsets = np.array([shift.get_size(dim) if dim in shift else 0 for shift in shifts], index_dtype)
+            if cell_dim is None:
+                cell = np.zeros((1,) * (out_shape.rank + 1), index_dtype)
+            else:
+                cell_shape = [1] * (out_shape.rank + 1)
+                cell_shape[out_shape.index(cell_dim)] = out_shape.get_size(cell_dim)
+                cell = np.arange(out_shape.get_size(cell_dim), dtype=index_dtype).reshape(cell_shape)
+            cols = cols + ((cell + offsets) % size) * index_dtype(stride)  # shift & wrap, broadcast against previous dims
+            stride *= size
+        return np.broadcast_to(cols, (*out_shape.sizes, len(shifts))).reshape(out_shape.volume, len(shifts))
+
+    def _stencil_values(self, out_shape: Shape):
+        vals = [reshaped_native(values, [*out_shape]) for values in self.val.values()]
+        backend = choose_backend(*vals)
+        return backend, backend.stack(vals, -1)
+
     def get_sparse_coordinate_matrix(self) -> 'SparseMatrixContainer':
         """
         Builds a sparse matrix that represents this linear operation.
@@ -777,21 +975,10 @@ class ShiftLinTracer(Tensor):
         independent_dims = self.independent_dims
         out_shape = self._shape.without(independent_dims)
         src_shape = self.source.shape.without(independent_dims)
-        cols = []
-        vals = []
-        for shift, values in self.val.items():
-            cells = list(cell_indices(out_shape))
-            for missing_dim in src_shape.without(self._shape).names:
-                cells.insert(self.source.shape.index(missing_dim), np.zeros_like(cells[0]))
-            cells = [(cell + shift.get_size(dim) if dim in shift else cell) % src_shape.get_size(dim) for dim, cell in zip(src_shape.names, cells)]  # shift & wrap
-            src_indices = cell_number(cells, src_shape)
-            cols.append(src_indices)
-            vals.append(reshaped_native(values, [*out_shape]))
-        cols = np.stack(cols, -1).flatten()
-        backend = choose_backend(*vals)
-        vals = backend.flatten(backend.stack(vals, -1))
-        rows = np.arange(out_shape.volume * len(self.val)) // len(self.val)
-        # TODO sort indices?
+        cols = self._stencil_columns(out_shape, src_shape).flatten()
+        backend, vals = self._stencil_values(out_shape)
+        vals = backend.flatten(vals)
+        rows = np.arange(out_shape.volume * len(self.val), dtype=cols.dtype) // len(self.val)
         self._sparse_coo = SparseMatrixContainer('coo', (out_shape.volume, src_shape.volume),
                                                  set(self.val.keys()), self.dependent_dims,
                                                  NativeTensor(vals, instance(nnz=len(vals))), rows, cols)
@@ -801,20 +988,35 @@ class ShiftLinTracer(Tensor):
         """
         Builds a sparse matrix that represents this linear operation.
         Independent dimensions, those that can be treated as batch dimensions, are recognized automatically and ignored.
+
+        Every row holds exactly one entry per shift, so the matrix is assembled directly from the stencil without an intermediate COO matrix.
         """
         if self._sparse_csr is not None:
             return self._sparse_csr
-        coo = self.get_sparse_coordinate_matrix()
-        idx = np.arange(1, len(coo.values)+1)  # start indexing at 1 since 0 might get removed
-        import scipy.sparse
-        scipy_csr = scipy.sparse.csr_matrix((idx, (coo.rows, coo.cols)), shape=coo.shape)
-        col_indices = scipy_csr.indices
-        row_ptr = scipy_csr.indptr
-        if coo.values.nnz.size != len(scipy_csr.data):
+        independent_dims = self.independent_dims
+        out_shape = self._shape.without(independent_dims)
+        src_shape = self.source.shape.without(independent_dims)
+        cols = self._stencil_columns(out_shape, src_shape)
+        center = cell_number([s // 2 for s in out_shape.sizes], out_shape)
+        order = np.argsort(cols[center]).astype(cols.dtype)  # shift order of an interior cell, holds for all cells without wrapping
+        cols = cols[:, order]
+        unsorted = np.flatnonzero((cols[:, 1:] <= cols[:, :-1]).any(1))
+        order = np.broadcast_to(order, cols.shape)
+        if len(unsorted):
+            row_order = np.argsort(cols[unsorted], axis=1, kind='stable')
+            cols[unsorted] = np.take_along_axis(cols[unsorted], row_order, axis=1)
+            order = order.copy()
+            order[unsorted] = np.take_along_axis(order[unsorted], row_order, axis=1)
+        if cols.shape[1] > 1 and (cols[:, 1:] == cols[:, :-1]).any():
             warnings.warn("Failed to create CSR matrix because the CSR matrix contains fewer non-zero values than COO. This can happen when the `x` tensor is too small for the stencil.", RuntimeWarning)
-            return coo
-        values = coo.values.nnz[wrap(scipy_csr.data - 1, instance('nnz'))]  # Change order accordingly
-        self._sparse_csr = SparseMatrixContainer('csr', coo.shape, coo.indices_key, coo.src_shape, values, row_ptr, col_indices)
+            return self.get_sparse_coordinate_matrix()
+        row_ptr = np.arange(0, cols.size + 1, cols.shape[1], dtype=cols.dtype)
+        backend, vals = self._stencil_values(out_shape)
+        values = NativeTensor(backend.flatten(vals), instance(nnz=cols.size))
+        if not (order == np.arange(order.shape[1])).all():
+            order = order + np.arange(order.shape[0], dtype=order.dtype)[:, None] * order.shape[1]
+            values = values.nnz[wrap(order.flatten(), instance('nnz'))]  # Change order accordingly
+        self._sparse_csr = SparseMatrixContainer('csr', (out_shape.volume, src_shape.volume), set(self.val.keys()), self.dependent_dims, values, row_ptr, cols.flatten())
         return self._sparse_csr
 
     def get_sparse_csc_matrix(self) -> 'SparseMatrixContainer':
@@ -824,17 +1026,21 @@ class ShiftLinTracer(Tensor):
         """
         if self._sparse_csc is not None:
             return self._sparse_csc
-        coo = self.get_sparse_coordinate_matrix()
-        idx = np.arange(1, len(coo.values)+1)  # start indexing at 1 since 0 might get removed
-        import scipy.sparse
-        scipy_csr = scipy.sparse.csc_matrix((idx, (coo.rows, coo.cols)), shape=coo.shape)
-        row_indices = scipy_csr.indices
-        col_ptr = scipy_csr.indptr
-        if coo.values.nnz.size != len(scipy_csr.data):
+        independent_dims = self.independent_dims
+        out_shape = self._shape.without(independent_dims)
+        src_shape = self.source.shape.without(independent_dims)
+        cols = self._stencil_columns(out_shape, src_shape).flatten()
+        order = np.argsort(cols, kind='stable').astype(cols.dtype)  # rows remain sorted within each column
+        cols = cols[order]
+        rows = order // len(self.val)
+        if len(cols) > 1 and ((cols[1:] == cols[:-1]) & (rows[1:] == rows[:-1])).any():
             warnings.warn("Failed to create CSR matrix because the CSR matrix contains fewer non-zero values than COO. This can happen when the `x` tensor is too small for the stencil.", RuntimeWarning)
-            return coo
-        values = coo.values.nnz[wrap(scipy_csr.data - 1, instance('nnz'))]  # Change order accordingly
-        self._sparse_csc = SparseMatrixContainer('csc', coo.shape, coo.indices_key, coo.src_shape, values, row_indices, col_ptr)
+            return self.get_sparse_coordinate_matrix()
+        col_ptr = np.zeros(src_shape.volume + 1, dtype=cols.dtype)
+        np.cumsum(np.bincount(cols, minlength=src_shape.volume), out=col_ptr[1:])
+        backend, vals = self._stencil_values(out_shape)
+        values = NativeTensor(backend.flatten(vals), instance(nnz=len(cols)))[{'nnz': wrap(order, instance('nnz'))}]  # Change order accordingly
+        self._sparse_csc = SparseMatrixContainer('csc', (out_shape.volume, src_shape.volume), set(self.val.keys()), self.dependent_dims, values, rows.astype(cols.dtype), col_ptr)
         return self._sparse_csc
 
     def get_sparse_matrix(self, matrix_format: str = None) -> 'SparseMatrixContainer':
@@ -845,14 +1051,20 @@ class ShiftLinTracer(Tensor):
                 matrix_format = 'csr'
             else:
                 matrix_format = 'coo'
+        cached = getattr(self, f'_sparse_{matrix_format}', None)
+        if cached is not None:
+            return cached
+        t0 = time.perf_counter()
         if matrix_format == 'csc':
-            return self.get_sparse_csc_matrix()
-        if matrix_format == 'csr':
-            return self.get_sparse_csr_matrix()
+            matrix = self.get_sparse_csc_matrix()
+        elif matrix_format == 'csr':
+            matrix = self.get_sparse_csr_matrix()
         elif matrix_format == 'coo':
-            return self.get_sparse_coordinate_matrix()
+            matrix = self.get_sparse_coordinate_matrix()
         else:
             raise NotImplementedError(f"Unsupported sparse matrix format: '{matrix_format}'")
+        PHI_LOGGER.debug(f"Φ-lin: Assembled {matrix.indexing_type} matrix of shape {matrix.shape} with {matrix.values.shape.volume} entries in {time.perf_counter() - t0:.3f}s, using {matrix.nbytes / 1e6:.1f} MB")
+        return matrix
 
     @property
     def dependent_dims(self):
@@ -1047,6 +1259,12 @@ class SparseMatrixContainer:
     def __variable_attrs__(self):
         return 'values',
 
+    @property
+    def nbytes(self) -> int:
+        """ Memory occupied by the index and value arrays in bytes. """
+        values_bytes = self.values.shape.volume * self.values.dtype.itemsize
+        return values_bytes + sum(getattr(a, 'nbytes', 0) for a in (self.rows, self.cols))
+
     def native(self):
         backend = choose_backend(self.rows, self.cols, *self.values._natives())
         if self.indexing_type == 'csc':
@@ -1057,6 +1275,25 @@ class SparseMatrixContainer:
             return backend.sparse_coo_tensor((self.rows, self.cols), self.values.native(), self.shape)
         assert False, self.indexing_type
 
+    def diagonal(self) -> Tensor:
+        """
+        Returns the diagonal entries of this matrix as a `Tensor` with the dimensions of `src_shape` and the batch dimensions of `values`.
+        Diagonal entries that are not part of the sparsity pattern are zero.
+        """
+        if self.indexing_type == 'coo':
+            rows, cols = self.rows, self.cols
+        elif self.indexing_type == 'csr':
+            rows, cols = np.repeat(np.arange(len(self.rows) - 1), np.diff(self.rows)), self.cols
+        else:  # csc
+            rows, cols = self.rows, np.repeat(np.arange(len(self.cols) - 1), np.diff(self.cols))
+        diagonal_entries, = np.nonzero(rows == cols)
+        value_indices = np.full(self.shape[0], len(rows))  # points to an appended zero
+        value_indices[rows[diagonal_entries]] = diagonal_entries
+        values = math.concat([self.values, math.zeros(self.values.shape.without('nnz') & instance(nnz=1), dtype=self.values.dtype)], 'nnz')
+        diagonal = values.nnz[wrap(value_indices, instance('nnz'))]
+        batch_dims = diagonal.shape.without('nnz')
+        return reshaped_tensor(diagonal.native([*batch_dims.names, 'nnz']), [batch_dims, self.src_shape] if batch_dims else [self.src_shape])
+
 
 class Solve(Generic[X, Y]):  # TODO move to phi.math._functional, put Tensors there
     """
@@ -1072,7 +1309,10 @@ class Solve(Generic[X, Y]):  # TODO move to phi.math._functional, put Tensors th
                  suppress: tuple or list = (),
                  preprocess_y: Callable = None,
                  preprocess_y_args: tuple = (),
-                 gradient_solve: 'Solve[Y, X]' or None = None):
+                 gradient_solve: 'Solve[Y, X]' or None = None,
+                 preconditioner: str or Callable or None = None,
+                 batch_strategy: str = None,
+                 matrix_free: bool = False):
         assert isinstance(method, str)
         self.method: str = method
         """ Optimization method to use. Available solvers depend on the solve function that is used to perform the solve. """
@@ -1095,6 +1335,29 @@ class Solve(Generic[X, Y]):  # TODO move to phi.math._functional, put Tensors th
         self.suppress: tuple = tuple(suppress)
         """ Error types to suppress; `tuple` of `ConvergenceException` types. For these errors, the solve function will instead return the partial result without raising the error. """
         self._gradient_solve: Solve[Y, X] = gradient_solve
+        self.preconditioner: str or Callable or None = preconditioner
+        """ Preconditioner for iterative linear solves, propagated to gradient solves by default. One of
+        
+        * `None` for no preconditioning,
+        * `'jacobi'` to divide by the diagonal of the matrix,
+        * `'ilu'` for an incomplete LU factorization without fill-in, equal to incomplete Cholesky for symmetric matrices.
+          The factorization is computed once on the host and requires the matrix values to be known, i.e. it cannot be used when the matrix depends on traced values,
+        * `'multigrid'` to apply one multigrid V-cycle, see `solve_linear()`,
+        * a function mapping a residual `Tensor` to an approximate solution `Tensor` of the same shape.
+
+        Currently, only the `'CG'` method makes use of preconditioners on all backends, NumPy additionally supports them for all SciPy methods. """
+        assert batch_strategy in (None, 'sequential', 'threads'), f"Unsupported batch_strategy: '{batch_strategy}'"
+        self.batch_strategy: str = batch_strategy
+        """ How batched systems are solved by backends that solve batch entries one by one, such as SciPy solvers with NumPy.
+        
+        * `None` or `'sequential'` solves the batch entries one after another.
+        * `'threads'` solves the batch entries in parallel using a thread pool.
+        
+        All strategies yield the same result. """
+        self.matrix_free: bool = matrix_free
+        """ Whether to apply linear functions compiled with `jit_compile_linear()` directly as stencils instead of building a sparse matrix.
+        Matrix-free solves need less memory and are often faster for large grids but do not support the `'direct'` method or the `'ilu'` preconditioner.
+        This property is propagated to gradient solves by default. """
         self.id = str(uuid.uuid4())
 
     @property
@@ -1106,11 +1369,12 @@ class Solve(Generic[X, Y]):  # TODO move to phi.math._functional, put Tensors th
         In any case, the gradient solve information will be stored in `gradient_solve.result`.
         """
         if self._gradient_solve is None:
-            self._gradient_solve = Solve(self.method, self.relative_tolerance, self.absolute_tolerance, self.max_iterations, None, self.suppress, self.preprocess_y, self.preprocess_y_args)
+            self._gradient_solve = Solve(self.method, self.relative_tolerance, self.absolute_tolerance, self.max_iterations, None, self.suppress, self.preprocess_y, self.preprocess_y_args, preconditioner=self.preconditioner, batch_strategy=self.batch_strategy, matrix_free=self.matrix_free)
         return self._gradient_solve
 
     def __repr__(self):
-        return f"{self.method} with tolerance {self.relative_tolerance} (rel), {self.absolute_tolerance} (abs), max_iterations={self.max_iterations}"
+        preconditioner = f", preconditioner={self.preconditioner}" if self.preconditioner is not None else ""
+        return f"{self.method} with tolerance {self.relative_tolerance} (rel), {self.absolute_tolerance} (abs), max_iterations={self.max_iterations}{preconditioner}"
 
     def __eq__(self, other):
         if not isinstance(other, Solve):
@@ -1120,6 +1384,9 @@ class Solve(Generic[X, Y]):  # TODO move to phi.math._functional, put Tensors th
                 or (self.relative_tolerance != other.relative_tolerance).any \
                 or (self.max_iterations != other.max_iterations).any \
                 or self.preprocess_y is not other.preprocess_y \
+                or self.preconditioner != other.preconditioner \
+                or self.matrix_free != other.matrix_free \
+                or self.batch_strategy != other.batch_strategy \
                 or self.suppress != other.suppress:
             return False
         return self.x0 == other.x0
@@ -1145,7 +1412,8 @@ class SolveInfo(Generic[X, Y]):
                  diverged: Tensor,
                  method: str,
                  msg: str,
-                 solve_time: float):
+                 solve_time: float,
+                 example_times: Tensor = None):
         # tuple.__new__(SolveInfo, (x, residual, iterations, function_evaluations, converged, diverged))
         self.solve: Solve[X, Y] = solve
         """ `Solve`, Parameters specified for the solve. """
@@ -1174,12 +1442,14 @@ class SolveInfo(Generic[X, Y]):
         """ `str`, termination message """
         self.solve_time = solve_time
         """ Time spent in Backend solve function (in seconds) """
+        self.example_times = example_times
+        """ Wall time (in seconds) until each batch example finished, `Tensor` with the batch dimensions of the solve or `None` if not measured by the backend. """
 
     def __repr__(self):
         return self.msg
 
     def snapshot(self, index):
-        return SolveInfo(self.solve, self.x.trajectory[index], self.residual.trajectory[index], self.iterations.trajectory[index], self.function_evaluations.trajectory[index], self.converged.trajectory[index], self.diverged.trajectory[index], self.method, self.msg, self.solve_time)
+        return SolveInfo(self.solve, self.x.trajectory[index], self.residual.trajectory[index], self.iterations.trajectory[index], self.function_evaluations.trajectory[index], self.converged.trajectory[index], self.diverged.trajectory[index], self.method, self.msg, self.solve_time, self.example_times)
 
     def convergence_check(self, only_warn: bool):
         if not all_available(self.diverged, self.converged):
@@ -1386,7 +1656,8 @@ def minimize(f: Callable[[X], Y], solve: Solve[X, Y]) -> X:
         iterations = reshaped_tensor(ret.iterations, [batch_dims])
         function_evaluations = reshaped_tensor(ret.function_evaluations, [batch_dims])
         residual = reshaped_tensor(ret.residual, [batch_dims])
-        result = SolveInfo(solve, x, residual, iterations, function_evaluations, converged, diverged, ret.method, ret.message, t)
+        example_times = reshaped_tensor(ret.wall_time, [batch_dims]) if ret.wall_time is not None else None
+        result = SolveInfo(solve, x, residual, iterations, function_evaluations, converged, diverged, ret.method, ret.message, t, example_times)
     else:  # trajectory
         assert isinstance(ret, (tuple, list)) and all(isinstance(r, SolveResult) for r in ret)
         converged = reshaped_tensor(ret[-1].converged, [batch_dims])
@@ -1396,7 +1667,8 @@ def minimize(f: Callable[[X], Y], solve: Solve[X, Y]) -> X:
         residual = stack([reshaped_tensor(r.residual, [batch_dims]) for r in ret], batch('trajectory'))
         iterations = reshaped_tensor(ret[-1].iterations, [batch_dims])
         function_evaluations = stack([reshaped_tensor(r.function_evaluations, [batch_dims]) for r in ret], batch('trajectory'))
-        result = SolveInfo(solve, x_, residual, iterations, function_evaluations, converged, diverged, ret[-1].method, ret[-1].message, t)
+        example_times = reshaped_tensor(ret[-1].wall_time, [batch_dims]) if ret[-1].wall_time is not None else None
+        result = SolveInfo(solve, x_, residual, iterations, function_evaluations, converged, diverged, ret[-1].method, ret[-1].message, t, example_times)
     for tape in _SOLVE_TAPES:
         tape._add(solve, trj, result)
     result.convergence_check(False)  # raises ConvergenceException
@@ -1464,6 +1736,11 @@ def solve_linear(f: Callable[[X], Y],
             `f` can have additional arguments.
         y: Desired output of `f(x)` as `Tensor` or `TensorLike`.
         solve: `Solve` object specifying optimization method, parameters and initial guess for `x`.
+            Besides the methods supported by the backend, such as `'CG'`, the following geometric multigrid methods can be used if `f` is a spatial stencil compiled with `jit_compile_linear()`:
+            `'multigrid'` iterates V-cycles until convergence, `'multigrid-W'` and `'multigrid-F'` use W- and F-cycles instead.
+            `'CG-multigrid'`, `'CG-multigrid-W'` and `'CG-multigrid-F'` run a conjugate gradient solve preconditioned by one multigrid cycle per iteration.
+            Other preconditioners can be selected via `Solve.preconditioner`.
+            With `Solve.matrix_free`, the operator of `f` is applied as a stencil instead of a sparse matrix.
         f_args: Additional `Tensor` or `TensorLike` arguments to be passed to `f`.
             `f` need not be linear in these arguments.
             Use this instead of lambda function since a lambda will not be recognized as calling a jit-compiled function.
@@ -1482,9 +1759,15 @@ def solve_linear(f: Callable[[X], Y],
     assert len(x0_tensors) == len(y_tensors) == 1, "Only single-tensor linear solves are currently supported"
     backend = choose_backend_t(*y_tensors, *x0_tensors)
 
+    from ._multigrid import is_multigrid_solve, multigrid_solve
     if not all_available(*y_tensors, *x0_tensors):  # jit mode
-        f = jit_compile_linear(f) if backend.supports(Backend.sparse_coo_tensor) else jit_compile(f)
+        f = jit_compile_linear(f) if backend.supports(Backend.sparse_coo_tensor) or is_multigrid_solve(solve) or solve.matrix_free else jit_compile(f)
 
+    if is_multigrid_solve(solve):
+        return multigrid_solve(f, y, solve, f_args, f_kwargs or {}, backend=backend)
+    if solve.matrix_free and isinstance(f, LinearFunction):  # stencils only require dense operations
+        from ._stencil import stencil_solve
+        return stencil_solve(f, y, solve, f_args, f_kwargs or {}, backend=backend)
     if isinstance(f, LinearFunction) and (backend.supports(Backend.sparse_coo_tensor) or backend.supports(Backend.csr_matrix)):
         matrix, bias = f.sparse_matrix_and_bias(solve.x0, *f_args, **(f_kwargs or {}))
         return _matrix_solve(y - bias, solve, matrix, backend=backend)  # custom_gradient
@@ -1500,7 +1783,8 @@ def solve_linear(f: Callable[[X], Y],
 
 
 def _linear_solve_forward(y, solve: Solve, native_lin_op,
-                          active_dims: Shape or None, backend: Backend, is_backprop: bool) -> Any:
+                          active_dims: Shape or None, backend: Backend, is_backprop: bool,
+                          preconditioner: Callable = None, method: str = None) -> Any:
     PHI_LOGGER.debug(f"Performing linear solve {solve} with backend {backend}")
     if solve.preprocess_y is not None:
         y = solve.preprocess_y(y, *solve.preprocess_y_args)
@@ -1516,7 +1800,7 @@ def _linear_solve_forward(y, solve: Solve, native_lin_op,
     if trj:
         assert all_available(y_tensor, x0_tensor), "Cannot record linear solve in jit mode"
     t = time.perf_counter()
-    ret = backend.linear_solve(solve.method, native_lin_op, y_native, x0_native, rtol, atol, maxi, trj)
+    ret = backend.linear_solve(method or solve.method, native_lin_op, y_native, x0_native, rtol, atol, maxi, trj, preconditioner=preconditioner, batch_strategy=solve.batch_strategy)
     t = time.perf_counter() - t
     if not trj:
         assert isinstance(ret, SolveResult)
@@ -1549,6 +1833,207 @@ def _linear_solve_forward(y, solve: Solve, native_lin_op,
     return x
 
 
+def _native_preconditioner(solve: Solve, matrix: SparseMatrixContainer or None, y, active_dims: Shape, backend: Backend) -> Callable or None:
+    """
+    Builds the function that applies `solve.preconditioner` to native residual vectors of shape (batch, active_dims.volume).
+    If called with `batch_index`, the residual has shape (1, active_dims.volume) and holds only that example, see `Backend.linear_solve()`.
+
+    Args:
+        solve: `Solve` holding the preconditioner specification.
+        matrix: Sparse matrix or `StencilOperator` of the linear system or `None` if the system is given as a function.
+        y: Right-hand side of the linear system.
+        active_dims: Dimensions that are flattened into the vector dimension of native residuals.
+        backend: Backend performing the solve.
+
+    Returns:
+        Native preconditioner function or `None` if `solve` does not specify a preconditioner.
+    """
+    preconditioner = solve.preconditioner
+    if preconditioner is None:
+        return None
+    y_nest, (y_tensor,) = disassemble_tree(y)
+    _, (x0_tensor,) = disassemble_tree(solve.x0)
+    batch_dims = (y_tensor.shape & x0_tensor.shape).without(active_dims)
+    if callable(preconditioner):
+        def native_preconditioner(native_residual, batch_index: int = None):
+            example_dims = batch_dims if batch_index is None else EMPTY_SHAPE
+            residual = reshaped_tensor(native_residual, [example_dims, active_dims], convert=False)
+            _, (result,) = disassemble_tree(preconditioner(assemble_tree(y_nest, [residual])))
+            if batch_index is not None:
+                result = result[_batch_selection(batch_dims, batch_index)]
+            return reshaped_native(result, [example_dims, active_dims], force_expand=True)
+        return native_preconditioner
+    assert matrix is not None, f"Preconditioner '{preconditioner}' requires a sparse matrix. Use jit_compile_linear() on the linear function to enable it."
+    if preconditioner == 'jacobi':
+        inv_diagonal = math.divide_no_nan(1, matrix.diagonal())
+        diagonal_batch = batch_dims if inv_diagonal.shape.only(batch_dims).rank else EMPTY_SHAPE  # batch-dependent coefficients
+        inv_diagonal = reshaped_native(inv_diagonal, [diagonal_batch, active_dims], force_expand=True)
+
+        def native_preconditioner(native_residual, batch_index: int = None):
+            if batch_index is not None and diagonal_batch:
+                return native_residual * inv_diagonal[batch_index:batch_index + 1]
+            return native_residual * inv_diagonal
+        return native_preconditioner
+    elif preconditioner == 'ilu':
+        assert isinstance(matrix, SparseMatrixContainer), "The 'ilu' preconditioner requires a sparse matrix and cannot be used with matrix_free=True."
+        if not all_available(matrix.values):
+            raise NotImplementedError("The 'ilu' preconditioner requires the matrix values to be known and is not supported within jit-compiled functions.")
+        level_scheduled = backend.name != 'NumPy'  # other backends keep the residual on their device
+        if level_scheduled and not backend.supports(Backend.sparse_coo_tensor):
+            raise NotImplementedError(f"The 'ilu' preconditioner requires sparse matrix support but {backend} does not support sparse matrices.")
+        cached = getattr(matrix, '_incomplete_lu', None)  # containers are cached by their tracer, so repeated solves reuse the factors
+        if cached is not None and cached[0] is matrix.values and cached[1] is backend:
+            apply_factors = cached[2]
+        else:
+            import scipy.sparse
+            values = matrix.values.numpy()
+            if matrix.indexing_type == 'coo':
+                scipy_matrix = scipy.sparse.csr_matrix((values, (matrix.rows, matrix.cols)), shape=matrix.shape)
+            elif matrix.indexing_type == 'csr':
+                scipy_matrix = scipy.sparse.csr_matrix((values, matrix.cols, matrix.rows), shape=matrix.shape)
+            else:
+                scipy_matrix = scipy.sparse.csc_matrix((values, matrix.rows, matrix.cols), shape=matrix.shape)
+            factors = _incomplete_lu(scipy_matrix)
+            apply_factors = _ilu_level_scheduled(factors, backend) if level_scheduled else _ilu_substitution(factors)
+            matrix._incomplete_lu = (matrix.values, backend, apply_factors)
+        return lambda native_residual, batch_index=None: apply_factors(native_residual)
+    else:
+        raise NotImplementedError(f"Unsupported preconditioner '{preconditioner}'. Use one of (None, 'jacobi', 'ilu', 'multigrid') or a function.")
+
+
+def _batch_selection(batch_dims: Shape, batch_index: int) -> dict:
+    """ Converts the index of an example in the flattened `batch_dims` to a slicing `dict`. """
+    return {dim: int(i) for dim, i in zip(batch_dims.names, np.unravel_index(batch_index, batch_dims.sizes))}
+
+
+def _incomplete_lu(matrix):
+    """
+    Computes the incomplete LU factorization without fill-in, ILU(0), of a SciPy sparse matrix.
+    The factors have the same sparsity pattern as `matrix`. For symmetric matrices, this is equivalent to the incomplete Cholesky factorization IC(0).
+
+    The IKJ elimination is vectorized using level scheduling.
+    Rows whose lower-triangular entries only reference rows of earlier levels are eliminated simultaneously,
+    one lower-triangular entry per row and NumPy operation.
+
+    Returns:
+        CSR matrix with sorted indices holding the upper triangular factor *U* on and above the diagonal and the unit lower triangular factor *L* below.
+    """
+    import scipy.sparse
+    matrix = scipy.sparse.csr_matrix(matrix, dtype=np.float64, copy=True)
+    matrix.sort_indices()
+    n = matrix.shape[0]
+    indptr, indices, data = matrix.indptr.astype(np.int64), matrix.indices.astype(np.int64), matrix.data
+    rows = np.repeat(np.arange(n), np.diff(indptr))
+    diagonal_pos = np.full(n, -1)
+    diagonal_pos[rows[rows == indices]] = np.nonzero(rows == indices)[0]
+    assert (diagonal_pos >= 0).all(), "Incomplete LU factorization requires all diagonal entries to be part of the sparsity pattern"
+    lower, = np.nonzero(indices < rows)  # entries (i, k) that eliminate row i using row k
+    level = _dependency_levels(rows[lower], indices[lower], n)
+    # --- Updates a_ij -= a_ik * a_kj for all lower entries p=(i,k) and upper entries q=(k,j) of row k with (i,j) in the pattern ---
+    update_p = np.repeat(lower, indptr[indices[lower] + 1] - diagonal_pos[indices[lower]] - 1)
+    update_q = _concatenated_ranges(diagonal_pos[indices[lower]] + 1, indptr[indices[lower] + 1])
+    entry_keys = rows * n + indices  # sorted since indices are sorted within rows
+    target_keys = rows[update_p] * n + indices[update_q]
+    update_j = np.minimum(np.searchsorted(entry_keys, target_keys), len(entry_keys) - 1)
+    exists = entry_keys[update_j] == target_keys
+    update_p, update_q, update_j = update_p[exists], update_q[exists], update_j[exists]
+    # --- Steps: rows of one level process their lower entries in column order ---
+    rank = np.arange(len(indices)) - indptr[rows]
+    step = level[rows] * (rank.max(initial=0) + 1) + rank
+    lower = lower[np.argsort(step[lower], kind='stable')]
+    update_order = np.argsort(step[update_p], kind='stable')
+    update_p, update_q, update_j = update_p[update_order], update_q[update_order], update_j[update_order]
+    steps = np.unique(step[lower])
+    lower_ptr = np.searchsorted(step[lower], steps, side='left'), np.searchsorted(step[lower], steps, side='right')
+    update_ptr = np.searchsorted(step[update_p], steps, side='left'), np.searchsorted(step[update_p], steps, side='right')
+    for l0, l1, u0, u1 in zip(*lower_ptr, *update_ptr):
+        p = lower[l0:l1]
+        data[p] /= data[diagonal_pos[indices[p]]]
+        if u1 > u0:  # indices j are unique within a step
+            data[update_j[u0:u1]] -= data[update_p[u0:u1]] * data[update_q[u0:u1]]
+    return matrix
+
+
+def _dependency_levels(targets, sources, n: int):
+    """
+    Groups the rows of a triangular system into levels that can be processed simultaneously.
+
+    Args:
+        targets: Rows that depend on `sources`, one entry per dependency.
+        sources: Rows that must be processed before the corresponding `targets`.
+        n: Number of rows.
+
+    Returns:
+        Level of each row as NumPy array. Rows only depend on rows of lower levels.
+    """
+    level = np.zeros(n, dtype=np.int64)
+    pending = np.bincount(targets, minlength=n)
+    order = np.argsort(sources, kind='stable')
+    targets_by_source = targets[order]
+    source_ptr = np.searchsorted(sources[order], np.arange(n + 1))
+    frontier, = np.nonzero(pending == 0)
+    current_level = 0
+    while frontier.size:
+        level[frontier] = current_level
+        released = targets_by_source[_concatenated_ranges(source_ptr[frontier], source_ptr[frontier + 1])]
+        pending -= np.bincount(released, minlength=n)
+        released = np.unique(released)
+        frontier = released[pending[released] == 0]
+        current_level += 1
+    return level
+
+
+def _ilu_substitution(factors) -> Callable:
+    """ Returns a function applying the ILU(0) `factors` to NumPy vectors of shape (batch, n) using SciPy triangular solves. """
+    import scipy.sparse
+    import scipy.sparse.linalg
+    n = factors.shape[0]
+    # Triangular factors are decomposed without pivoting or fill-in so SuperLU only performs the substitutions.
+    lower = scipy.sparse.linalg.splu(scipy.sparse.tril(factors, -1, format='csc') + scipy.sparse.identity(n, format='csc'), permc_spec='NATURAL', diag_pivot_thresh=0)
+    upper = scipy.sparse.linalg.splu(scipy.sparse.triu(factors, format='csc'), permc_spec='NATURAL', diag_pivot_thresh=0)
+    return lambda vectors: upper.solve(lower.solve(vectors.T.astype(np.float64))).T.astype(vectors.dtype)
+
+
+def _ilu_level_scheduled(factors, backend: Backend) -> Callable:
+    """
+    Returns a function applying the ILU(0) `factors` to native vectors of shape (batch, n) using only operations of `backend`.
+
+    The triangular solves are level-scheduled: all rows of one level are solved by a single sparse matrix-vector product
+    with the entries of these rows since the rows they reference have already been solved.
+    """
+    factors = factors.tocoo()
+    rows, cols, values = factors.row.astype(np.int64), factors.col.astype(np.int64), factors.data
+    inv_diagonal = 1 / factors.diagonal()
+
+    def level_matrices(entries, scale):
+        level = _dependency_levels(rows[entries], cols[entries], factors.shape[0])[rows[entries]]
+        matrices = []
+        for l in np.unique(level):
+            selected = entries[level == l]
+            native_values = backend.to_float(backend.as_tensor(values[selected] * scale[rows[selected]]))
+            matrices.append(backend.sparse_coo_tensor((rows[selected], cols[selected]), native_values, factors.shape))
+        return matrices
+    lower = level_matrices(np.nonzero(cols < rows)[0], np.ones_like(inv_diagonal))
+    upper = level_matrices(np.nonzero(cols > rows)[0], inv_diagonal)
+    native_inv_diagonal = backend.to_float(backend.as_tensor(inv_diagonal))
+
+    def apply(vectors):
+        for matrix in lower:  # L x = b with unit diagonal
+            vectors = vectors - backend.linear(matrix, vectors)
+        vectors = vectors * native_inv_diagonal
+        for matrix in upper:  # U x = b, scaled by the inverse diagonal
+            vectors = vectors - backend.linear(matrix, vectors)
+        return vectors
+    return apply
+
+
+def _concatenated_ranges(starts, stops):
+    """ Returns the concatenation of `range(start, stop)` for all `start, stop` pairs as a NumPy array. """
+    lengths = stops - starts
+    offsets = np.repeat(starts - np.cumsum(lengths) + lengths, lengths)
+    return offsets + np.arange(lengths.sum())
+
+
 def attach_gradient_solve(forward_solve: Callable):
     def implicit_gradient_solve(*args, **kwargs):
         y, solve, *matrix, x, dx = args
@@ -1567,7 +2052,8 @@ def _matrix_solve_forward(y, solve: Solve, matrix: SparseMatrixContainer,
                           backend: Backend = None, is_backprop=False):  # kwargs
     matrix_native = matrix.native()
     active_dims = matrix.src_shape
-    result = _linear_solve_forward(y, solve, matrix_native, active_dims=active_dims, backend=backend, is_backprop=is_backprop)
+    preconditioner = _native_preconditioner(solve, matrix, y, active_dims, backend)
+    result = _linear_solve_forward(y, solve, matrix_native, active_dims=active_dims, backend=backend, is_backprop=is_backprop, preconditioner=preconditioner)
     return result  # must return exactly `x` so gradient isn't computed w.r.t. other quantities
 
 
@@ -1592,7 +2078,8 @@ def _function_solve_forward(y, solve: Solve, f_args: tuple,
             y_native = y_native[batch_index]
         return y_native
 
-    result = _linear_solve_forward(y, solve, native_lin_f, active_dims=active_dims, backend=backend, is_backprop=is_backprop)
+    preconditioner = _native_preconditioner(solve, None, y, active_dims, backend)
+    result = _linear_solve_forward(y, solve, native_lin_f, active_dims=active_dims, backend=backend, is_backprop=is_backprop, preconditioner=preconditioner)
     return result  # must return exactly `x` so gradient isn't computed w.r.t. other quantities
 
 
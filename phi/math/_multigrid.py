@@ -0,0 +1,262 @@
+"""
+Geometric multigrid for linear systems whose operator is a stencil, such as the ones traced by `jit_compile_linear()`.
+
+The fine-level stencil is taken from the `ShiftLinTracer` of the linear function.
+Coarse-level stencils are derived from it by aggregating the coefficients of 2^d fine cells,
+so that position-dependent coefficients, e.g. obstacle masks, carry over to all levels.
+Residuals are restricted using full weighting based on `downsample2x()` and corrections are prolonged using `upsample2x()`.
+"""
+import itertools
+from typing import Dict, List, Tuple, Callable
+
+from . import _ops as math
+from . import extrapolation
+from ._functional import Solve, ShiftLinTracer, LinearFunction, attach_gradient_solve, _linear_solve_forward, _batch_selection
+from ._nd import shift, downsample2x, upsample2x
+from ._shape import Shape, EMPTY_SHAPE, spatial
+from ._stencil import apply_stencil
+from ._tensors import Tensor, disassemble_tree
+from .backend import Backend
+
+_PRE_SMOOTHING = 2
+_POST_SMOOTHING = 2
+_COARSEST_SMOOTHING = 8
+_MIN_COARSENING_SIZE = 4  # dimensions smaller than this are not coarsened further
+
+
+def is_multigrid_solve(solve: Solve) -> bool:
+    return solve.method.startswith('multigrid') or solve.method.startswith('CG-multigrid') or (isinstance(solve.preconditioner, str) and solve.preconditioner == 'multigrid')
+
+
+def _parse_method(solve: Solve) -> Tuple[str, str or None]:
+    """ Returns the backend method and cycle type for a multigrid solve. The cycle is `None` if `solve` does not use multigrid. """
+    method = solve.method
+    if not is_multigrid_solve(solve):  # e.g. gradient solve with a regular method
+        return method, None
+    if not method.startswith('multigrid') and not method.startswith('CG-multigrid'):  # preconditioner='multigrid'
+        return method, 'V'
+    if method.startswith('CG-'):
+        backend_method, method = 'CG', method[3:]
+    else:
+        backend_method = 'richardson'
+    cycle = method[len('multigrid'):].lstrip('-') or 'V'
+    if cycle not in ('V', 'W', 'F'):
+        raise NotImplementedError(f"Unsupported multigrid cycle '{cycle}'. Use one of ('V', 'W', 'F').")
+    return backend_method, cycle
+
+
+class MultigridHierarchy:
+    """
+    Stencil representations of a linear operator at successively coarser resolutions.
+
+    Level 0 is the original operator. Each stencil maps relative shifts (`Shape`) to coefficient `Tensor`s, see `ShiftLinTracer`.
+    Neighbours outside the domain are wrapped periodically, matching the sparse matrix built by `ShiftLinTracer`.
+    """
+
+    def __init__(self, resolutions: List[Shape], coarsened: List[Tuple[str]], shifts: List[Tuple[Shape]], values: List[List[Tensor]]):
+        """
+        Args:
+            resolutions: Spatial resolution of each level.
+            coarsened: For each level except the last, names of the dimensions that are halved for the next coarser level.
+            shifts: Stencil offsets of each level.
+            values: Stencil coefficients matching `shifts`.
+        """
+        assert len(resolutions) == len(shifts) == len(values) == len(coarsened) + 1
+        self.resolutions = resolutions
+        self.coarsened = coarsened
+        self.shifts = shifts
+        self.values = values
+
+    @staticmethod
+    def from_tracer(tracer: ShiftLinTracer) -> 'MultigridHierarchy':
+        resolution = tracer.source.shape.spatial
+        assert tracer.shape == tracer.source.shape, f"Multigrid requires a square linear operator but input shape {tracer.source.shape} does not match output shape {tracer.shape}"
+        for shift_ in tracer.val.keys():
+            assert shift_ in resolution, f"Multigrid can only coarsen spatial dimensions but the stencil is shifted along {shift_}"
+        stencil = {shift_: math.expand(values, resolution) for shift_, values in tracer.val.items()}
+        resolutions, coarsened, shifts, values = [resolution], [], [tuple(stencil.keys())], [list(stencil.values())]
+        while True:
+            dims = tuple(dim for dim in resolution.names if resolution.get_size(dim) >= _MIN_COARSENING_SIZE)
+            if not dims:
+                break
+            stencil, resolution = _coarsen_stencil(stencil, resolution, dims)
+            resolutions.append(resolution)
+            coarsened.append(dims)
+            shifts.append(tuple(stencil.keys()))
+            values.append(list(stencil.values()))
+        return MultigridHierarchy(resolutions, coarsened, shifts, values)
+
+    def __variable_attrs__(self):
+        return 'values',
+
+    def __eq__(self, other):
+        return isinstance(other, MultigridHierarchy) and \
+               self.resolutions == other.resolutions and \
+               self.coarsened == other.coarsened and \
+               self.shifts == other.shifts
+
+    def __repr__(self):
+        return f"Multigrid with {len(self.resolutions)} levels: {', '.join(str(r) for r in self.resolutions)}"
+
+    def example(self, selection: dict) -> 'MultigridHierarchy':
+        """ Returns the hierarchy of a single batch entry, given as `dict` mapping batch dimensions to indices. """
+        values = [[v[selection] for v in level_values] for level_values in self.values]
+        return MultigridHierarchy(self.resolutions, self.coarsened, self.shifts, values)
+
+    @property
+    def level_count(self) -> int:
+        return len(self.resolutions)
+
+    def apply(self, level: int, x: Tensor) -> Tensor:
+        """ Applies the operator of `level` to `x`. """
+        return apply_stencil(x, self.shifts[level], self.values[level])
+
+    def diagonal(self, level: int) -> Tensor:
+        for shift_, values in zip(self.shifts[level], self.values[level]):
+            if shift_.rank == 0:
+                return values
+        return math.zeros(self.resolutions[level])
+
+    def smooth(self, level: int, x: Tensor, y: Tensor, iterations: int) -> Tensor:
+        """ Weighted Jacobi iterations. """
+        rank = self.resolutions[level].rank
+        step = math.divide_no_nan(2 * rank / (2 * rank + 1), self.diagonal(level))
+        for _ in range(iterations):
+            x = x + step * (y - self.apply(level, x))
+        return x
+
+    def restrict(self, level: int, residual: Tensor) -> Tensor:
+        """ Full-weighting restriction from `level` to `level + 1`, the transpose of `prolong()` up to a constant factor. """
+        dims = self.coarsened[level]
+        for dim in dims:
+            left, center, right = shift(residual, (-1, 0, 1), dim, extrapolation.BOUNDARY, stack_dim=None)
+            residual = 0.25 * left + 0.5 * center + 0.25 * right
+        return downsample2x(residual, extrapolation.ZERO, dims)  # odd dimensions: the missing cell does not contribute
+
+    def prolong(self, level: int, correction: Tensor) -> Tensor:
+        """ Linear interpolation from `level + 1` to `level`. """
+        dims = self.coarsened[level]
+        correction = upsample2x(correction, extrapolation.BOUNDARY, dims)
+        fine = self.resolutions[level]
+        return correction[{dim: slice(0, fine.get_size(dim)) for dim in dims}]  # remove padding of odd dimensions
+
+    def cycle(self, y: Tensor, cycle: str = 'V', level: int = 0, x: Tensor = None) -> Tensor:
+        """
+        Runs one multigrid cycle on `A x = y` starting from `x` (zero by default) and returns the improved estimate.
+
+        Args:
+            y: Right-hand side at resolution `level`.
+            cycle: One of `('V', 'W', 'F')`.
+            level: Level of `y`.
+            x: Initial guess. Defaults to zero.
+
+        Returns:
+            Approximate solution `x` as `Tensor`.
+        """
+        x = math.zeros_like(y) if x is None else x
+        if level == self.level_count - 1:
+            return self.smooth(level, x, y, _COARSEST_SMOOTHING)
+        x = self.smooth(level, x, y, _PRE_SMOOTHING)
+        residual = self.restrict(level, y - self.apply(level, x))
+        if cycle == 'V':
+            correction = self.cycle(residual, 'V', level + 1)
+        elif cycle == 'W':
+            correction = self.cycle(residual, 'W', level + 1)
+            correction = self.cycle(residual, 'W', level + 1, correction)
+        elif cycle == 'F':
+            correction = self.cycle(residual, 'F', level + 1)
+            correction = self.cycle(residual, 'V', level + 1, correction)
+        else:
+            raise ValueError(cycle)
+        x = x + self.prolong(level, correction)
+        return self.smooth(level, x, y, _POST_SMOOTHING)
+
+
+def _coarsen_stencil(stencil: Dict[Shape, Tensor], resolution: Shape, dims: Tuple[str]) -> Tuple[Dict[Shape, Tensor], Shape]:
+    """
+    Aggregates each block of 2^d fine cells along `dims` into one coarse cell.
+
+    The aggregated couplings along coarsened dimensions are halved which corresponds to re-discretizing a second-order operator with twice the cell size.
+    The diagonal is adjusted so that row sums, e.g. from Dirichlet boundaries or identity rows of inactive cells, are preserved.
+    """
+    coarse_resolution = resolution.with_sizes([(size + 1) // 2 if dim in dims else size for dim, size in resolution._named_sizes])
+    aggregated = {}
+    for shift_, values in stencil.items():
+        for parity in itertools.product((0, 1), repeat=len(dims)):
+            parity = dict(zip(dims, parity))
+            values_p = values[{dim: slice(p, None, 2) for dim, p in parity.items()}]
+            padding = {dim: (0, coarse_resolution.get_size(dim) - values_p.shape.get_size(dim)) for dim in dims}
+            if any(upper for _, upper in padding.values()):
+                values_p = math.pad(values_p, padding, extrapolation.ZERO)  # missing cells of odd dimensions
+            offsets = []
+            for dim in resolution.names:
+                delta = shift_.get_size(dim) if dim in shift_ else 0
+                offsets.append((parity[dim] + delta) // 2 if dim in dims else delta)
+            coarse_shift = spatial(**{dim: o for dim, o in zip(resolution.names, offsets) if o != 0})
+            if coarse_shift in aggregated:
+                aggregated[coarse_shift] += values_p / 2 ** len(dims)
+            else:
+                aggregated[coarse_shift] = values_p / 2 ** len(dims)
+    row_sum = sum(aggregated.values())
+    coarse = {}
+    for shift_, values in aggregated.items():
+        if shift_.rank > 0:
+            coarse[shift_] = values * 0.5 if any(dim in dims for dim in shift_.names) else values
+    coarse[EMPTY_SHAPE] = row_sum - sum(coarse.values())
+    return coarse, coarse_resolution
+
+
+def multigrid_hierarchy(f: LinearFunction, x, *f_args, **f_kwargs) -> Tuple[MultigridHierarchy, Tensor]:
+    """
+    Traces `f` and builds the multigrid levels for its operator.
+    The hierarchy is cached together with the trace.
+
+    Returns:
+        hierarchy: `MultigridHierarchy`
+        bias: Affine part of `f`, see `ShiftLinTracer`.
+    """
+    key = f._condition_key(x, f_args, f_kwargs)
+    tracer = f._get_or_trace(key)
+    if tracer._multigrid is None:
+        tracer._multigrid = MultigridHierarchy.from_tracer(tracer)
+    return tracer._multigrid, tracer.bias
+
+
+def multigrid_solve(f: Callable, y, solve: Solve, f_args: tuple or list, f_kwargs: dict, backend: Backend):
+    """ Implementation of `solve_linear()` for the methods `'multigrid'` and `'CG-multigrid'` as well as `preconditioner='multigrid'`, see `solve_linear()`. """
+    _parse_method(solve)  # check method before tracing
+    assert isinstance(f, LinearFunction), f"Multigrid solves require a linear function compiled with jit_compile_linear() so that its stencil and levels can be reused across solves but got {f}"
+    hierarchy, bias = multigrid_hierarchy(f, solve.x0, *f_args, **f_kwargs)
+    return _multigrid_solve(y - bias, solve, hierarchy, backend=backend)  # custom_gradient
+
+
+def _multigrid_solve_forward(y, solve: Solve, hierarchy: MultigridHierarchy,
+                             backend: Backend = None, is_backprop=False):
+    backend_method, cycle = _parse_method(solve)
+    _, (y_tensor,) = disassemble_tree(y)
+    _, (x0_tensor,) = disassemble_tree(solve.x0)
+    active_dims = (y_tensor.shape & x0_tensor.shape).non_batch
+    batch_dims = (y_tensor.shape & x0_tensor.shape).without(active_dims)
+
+    def native_lin(native_x):
+        x = math.reshaped_tensor(native_x, [batch_dims, active_dims], convert=False)
+        return math.reshaped_native(hierarchy.apply(0, x), [batch_dims, active_dims], force_expand=True)
+
+    examples = {}  # batch_index -> hierarchy of a single batch entry
+
+    def native_cycle(native_residual, batch_index: int = None):
+        if batch_index is None:
+            example_dims, example_hierarchy = batch_dims, hierarchy
+        else:
+            if batch_index not in examples:
+                examples[batch_index] = hierarchy.example(_batch_selection(batch_dims, batch_index))
+            example_dims, example_hierarchy = EMPTY_SHAPE, examples[batch_index]
+        residual = math.reshaped_tensor(native_residual, [example_dims, active_dims], convert=False)
+        return math.reshaped_native(example_hierarchy.cycle(residual, cycle), [example_dims, active_dims], force_expand=True)
+
+    preconditioner = native_cycle if cycle is not None else None
+    result = _linear_solve_forward(y, solve, native_lin, active_dims=active_dims, backend=backend, is_backprop=is_backprop, preconditioner=preconditioner, method=backend_method)
+    return result  # must return exactly `x` so gradient isn't computed w.r.t. other quantities
+
+
+_multigrid_solve = attach_gradient_solve(_multigrid_solve_forward)
@@ -1,6 +1,7 @@
 # Because division is different in Python 2 and 3
 from __future__ import division
 
+from numbers import Number
 from typing import Tuple, Callable
 
 import numpy as np
@@ -10,8 +11,9 @@ from . import extrapolation as extrapolation
 from ._config import GLOBAL_AXIS_ORDER
 from ._ops import stack
 from ._shape import Shape, channel, batch, spatial
-from ._tensors import Tensor, TensorLike, variable_values
+from ._tensors import Tensor, TensorLike, variable_values, NativeTensor, TensorStack
 from ._tensors import wrap
+from .backend import choose_backend
 from .extrapolation import Extrapolation
 
 
@@ -290,6 +292,71 @@ def shift(x: Tensor,
     return offset_tensors
 
 
+def _apply_stencils(x: Tensor, stencils: list, padding: Extrapolation or None) -> list or None:
+    """
+    Evaluates finite-difference stencils as weighted sums of shifted views into a single padded copy of `x`.
+    Unlike `shift()`, this creates no shifted copies and accumulates each result in place where the backend supports it, see `Backend.weighted_sum()`.
+
+    Each stencil is a `list` of `(weight, offsets)` terms where `weight` is a number or rank-0 `Tensor` and `offsets` is a `tuple` of `dict`s mapping dimension names to shifts.
+    The value of a stencil at a cell is `sum(weight * sum(x[cell + offset] for offset in offsets))`.
+
+    Args:
+        x: Values to evaluate the stencils on.
+        stencils: `list` of stencils.
+        padding: Extrapolation used to pad `x`. If `None`, the result of each stencil only contains the cells whose neighbours all lie inside `x`.
+
+    Returns:
+        `list` containing one `Tensor` per stencil
+        or `None` if `x` or the weights are not backed by native tensors, e.g. when tracing a linear function.
+        In that case, the stencils need to be evaluated using `shift()`.
+    """
+    dims = tuple(dict.fromkeys(dim for stencil in stencils for _, offsets in stencil for offset in offsets for dim in offset))
+    if isinstance(x, TensorStack) and x.stack_dim.name not in dims:  # evaluate components separately without stacking them in memory
+        components = [_apply_stencils(t, stencils, padding) for t in x.tensors]
+        if any(c is None for c in components):
+            return None
+        return [stack([c[i] for c in components], x.stack_dim) for i in range(len(stencils))]
+    x = x._simplify()
+    if isinstance(x, TensorStack) and not x.requires_broadcast:
+        x = x._cache()
+    if not isinstance(x, NativeTensor) or x.dtype.kind not in (float, complex):
+        return None
+    weights = [[w if isinstance(w, Number) else w.native() if isinstance(w, Tensor) and w.rank == 0 else None for w, _ in stencil] for stencil in stencils]
+    if any(w is None for stencil_weights in weights for w in stencil_weights):
+        return None
+    lower = {dim: max([0] + [-offset.get(dim, 0) for stencil in stencils for _, offsets in stencil for offset in offsets]) for dim in dims}
+    upper = {dim: max([0] + [offset.get(dim, 0) for stencil in stencils for _, offsets in stencil for offset in offsets]) for dim in dims}
+    if padding is None:
+        padded = x
+    else:
+        padded = math.pad(x, {dim: (lower[dim], upper[dim]) for dim in dims}, padding)._simplify()
+        if not isinstance(padded, NativeTensor) or padded.shape.sizes != x.shape.after_pad({dim: (lower[dim], upper[dim]) for dim in dims}).sizes:
+            return None
+    native = padded._native
+    backend = choose_backend(native)
+    results = []
+    for stencil, stencil_weights in zip(stencils, weights):
+        if padding is None:  # crop to cells with all neighbours of this stencil inside x
+            starts = {dim: max([0] + [-offset.get(dim, 0) for _, offsets in stencil for offset in offsets]) for dim in dims}
+            sizes = {dim: x.shape.get_size(dim) - starts[dim] - max([0] + [offset.get(dim, 0) for _, offsets in stencil for offset in offsets]) for dim in dims}
+        else:
+            starts = lower
+            sizes = {dim: x.shape.get_size(dim) for dim in dims}
+        groups = [[native[tuple(slice(starts[dim] + offset.get(dim, 0), starts[dim] + offset.get(dim, 0) + sizes[dim]) if dim in dims else slice(None) for dim in x.shape.names)] for offset in offsets] for _, offsets in stencil]
+        result = backend.weighted_sum(stencil_weights, groups)
+        results.append(NativeTensor(result, x.shape.with_sizes([sizes.get(dim, size) for dim, size in zip(x.shape.names, x.shape.sizes)])))
+    return results
+
+
+def _dim_values(value, dims: tuple, list_dim: str or None) -> list or None:
+    """ Returns one scalar of `value` per dimension in `dims`. `value` can be a number, a rank-0 `Tensor` or a `Tensor` listing the values along `list_dim`. Returns `None` for other shapes. """
+    if not isinstance(value, Tensor) or value.rank == 0:
+        return [value] * len(dims)
+    if list_dim is not None and value.shape.names == (list_dim,) and value.shape.get_size(list_dim) == len(dims):
+        return [value[{list_dim: i}] for i in range(len(dims))]
+    return None
+
+
 def extrapolate_valid_values(values: Tensor, valid: Tensor, distance_cells: int = 1) -> Tuple[Tensor, Tensor]:
     """
     Extrapolates the values of `values` which are marked by the nonzero values of `valid` for `distance_cells` steps in all spatial directions.
@@ -363,6 +430,17 @@ def spatial_gradient(grid: Tensor,
         dx = dx.vector[dims]
         if dx.vector.size in (None, 1):
             dx = dx.vector[0]
+    dx_values = _dim_values(dx, dims.names, stack_dim.name if stack_dim is not None else None)
+    if dx_values is not None and difference.lower() in ('central', 'forward', 'backward'):
+        lower, upper = {'central': (-1, 1), 'forward': (0, 1), 'backward': (-1, 0)}[difference.lower()]
+        stencils = [[(1 / (d * (upper - lower)), ({dim: upper},)), (-1 / (d * (upper - lower)), ({dim: lower},))] for dim, d in zip(dims.names, dx_values)]
+        components = _apply_stencils(grid, stencils, padding)
+        if components is not None:
+            if stack_dim is None:
+                assert len(components) == 1
+                return components[0]
+            item_names = dx.shape.get_item_names(stack_dim.name) if stack_dim.name in dx.shape else None
+            return stack(dict(zip(item_names, components)) if item_names else components, stack_dim)
     if difference.lower() == 'central':
         left, right = shift(grid, (-1, 1), dims, padding, stack_dim=stack_dim)
         return (right - left) / (dx * 2)
@@ -401,7 +479,15 @@ def laplace(x: Tensor,
         dx = math.rename_dims(dx, 'vector', batch('_laplace'))
     if isinstance(x, Extrapolation):
         return x.spatial_gradient()
-    left, center, right = shift(wrap(x), (-1, 0, 1), dims, padding, stack_dim=batch('_laplace'))
+    x = wrap(x)
+    dim_names = x.shape.only(dims if dims is not None else spatial).names
+    dx_values = _dim_values(dx, dim_names, '_laplace')
+    if dx_values is not None:
+        weights = [1 / d ** 2 for d in dx_values]
+        result = _apply_stencils(x, [[(w, ({dim: -1}, {dim: 1})) for dim, w in zip(dim_names, weights)] + [(-2 * sum(weights), ({},))]], padding)
+        if result is not None:
+            return result[0]
+    left, center, right = shift(x, (-1, 0, 1), dims, padding, stack_dim=batch('_laplace'))
     result = (left + right - 2 * center) / (dx ** 2)
     result = math.sum_(result, '_laplace')
     return result
@@ -538,7 +624,7 @@ def sample_subgrid(grid: Tensor, start: Tensor, size: Shape) -> Tensor:
     assert math.all_available(start), "Cannot perform sample_subgrid() during tracing, 'start' must be known."
     discard = {}
     for dim, d_start, d_size in zip(grid.shape.spatial.names, start, size.sizes):
-        discard[dim] = slice(int(d_start), int(d_start) + d_size + (1 if d_start != 0 else 0))
+        discard[dim] = slice(int(d_start), int(d_start) + d_size + (1 if d_start % 1 != 0 else 0))
     grid = grid[discard]
     upper_weight = start % 1
     lower_weight = 1 - upper_weight
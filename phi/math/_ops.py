@@ -1,4 +1,5 @@
 import functools
+import itertools
 import math
 import re
 import warnings
@@ -1976,6 +1977,98 @@ def scatter(base_grid: Tensor or Shape,
     return result
 
 
+def splat(base_grid: Tensor or Shape,
+          indices: Tensor,
+          values: Tensor,
+          kernel: str = 'linear',
+          mode: str = 'add',
+          outside_handling: str = 'discard'):
+    """
+    Distributes `values` onto the cells of `base_grid` around the continuous positions `indices` using a B-spline kernel.
+    This is the particle-to-grid transfer used by particle-in-cell and FLIP methods and the adjoint of `grid_sample()` for `kernel='linear'`.
+
+    Each value is split among the `2^d` (`'linear'`) or `3^d` (`'quadratic'`) closest cells.
+    The contributions of all particles are accumulated by a segmented sum over cell indices (`Backend.bincount()`)
+    which, unlike scatter-add, does not serialize on duplicate indices.
+
+    See Also:
+        `scatter()`.
+
+    Args:
+        base_grid: `Tensor` into which `values` are added or `Shape` of the grid.
+        indices: Continuous cell indices of the particles. Cell `i` is centered at index `i`.
+            Must have a channel dimension `vector` listing the spatial dimensions of `base_grid`.
+        values: `Tensor` of values to distribute. Instance dimensions are reduced.
+        kernel: One of `'nearest'`, `'linear'`, `'quadratic'`.
+        mode: `'add'` to sum the weighted values onto `base_grid` or `'mean'` to replace all cells that received a contribution by the weighted mean.
+        outside_handling: `'discard'` ignores contributions to cells outside the grid, `'clamp'` projects them onto the closest cell inside.
+
+    Returns:
+        `Tensor` with the shape of `base_grid`.
+    """
+    assert kernel in ('nearest', 'linear', 'quadratic'), f"kernel must be 'nearest', 'linear' or 'quadratic' but got '{kernel}'"
+    assert mode in ('add', 'mean')
+    assert outside_handling in ('discard', 'clamp')
+    grid_shape = base_grid if isinstance(base_grid, Shape) else base_grid.shape
+    resolution = grid_shape.spatial.only(indices.vector.item_names) if indices.vector.item_names else grid_shape.spatial
+    assert resolution.rank == indices.vector.size, f"indices must list all spatial dimensions of base_grid {grid_shape} but got {indices.shape}"
+    batches = (values.shape.non_channel.non_instance & indices.shape.non_channel.non_instance).without(resolution)
+    channels = grid_shape.channel & values.shape.channel
+    lists = indices.shape.instance & values.shape.instance
+    if isinstance(base_grid, Shape):
+        with choose_backend_t(indices, values):
+            base_grid = zeros(base_grid & batches & channels)
+    native_indices = reshaped_native(indices, [batches, lists, 'vector'], force_expand=True)
+    native_values = reshaped_native(values, [batches, lists, channels], force_expand=True)
+    backend = choose_backend(native_indices, native_values)
+    batch_size, cells = batches.volume, resolution.volume
+    strides = [int(np.prod(resolution.sizes[i + 1:])) for i in range(resolution.rank)]
+    batch_offset = backend.as_tensor(np.arange(batch_size)[:, None] * cells)
+    # --- per-dimension neighbour offsets and weights ---
+    components = backend.unstack(native_indices, axis=-1)
+    neighbours = []
+    for x in components:
+        if kernel == 'nearest':
+            base = backend.round(x)
+            neighbours.append([(base, 1)])
+        elif kernel == 'linear':
+            base = backend.floor(x)
+            t = x - base
+            neighbours.append([(base, 1 - t), (base + 1, t)])
+        else:  # quadratic B-spline
+            base = backend.round(x)
+            t = x - base
+            neighbours.append([(base - 1, 0.5 * (0.5 - t) ** 2), (base, 0.75 - t ** 2), (base + 1, 0.5 * (0.5 + t) ** 2)])
+    # --- segmented sum over all neighbour combinations ---
+    summed = [0] * channels.volume
+    weight_sum = 0
+    for combination in itertools.product(*neighbours):
+        flat = batch_offset
+        weight = backend.ones_like(components[0])
+        for (cell, w), size, stride in zip(combination, resolution.sizes, strides):
+            if outside_handling == 'discard':
+                weight = weight * backend.to_float((cell >= 0) & (cell < size))
+            cell = backend.clip(cell, 0, size - 1)
+            flat = flat + backend.to_int64(cell) * stride
+            weight = weight * w
+        flat = backend.reshape(flat, (-1,))
+        weight = backend.reshape(weight, (-1,))
+        for c in range(channels.volume):
+            summed[c] += backend.bincount(flat, weight * backend.reshape(native_values[..., c], (-1,)), batch_size * cells)
+        if mode == 'mean':
+            weight_sum += backend.bincount(flat, weight, batch_size * cells)
+    summed = backend.stack(summed, -1)
+    native_grid = reshaped_native(base_grid, [batches, resolution, channels], force_expand=True)
+    native_grid = backend.reshape(native_grid, (-1, channels.volume))
+    if mode == 'add':
+        native_result = native_grid + summed
+    else:
+        weight_sum = weight_sum[:, None]
+        native_result = backend.where(weight_sum > 0, summed / backend.maximum(weight_sum, 1e-20), native_grid)
+    native_result = backend.reshape(native_result, (batch_size, *resolution.sizes, channels.volume))
+    return reshaped_tensor(native_result, [batches, *resolution, channels], check_sizes=True)
+
+
 def fft(x: Tensor, dims: str or tuple or list or Shape = None) -> Tensor:
     """
     Performs a fast Fourier transform (FFT) on all spatial dimensions of x.
@@ -0,0 +1,142 @@
+"""
+Matrix-free execution of linear operators traced by `jit_compile_linear()`.
+
+A `ShiftLinTracer` represents its operator as a small set of shifts with per-cell coefficients.
+Instead of assembling a sparse matrix, the operator can be applied as a sum of coefficient-weighted, shifted copies of the input.
+This needs no index arrays, keeps constant coefficients unexpanded and accesses memory contiguously.
+"""
+from typing import Tuple, Callable
+
+from . import _ops as math
+from . import extrapolation
+from ._functional import Solve, ShiftLinTracer, LinearFunction, attach_gradient_solve, _linear_solve_forward, _native_preconditioner
+from ._shape import Shape
+from ._tensors import Tensor, disassemble_tree
+from .backend import Backend
+
+
+def apply_stencil(x: Tensor, shifts: Tuple[Shape], values: Tuple[Tensor]) -> Tensor:
+    """
+    Computes `sum(values[i] * x[cell + shifts[i]])` for all cells of `x`.
+    Neighbours outside of `x` are wrapped periodically, matching the sparse matrices built by `ShiftLinTracer`.
+
+    Args:
+        x: Input `Tensor`.
+        shifts: Relative neighbour offsets.
+        values: Coefficients matching `shifts`. May have any subset of the dimensions of `x`.
+
+    Returns:
+        `Tensor` with the shape of `x`.
+    """
+    widths = {dim: max(abs(shift_.get_size(dim)) for shift_ in shifts if dim in shift_) for dim in x.shape.names if any(dim in shift_ for shift_ in shifts)}
+    x_padded = math.pad(x, {dim: (w, w) for dim, w in widths.items()}, extrapolation.PERIODIC) if widths else x
+    result = 0
+    for shift_, values_ in zip(shifts, values):
+        x_shifted = x_padded[{dim: slice(w + (shift_.get_size(dim) if dim in shift_ else 0), w + (shift_.get_size(dim) if dim in shift_ else 0) + x.shape.get_size(dim)) for dim, w in widths.items()}]
+        result += values_ * x_shifted
+    return result
+
+
+class StencilOperator:
+    """
+    Square linear operator given by per-cell coefficients of a fixed set of neighbour shifts.
+    This is the matrix-free counterpart of `SparseMatrixContainer` and can be passed as argument of jit-compiled functions.
+    """
+
+    def __init__(self, src_shape: Shape, shifts: Tuple[Shape], values: Tuple[Tensor]):
+        """
+        Args:
+            src_shape: Shape of the non-batch dimensions of compatible `x` vectors.
+            shifts: Relative neighbour offsets.
+            values: Coefficients matching `shifts`.
+        """
+        assert len(shifts) == len(values)
+        self.src_shape = src_shape
+        self.shifts = tuple(shifts)
+        self.values = tuple(values)
+
+    @staticmethod
+    def from_tracer(tracer: ShiftLinTracer) -> 'StencilOperator':
+        assert tracer.shape == tracer.source.shape, f"Matrix-free solves require a square linear operator but input shape {tracer.source.shape} does not match output shape {tracer.shape}"
+        return StencilOperator(tracer.source.shape.non_batch, tuple(tracer.val.keys()), tuple(tracer.val.values()))
+
+    def __variable_attrs__(self):
+        return 'values',
+
+    def __eq__(self, other):
+        return isinstance(other, StencilOperator) and self.src_shape == other.src_shape and self.shifts == other.shifts
+
+    def __repr__(self):
+        return f"Stencil with {len(self.shifts)} shifts on {self.src_shape}"
+
+    def apply(self, x: Tensor) -> Tensor:
+        """ Applies this operator to `x`, see `apply_stencil()`. """
+        return apply_stencil(x, self.shifts, self.values)
+
+    def native_function(self, batch_dims: Shape, active_dims: Shape, backend: Backend) -> Callable:
+        """
+        Creates a function applying this operator to native vectors of shape `(batch_dims.volume, active_dims.volume)`.
+        The coefficients are converted to native tensors once so that each application only pads the input and sums the shifted slices.
+        """
+        groups = [batch_dims, *[active_dims.only(dim) for dim in active_dims.names]]
+        native_values = [backend.as_tensor(math.reshaped_native(values, groups)) for values in self.values]
+        widths = [max([abs(shift_.get_size(dim)) for shift_ in self.shifts if dim in shift_] + [0]) for dim in active_dims.names]
+
+        def native_apply(native_x):
+            x = backend.reshape(native_x, (-1, *active_dims.sizes))
+            x_padded = backend.pad(x, [[0, 0]] + [[w, w] for w in widths], 'periodic') if any(widths) else x
+            result = None
+            for shift_, values in zip(self.shifts, native_values):
+                if shift_.rank == 0:
+                    term = values * x
+                else:
+                    offsets = [shift_.get_size(dim) if dim in shift_ else 0 for dim in active_dims.names]
+                    term = values * x_padded[(slice(None), *[slice(w + o, w + o + size) for w, o, size in zip(widths, offsets, active_dims.sizes)])]
+                result = term if result is None else result + term
+            return backend.reshape(result, (-1, active_dims.volume))
+        return native_apply
+
+    def diagonal(self) -> Tensor:
+        """ Returns the diagonal coefficients as `Tensor` with the dimensions of `src_shape`. """
+        for shift_, values in zip(self.shifts, self.values):
+            if shift_.rank == 0:
+                return math.expand(values, self.src_shape)
+        return math.zeros(self.src_shape)
+
+
+def stencil_operator(f: LinearFunction, x, *f_args, **f_kwargs) -> Tuple[StencilOperator, Tensor]:
+    """
+    Traces `f` and returns its matrix-free representation.
+    The operator is cached together with the trace.
+
+    Returns:
+        operator: `StencilOperator`
+        bias: Affine part of `f`, see `ShiftLinTracer`.
+    """
+    key = f._condition_key(x, f_args, f_kwargs)
+    tracer = f._get_or_trace(key)
+    if tracer._stencil is None:
+        tracer._stencil = StencilOperator.from_tracer(tracer)
+    return tracer._stencil, tracer.bias
+
+
+def stencil_solve(f: LinearFunction, y, solve: Solve, f_args: tuple or list, f_kwargs: dict, backend: Backend):
+    """ Implementation of `solve_linear()` for `Solve.matrix_free`. """
+    operator, bias = stencil_operator(f, solve.x0, *f_args, **f_kwargs)
+    return _stencil_solve(y - bias, solve, operator, backend=backend)  # custom_gradient
+
+
+def _stencil_solve_forward(y, solve: Solve, operator: StencilOperator,
+                           backend: Backend = None, is_backprop=False):
+    _, (y_tensor,) = disassemble_tree(y)
+    _, (x0_tensor,) = disassemble_tree(solve.x0)
+    active_dims = (y_tensor.shape & x0_tensor.shape).non_batch
+    batch_dims = (y_tensor.shape & x0_tensor.shape).without(active_dims)
+
+    native_lin = operator.native_function(batch_dims, active_dims, backend)
+    preconditioner = _native_preconditioner(solve, operator, y, active_dims, backend)
+    result = _linear_solve_forward(y, solve, native_lin, active_dims=active_dims, backend=backend, is_backprop=is_backprop, preconditioner=preconditioner)
+    return result  # must return exactly `x` so gradient isn't computed w.r.t. other quantities
+
+
+_stencil_solve = attach_gradient_solve(_stencil_solve_forward)
@@ -1,7 +1,9 @@
 import copy
 import numbers
+import threading
 import traceback
 import warnings
+from contextlib import contextmanager
 from typing import Tuple, Callable, List, TypeVar
 
 import numpy as np
@@ -12,7 +14,7 @@ from ._shape import (Shape,
                      CHANNEL_DIM, BATCH_DIM, SPATIAL_DIM, EMPTY_SHAPE,
                      parse_dim_order, shape_stack, merge_shapes, channel, concat_shapes)
 from .backend import NoBackendFound, choose_backend, BACKENDS, get_precision, default_backend, convert as convert_, \
-    Backend
+    Backend, precision
 from .backend._dtype import DType
 
 
@@ -1036,6 +1038,9 @@ class NativeTensor(Tensor):
             other = self._tensor(other)
         except NoBackendFound:
             return NotImplemented
+        result = _fuse_op2(self, other, native_function, op_name)
+        if result is not None:
+            return result
         if isinstance(other, NativeTensor):
             return op2_native(self, other, native_function)
         else:
@@ -1442,6 +1447,180 @@ class TensorStack(Tensor):
             return TensorStack(red_inners, self.stack_dim)
 
 
+class FusedExpression(Tensor):  # package-private
+    """
+    Lazily evaluated chain of element-wise operations, recorded while `fuse()` is active.
+
+    The operations are stored as a tree of `(op_name, native_function, args, precision)` nodes whose leaves are `NativeTensor`s or other `FusedExpression`s.
+    The tree is evaluated in one go when the values are first needed, allowing backends to reuse the buffers of intermediate results, see `Backend.fused_op2()`.
+    Operands that occur more than once are evaluated only once and keep their result.
+    All operations other than fusible element-wise operators evaluate the expression and act on the resulting `NativeTensor`.
+    """
+
+    def __init__(self, tree: tuple, shape: Shape, size: int):
+        self._tree = tree
+        self._shape = shape
+        self._size = size  # number of operations in tree
+        self._uses = 0  # number of times this expression is an operand of other expressions
+        self._cached = None  # NativeTensor
+
+    def _cache(self) -> 'NativeTensor':
+        if self._cached is None:
+            native, _ = _evaluate_expression(self._tree, self._shape.names)
+            self._cached = NativeTensor(native, self._shape)
+            self._tree = None  # release references to the operands
+        return self._cached
+
+    @property
+    def dtype(self):
+        return self._cache().dtype
+
+    @property
+    def shape(self):
+        return self._shape
+
+    @property
+    def _is_tracer(self) -> bool:
+        return False
+
+    def native(self, order: str or tuple or list or Shape = None):
+        return self._cache().native(order)
+
+    def _with_shape_replaced(self, new_shape: Shape):
+        return self._cache()._with_shape_replaced(new_shape)
+
+    def _with_natives_replaced(self, natives: list):
+        return self._cache()._with_natives_replaced(natives)
+
+    def _getitem(self, selection: dict):
+        return self._cache()._getitem(selection)
+
+    def flip(self, *dims: str) -> 'Tensor':
+        return self._cache().flip(*dims)
+
+    def unstack(self, dimension):
+        return self._cache().unstack(dimension)
+
+    def _op1(self, native_function):
+        return self._cache()._op1(native_function)
+
+    def _op2(self, other, operator, native_function, op_name: str = 'unknown', op_symbol: str = '?'):
+        try:
+            other = wrap(other) if isinstance(other, numbers.Number) else self._tensor(other)  # _tensor() would evaluate this expression
+        except NoBackendFound:
+            return NotImplemented
+        result = _fuse_op2(self, other, native_function, op_name)
+        if result is not None:
+            return result
+        return operator(self._cache(), other)
+
+    def _natives(self) -> tuple:
+        return self._cache()._natives()
+
+    def _expand(self):
+        self._cache()
+
+    def _simplify(self):
+        return self._cache()
+
+    def _tensor_reduce(self,
+                       dims: Tuple[str],
+                       native_function: Callable,
+                       collapsed_function: Callable = lambda inner_reduced, collapsed_dims_to_reduce: inner_reduced,
+                       unaffected_function: Callable = lambda value: value):
+        return self._cache()._tensor_reduce(dims, native_function, collapsed_function, unaffected_function)
+
+
+_FUSE = threading.local()  # fuse() contexts are specific to the thread that entered them
+_FUSE_ACTIVE = 0  # number of enabled fuse() contexts in all threads, lets operators skip the thread-local lookup when fusing is not used
+_FUSE_ACTIVE_LOCK = threading.Lock()
+_FUSIBLE_OPS = ('add', 'radd', 'sub', 'rsub', 'mul', 'rmul', 'truediv', 'rtruediv', 'pow', 'rpow')
+_MAX_FUSED_OPS = 32  # larger expressions are evaluated before being extended to limit the number of operands held in memory
+
+
+@contextmanager
+def fuse(enable: bool = True):
+    """
+    Records chains of element-wise operators on tensors within this context and evaluates each chain in one go once its values are needed.
+
+    Usage: `with math.fuse(): y = a + 0.5 * (b - c)`
+
+    Without fusing, each operator allocates a new tensor for its result.
+    When fusing, backends can write intermediate results into the buffers of previous results that are no longer needed.
+    With NumPy, the above example allocates one array instead of three.
+    Other backends currently evaluate the operators one by one. Jit-compiled JAX and TensorFlow functions are already fused by XLA.
+
+    Only the arithmetic operators `+ - * / **` between `NativeTensor`s are fused.
+    All other operations evaluate the expression first, so fused tensors can be used like any other tensor, also outside this context.
+    The resulting values are identical to those computed without fusing.
+
+    Args:
+        enable: Whether to fuse operators. Pass `False` to disable fusing in a nested context.
+    """
+    global _FUSE_ACTIVE
+    _fuse_stack().append(enable)
+    if enable:
+        with _FUSE_ACTIVE_LOCK:
+            _FUSE_ACTIVE += 1
+    try:
+        yield None
+    finally:
+        _fuse_stack().pop(-1)
+        if enable:
+            with _FUSE_ACTIVE_LOCK:
+                _FUSE_ACTIVE -= 1
+
+
+def _fuse_stack() -> List[bool]:
+    if not hasattr(_FUSE, 'stack'):
+        _FUSE.stack = [False]
+    return _FUSE.stack
+
+
+def _fuse_op2(x: Tensor, y: Tensor, native_function: Callable, op_name: str) -> FusedExpression or None:
+    """ Records `x <op> y` as a `FusedExpression` if fusing is enabled and supported for the operands, else returns `None`. """
+    if not _FUSE_ACTIVE or not _fuse_stack()[-1] or op_name not in _FUSIBLE_OPS or not isinstance(y, (NativeTensor, FusedExpression)) or x.rank == y.rank == 0:
+        return None
+    trees, size = [], 1
+    for t in (x, y):
+        if isinstance(t, FusedExpression) and t._cached is None and t._size < _MAX_FUSED_OPS:
+            t._uses += 1
+            trees.append(t)
+            size += t._size
+        else:
+            trees.append(t._cache() if isinstance(t, FusedExpression) else t)
+    return FusedExpression((op_name, native_function, tuple(trees), get_precision()), merge_shapes(x.shape, y.shape), size)
+
+
+def _evaluate_expression(tree, order: tuple):
+    """
+    Evaluates an expression tree of a `FusedExpression`.
+
+    Args:
+        tree: `NativeTensor`, `FusedExpression` or `(op_name, native_function, args, precision)` where `precision` is the floating point precision at the time the operation was recorded.
+            `FusedExpression`s that are operands of multiple expressions are evaluated once and cached, others are evaluated as part of `tree`.
+        order: Dimension order of the result. Operands are transposed and expanded to match it.
+
+    Returns:
+        native: Native tensor holding the result.
+        temporary: Whether `native` was allocated during the evaluation and may be overwritten.
+    """
+    if isinstance(tree, FusedExpression):
+        if tree._cached is None and tree._uses <= 1:
+            return _evaluate_expression(tree._tree, order)  # not cached so that its buffer can be reused
+        tree = tree._cache()
+    if isinstance(tree, Tensor):
+        return (tree.native(order) if tree.rank > 0 else tree.native()), False
+    op_name, native_function, args, fp_precision = tree
+    evaluated = [_evaluate_expression(arg, order) for arg in args]
+    natives = [native for native, _ in evaluated]
+    buffers = tuple(native for native, temporary in evaluated if temporary)
+    with precision(fp_precision):
+        result = choose_backend(*natives).fused_op2(op_name, *natives, buffers) if buffers else NotImplemented
+        if result is NotImplemented:
+            result = native_function(*natives)
+    return result, True
+
 def tensor(data: Tensor or Shape or tuple or list or numbers.Number,
            *shape: Shape,
            convert: bool = True,
@@ -1939,6 +2118,8 @@ def cached(t: Tensor or TensorLike) -> Tensor or TensorLike:
     assert isinstance(t, (Tensor, TensorLike)), f"All arguments must be Tensors but got {type(t)}"
     if isinstance(t, NativeTensor):
         return t
+    elif isinstance(t, FusedExpression):
+        return t._cache()
     elif isinstance(t, CollapsedTensor):
         if t.is_cached:
             return t._cached
@@ -0,0 +1,176 @@
+"""
+Persistent on-disk storage of linear traces created by `jit_compile_linear()`.
+
+Each trace is stored as a NumPy `.npz` file holding the stencil values, the bias and the sparse matrix of a `ShiftLinTracer`.
+The file name is a hash of the function source code and the `SignatureKey` of the call, including the values of all condition arguments.
+"""
+import hashlib
+import inspect
+import json
+import os
+import pickle
+import warnings
+from typing import Callable
+
+import numpy as np
+
+from ._shape import Shape
+from ._tensors import Tensor, NativeTensor, disassemble_tree
+from .backend import Backend
+from .backend._backend import PHI_LOGGER
+
+_TRACE_CACHE_DIRECTORY = [None]
+_FORMAT_VERSION = 1
+
+
+def set_trace_cache_directory(directory: str or None):
+    """
+    Enables or disables the persistent cache for linear traces.
+
+    When enabled, traces of functions compiled with `jit_compile_linear()` are written to `directory`
+    and loaded from there when the same function is called with equal arguments in a later process.
+    This avoids re-tracing the function and re-building its sparse matrix.
+
+    Cache entries are keyed by the source code of the function, the shapes and non-tensor properties of all arguments and the values of all condition arguments.
+    Changes to functions called by the traced function are not detected. Clear the directory after such changes.
+
+    Args:
+        directory: Path of the cache directory. It is created if it does not exist. `None` disables the cache.
+    """
+    if directory is not None:
+        os.makedirs(directory, exist_ok=True)
+    _TRACE_CACHE_DIRECTORY[0] = directory
+
+
+def get_trace_cache_directory() -> str or None:
+    """ Returns the directory set by `set_trace_cache_directory()` or `None` if the persistent trace cache is disabled. """
+    return _TRACE_CACHE_DIRECTORY[0]
+
+
+def trace_cache_path(f: Callable, key) -> str or None:
+    """
+    Returns the cache file path for the trace of `f` with input signature `key`.
+
+    Returns:
+        Path as `str` or `None` if the cache is disabled or the arguments cannot be hashed.
+    """
+    directory = _TRACE_CACHE_DIRECTORY[0]
+    if directory is None:
+        return None
+    try:
+        digest = hashlib.sha256()
+        digest.update(_source_fingerprint(f))
+        digest.update(repr([s._to_dict() for s in key.shapes]).encode())
+        digest.update(key.backend.name.encode())
+        digest.update(str(key.spatial_derivative_order).encode())
+        _hash_tree(digest, (key.tree, key.kwargs))
+    except (pickle.PicklingError, TypeError, AttributeError, NotImplementedError) as err:
+        PHI_LOGGER.debug(f"Φ-lin: Not caching trace of '{f.__name__}' on disk because the arguments cannot be hashed: {err}")
+        return None
+    return os.path.join(directory, f"{f.__name__}_{digest.hexdigest()[:32]}.npz")
+
+
+def _source_fingerprint(f: Callable) -> bytes:
+    try:
+        source = inspect.getsource(f)
+    except (OSError, TypeError):
+        source = f.__code__.co_code.hex()
+    return f"{f.__module__}.{f.__qualname__}\n{source}".encode()
+
+
+def _hash_tree(digest, tree):
+    nest, tensors = disassemble_tree(_canonical(tree))
+    digest.update(pickle.dumps(nest))
+    for t in tensors:
+        _hash_tensor(digest, t)
+
+
+def _canonical(obj):
+    """
+    Replaces sets and dicts in `obj` by sorted tuples so that pickling `obj` yields the same bytes in every process.
+    The iteration order of sets varies between processes because string hashes are randomized.
+    """
+    if isinstance(obj, dict):
+        return type(obj).__name__, tuple(sorted(((_canonical(k), _canonical(v)) for k, v in obj.items()), key=repr))
+    if isinstance(obj, (set, frozenset)):
+        return type(obj).__name__, tuple(sorted((_canonical(v) for v in obj), key=repr))
+    if isinstance(obj, (tuple, list)):
+        return type(obj).__name__, tuple(_canonical(v) for v in obj)
+    return obj
+
+
+def _hash_tensor(digest, t: Tensor):
+    if t.shape.is_non_uniform:
+        digest.update(repr(t.shape.names).encode())
+        for t_slice in t.unstack(t.shape.shape.without('dims').names[0]):
+            _hash_tensor(digest, t_slice)
+    else:
+        digest.update(repr(t.shape._to_dict()).encode())
+        digest.update(str(t.dtype).encode())
+        digest.update(np.ascontiguousarray(t.numpy(t.shape.names)).tobytes())
+
+
+def save_trace(path: str, tracer):
+    """
+    Writes the stencil, bias and sparse matrix of `tracer` to `path`.
+    Errors are reported as warnings since the cache is only an optimization.
+    """
+    try:
+        arrays = {}
+        shifts = []
+        for i, (shift, values) in enumerate(tracer.val.items()):
+            shifts.append(dict(shift=shift._to_dict(), shape=values.shape._to_dict()))
+            arrays[f'val_{i}'] = values.numpy(values.shape.names)
+        arrays['bias'] = tracer.bias.numpy(tracer.bias.shape.names)
+        matrix = tracer.get_sparse_matrix()
+        arrays['matrix_rows'] = np.asarray(matrix.rows)
+        arrays['matrix_cols'] = np.asarray(matrix.cols)
+        arrays['matrix_values'] = matrix.values.numpy(matrix.values.shape.names)
+        meta = dict(version=_FORMAT_VERSION,
+                    source=tracer.source.shape._to_dict(),
+                    shape=tracer.shape._to_dict(),
+                    bias=tracer.bias.shape._to_dict(),
+                    shifts=shifts,
+                    matrix=dict(indexing_type=matrix.indexing_type, shape=matrix.shape, src_shape=matrix.src_shape._to_dict(), values=matrix.values.shape._to_dict()))
+        arrays['meta'] = np.array(json.dumps(meta))
+        tmp_path = f"{path}.{os.getpid()}.tmp.npz"
+        np.savez(tmp_path, **arrays)
+        os.replace(tmp_path, path)  # atomic for concurrent workers
+    except (OSError, NotImplementedError, AssertionError) as err:
+        warnings.warn(f"Φ-lin: Failed to write trace to cache file '{path}': {err}", RuntimeWarning)
+
+
+def load_trace(path: str, backend: Backend):
+    """
+    Reads a trace written by `save_trace()`.
+
+    Returns:
+        `ShiftLinTracer` or `None` if no valid cache file exists at `path`.
+    """
+    from ._functional import ShiftLinTracer, SparseMatrixContainer
+    if not os.path.isfile(path):
+        return None
+    try:
+        with np.load(path, allow_pickle=False) as data:
+            meta = json.loads(str(data['meta']))
+            if meta['version'] != _FORMAT_VERSION:
+                return None
+            with backend:
+                source_shape = _shape_from_dict(meta['source'])
+                source = NativeTensor(backend.ones(source_shape.sizes), source_shape)
+                val = {_shape_from_dict(s['shift']): NativeTensor(backend.as_tensor(data[f'val_{i}']), _shape_from_dict(s['shape'])) for i, s in enumerate(meta['shifts'])}
+                bias = NativeTensor(backend.as_tensor(data['bias']), _shape_from_dict(meta['bias']))
+                tracer = ShiftLinTracer(source, val, _shape_from_dict(meta['shape']), bias)
+                m = meta['matrix']
+                values = NativeTensor(backend.as_tensor(data['matrix_values']), _shape_from_dict(m['values']))
+                matrix = SparseMatrixContainer(m['indexing_type'], tuple(m['shape']), set(tracer.val.keys()), _shape_from_dict(m['src_shape']), values, data['matrix_rows'], data['matrix_cols'])
+            setattr(tracer, f"_sparse_{m['indexing_type']}", matrix)
+            return tracer
+    except (OSError, KeyError, ValueError) as err:
+        warnings.warn(f"Φ-lin: Ignoring invalid trace cache file '{path}': {err}", RuntimeWarning)
+        return None
+
+
+def _shape_from_dict(dict_: dict) -> Shape:
+    item_names = [tuple(items) if items is not None else None for items in dict_['item_names']]
+    return Shape._from_dict(dict(dict_, item_names=item_names))
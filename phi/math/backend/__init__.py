@@ -10,7 +10,7 @@ from ._backend import (
     PHI_LOGGER,
 )
 from ._numpy_backend import NumPyBackend as _NumPyBackend
-from ._profile import Profile, get_current_profile, profile, profile_function
+from ._profile import Profile, ProfileStatistics, MemoryTracker, get_current_profile, profile, profile_function
 
 
 NUMPY = _NumPyBackend()
@@ -25,4 +25,6 @@ __pdoc__ = {
     'ComputeDevice.__init__': False,
     'NoBackendFound.__init__': False,
     'Profile.__init__': False,
+    'ProfileStatistics.__init__': False,
+    'MemoryTracker.__init__': False,
 }
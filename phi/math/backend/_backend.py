@@ -1,8 +1,9 @@
 import sys
+import time
 import warnings
 from collections import namedtuple
 from contextlib import contextmanager
-from threading import Barrier
+from threading import Condition
 from typing import List, Callable
 
 import logging
@@ -12,8 +13,9 @@ from ._dtype import DType, combine_types
 
 
 SolveResult = namedtuple('SolveResult', [
-    'method', 'x', 'residual', 'iterations', 'function_evaluations', 'converged', 'diverged', 'message',
+    'method', 'x', 'residual', 'iterations', 'function_evaluations', 'converged', 'diverged', 'message', 'wall_time',
 ])
+SolveResult.__new__.__defaults__ = (None,)  # wall_time: optional per-example time in seconds until the example finished
 
 
 class ComputeDevice:
@@ -308,6 +310,25 @@ class Backend:
     def block_until_ready(self, values):
         pass
 
+    def get_memory_usage(self, device: ComputeDevice = None) -> int or None:
+        """
+        Returns the number of bytes currently allocated by this backend on `device` if the underlying library keeps track of it.
+
+        Implementations:
+
+        * NumPy: Not available
+        * PyTorch: [`torch.cuda.memory_allocated`](https://pytorch.org/docs/stable/generated/torch.cuda.memory_allocated.html) for GPUs
+        * TensorFlow: [`tf.config.experimental.get_memory_info`](https://www.tensorflow.org/api_docs/python/tf/config/experimental/get_memory_info) for GPUs
+        * Jax: `Device.memory_stats()`
+
+        Args:
+            device: `ComputeDevice` of this backend. Defaults to the default device.
+
+        Returns:
+            Allocated bytes as `int` or `None` if not available.
+        """
+        return None
+
     def jit_compile(self, f: Callable) -> Callable:
         return NotImplemented
 
@@ -400,6 +421,54 @@ class Backend:
         """
         raise NotImplementedError(self)
 
+    def pad_sides(self, value, pad_width, modes, constant_values):
+        """
+        Pads each side of each axis with its own mode, allocating the padded tensor only once.
+
+        Copy modes take their values from `value` while sides with mode `'constant'` are filled last, overwriting the corners they share with other sides.
+        This is the order in which mixed extrapolations are applied.
+
+        The default implementation maps to a single call of `Backend.pad()` if all padded sides use the same mode and value.
+        If the sides differ and the backend cannot pad them in one go, returns NotImplemented.
+
+        Args:
+            value: tensor
+            pad_width: 2D tensor specifying the number of values padded to the edges of each axis in the form [[axis 0 lower, axis 0 upper], ...].
+            modes: Mode of each side in the form [(axis 0 lower, axis 0 upper), ...], see `Backend.pad()`.
+            constant_values: Padding value of each side in the form [(axis 0 lower, axis 0 upper), ...]. Only used for sides with mode `'constant'`.
+
+        Returns:
+            padded tensor or NotImplemented
+        """
+        sides = [(mode, constant) for widths, side_modes, side_values in zip(pad_width, modes, constant_values) for width, mode, constant in zip(widths, side_modes, side_values) if width > 0]
+        if not sides:
+            return value
+        mode, constant = sides[0]
+        if all(m == mode and (mode != 'constant' or c is constant or c == constant) for m, c in sides):
+            return self.pad(value, pad_width, mode, constant)
+        return NotImplemented
+
+    def weighted_sum(self, weights: tuple or list, values: tuple or list):
+        """
+        Computes `sum(weights[i] * sum(values[i]))`.
+        Backends override this to accumulate the result in place, avoiding one temporary tensor per term.
+
+        Args:
+            weights: Scalar weight of each group.
+            values: One `list` of tensors per weight. All tensors must have the same shape.
+
+        Returns:
+            Weighted sum as tensor.
+        """
+        result = None
+        for weight, group in zip(weights, values):
+            term = group[0]
+            for value in group[1:]:
+                term = self.add(term, value)
+            term = self.mul(term, weight)
+            result = term if result is None else self.add(result, term)
+        return result
+
     def reshape(self, value, shape):
         raise NotImplementedError(self)
 
@@ -467,6 +536,21 @@ class Backend:
     def cumsum(self, x, axis: int):
         raise NotImplementedError(self)
 
+    def bincount(self, x, weights, bins: int):
+        """
+        Sums `weights` into `bins` bins according to the bin indices `x`.
+        This is a segmented sum that does not require `x` to be sorted.
+
+        Args:
+            x: 1D int tensor of bin indices between 0 and `bins - 1`.
+            weights: 1D float tensor matching `x` or `None` to count occurrences.
+            bins: Number of bins.
+
+        Returns:
+            1D tensor of length `bins`.
+        """
+        raise NotImplementedError(self)
+
     def while_loop(self, loop: Callable, values: tuple):
         """
         ```python
@@ -826,6 +910,25 @@ class Backend:
         raise NotImplementedError(self)
 
     def minimize(self, method: str, f, x0, atol, max_iter, trj: bool):
+        """
+        Minimizes `f` for all batch entries, running one SciPy minimization per batch entry (except for `method='GD'`).
+
+        An evaluation of `f` starts as soon as any batch entry requests one, so a slow line search does not hold up the other batch entries.
+        Since `f` may couple batch entries through captured tensors, it is always evaluated on the full batch.
+        Batch entries without a pending request, including finished ones, contribute their most recent `x` and do not receive the result.
+
+        Args:
+            method: `'GD'` or the name of a SciPy minimization method, such as `'L-BFGS-B'`.
+            f: Function mapping `x` of shape (batch, parameters) to `(loss_sum, loss)` where `loss` has shape (batch,).
+            x0: Initial guess of shape (batch, parameters).
+            atol: Absolute tolerance of shape (batch,).
+            max_iter: Maximum number of iterations of shape (batch,).
+            trj: Whether to record and return the optimization trajectory as a `List[SolveResult]`.
+
+        Returns:
+            result: `SolveResult` or `List[SolveResult]`, depending on `trj`.
+                SciPy minimizations report the time until each batch entry finished as `wall_time`.
+        """
         if method == 'GD':
             return self._minimize_gradient_descent(f, x0, atol, max_iter, trj)
 
@@ -849,16 +952,17 @@ class Backend:
         diverged = [False] * batch_size
         messages = [""] * batch_size
 
-        f_inputs = [None] * batch_size
-        f_b_losses = None
-        f_b_losses_np = None
-        f_grad_np = None
-        f_input_available = Barrier(batch_size + 1)
-        f_output_available = Barrier(batch_size + 1)
-        finished = [False] * batch_size
-        all_finished = False
         trajectories = [[] for _ in range(batch_size)] if trj else None
+        wall_times = [None] * batch_size
+        # Scheduler state, guarded by `state_changed`. Examples submit evaluation requests and leave the batch when finished.
+        state_changed = Condition()
+        active = set(range(batch_size))
+        requests = {}  # example index -> x, waiting to be evaluated
+        results = {}  # example index -> (loss, loss_np, grad_np)
+        f_inputs = [self.as_tensor(x0[b], convert_external=True) for b in range(batch_size)]  # finished examples keep their last x
+        errors = []
         threads = []
+        t0 = time.perf_counter()
 
         for b in range(batch_size):  # Run each independent example as a scipy minimization in a new thread
 
@@ -867,15 +971,19 @@ class Backend:
 
                 def b_fun(x: numpy.ndarray):
                     function_evaluations[b] += 1
-                    f_inputs[b] = self.as_tensor(x, convert_external=True)
-                    f_input_available.wait()
-                    f_output_available.wait()
-                    recent_b_losses.append(f_b_losses[b])
+                    with state_changed:
+                        requests[b] = self.as_tensor(x, convert_external=True)
+                        state_changed.notify_all()
+                        state_changed.wait_for(lambda: b in results or errors)
+                        if errors:
+                            raise RuntimeError("Minimization aborted because the function evaluation failed")
+                        loss, loss_np, grad_np = results.pop(b)
+                    recent_b_losses.append(loss)
                     if final_losses[b] is None:  # first evaluation
-                        final_losses[b] = f_b_losses[b]
+                        final_losses[b] = loss
                         if trajectories is not None:
-                            trajectories[b].append(SolveResult(method_description, x0[b], f_b_losses[b], 0, 1, False, False, ""))
-                    return f_b_losses_np[b], f_grad_np[b]
+                            trajectories[b].append(SolveResult(method_description, x0[b], loss, 0, 1, False, False, ""))
+                    return loss_np, grad_np
 
                 def callback(x, *args):  # L-BFGS-B only passes x but the documentation says (x, state)
                     iterations[b] += 1
@@ -885,35 +993,53 @@ class Backend:
                     if trajectories is not None:
                         trajectories[b].append(SolveResult(method_description, x, loss, iterations[b], function_evaluations[b], False, False, ""))
 
-                res = minimize(fun=b_fun, x0=x0[b], jac=True, method=method, tol=atol[b], options={'maxiter': max_iter[b]}, callback=callback)
-                assert isinstance(res, OptimizeResult)
-                # res.nit, res.nfev
-                xs[b] = res.x
-                converged[b] = res.success
-                diverged[b] = res.status not in (0, 1)  # 0=success
-                messages[b] = res.message
-                finished[b] = True
-                while not all_finished:
-                    f_input_available.wait()
-                    f_output_available.wait()
+                try:
+                    res = minimize(fun=b_fun, x0=x0[b], jac=True, method=method, tol=atol[b], options={'maxiter': max_iter[b]}, callback=callback)
+                    assert isinstance(res, OptimizeResult)
+                    # res.nit, res.nfev
+                    xs[b] = res.x
+                    converged[b] = res.success
+                    diverged[b] = res.status not in (0, 1)  # 0=success
+                    messages[b] = res.message
+                except Exception as exc:
+                    with state_changed:
+                        errors.append(exc)
+                finally:
+                    with state_changed:
+                        wall_times[b] = time.perf_counter() - t0
+                        active.discard(b)
+                        state_changed.notify_all()
 
             b_thread = Thread(target=b_thread)
             threads.append(b_thread)
             b_thread.start()
 
         while True:
-            f_input_available.wait()
-            if all(finished):
-                all_finished = True
-                f_output_available.wait()
+            with state_changed:  # wait until any example requests an evaluation
+                state_changed.wait_for(lambda: errors or requests or not active)
+                if errors or not active:
+                    break
+                pending = list(requests)
+                for b in pending:
+                    f_inputs[b] = requests.pop(b)
+            try:
+                _, f_b_losses, f_grad = fg(self.stack(f_inputs))  # Evaluate function and gradient
+                f_b_losses_np = self.numpy(f_b_losses).astype(numpy.float64)
+                f_grad_np = self.numpy(f_grad).astype(numpy.float64)
+            except Exception as exc:
+                with state_changed:
+                    errors.append(exc)
+                    state_changed.notify_all()
                 break
-            _, f_b_losses, f_grad = fg(self.stack(f_inputs))  # Evaluate function and gradient
-            f_b_losses_np = self.numpy(f_b_losses).astype(numpy.float64)
-            f_grad_np = self.numpy(f_grad).astype(numpy.float64)
-            f_output_available.wait()
+            with state_changed:
+                for b in pending:
+                    results[b] = (f_b_losses[b], f_b_losses_np[b], f_grad_np[b])
+                state_changed.notify_all()
 
         for b_thread in threads:
             b_thread.join()  # make sure threads exit correctly
+        if errors:
+            raise errors[0]
 
         if trj:
             max_trajectory_length = max([len(t) for t in trajectories])
@@ -928,11 +1054,12 @@ class Backend:
                 converged = [state.converged for state in states]
                 diverged = [state.diverged for state in states]
                 trajectory.append(SolveResult(method_description, x, residual, iterations, function_evaluations, converged, diverged, messages))
+            trajectory[-1] = trajectory[-1]._replace(wall_time=wall_times)
             return trajectory
         else:
             x = self.stack(xs)
             residual = self.stack(final_losses)
-            return SolveResult(method_description, x, residual, iterations, function_evaluations, converged, diverged, messages)
+            return SolveResult(method_description, x, residual, iterations, function_evaluations, converged, diverged, messages, wall_times)
 
     def _minimize_gradient_descent(self, f, x0, atol, max_iter, trj: bool, step_size='adaptive'):
         assert self.supports(Backend.functional_gradient)
@@ -999,13 +1126,13 @@ class Backend:
         else:
             return SolveResult(method, x, loss, iterations, function_evaluations, converged, diverged, [""] * batch_size)
 
-    def linear_solve(self, method: str, lin, y, x0, rtol, atol, max_iter, trj: bool) -> SolveResult or List[SolveResult]:
+    def linear_solve(self, method: str, lin, y, x0, rtol, atol, max_iter, trj: bool, preconditioner: Callable = None, batch_strategy: str = None) -> SolveResult or List[SolveResult]:
         """
         Solve the system of linear equations A · x = y.
         This method need not provide a gradient for the operation.
 
         Args:
-            method: Which algorithm to use. One of `('auto', 'CG', 'CG-adaptive')`.
+            method: Which algorithm to use. One of `('auto', 'CG', 'CG-adaptive', 'richardson')`.
             lin: Linear operation. One of
                 * sparse/dense matrix valid for all instances
                 * tuple/list of sparse/dense matrices for varying matrices along batch, must have the same nonzero locations.
@@ -1016,24 +1143,34 @@ class Backend:
             atol: Absolute tolerance of size (batch,)
             max_iter: Maximum number of iterations of size (batch,)
             trj: Whether to record and return the optimization trajectory as a `List[SolveResult]`.
+            preconditioner: (Optional) Linear function approximating the inverse of `lin`.
+                It is called with residual vectors of shape (batch, parameters) and must return vectors of the same shape.
+                Backends that solve batch entries one by one may instead pass a single residual of shape (1, parameters) together with `batch_index`, the index of its batch entry.
+                Required for `method='richardson'`. With `method='auto'`, a preconditioned conjugate gradient solve is performed.
+            batch_strategy: (Optional) How backends that solve batch entries one by one process the batch.
+                One of `('sequential', 'threads')`. Ignored by backends that solve all batch entries simultaneously.
+                Direct solves with a list of matrices in `lin` additionally accept `'block-diagonal'` to assemble one block-diagonal system for the whole batch.
 
         Returns:
             result: `SolveResult` or `List[SolveResult]`, depending on `trj`.
         """
-        if method == 'auto':
+        if method == 'auto' and preconditioner is None:
             return self.conjugate_gradient_adaptive(lin, y, x0, rtol, atol, max_iter, trj)
-        elif method == 'CG':
-            return self.conjugate_gradient(lin, y, x0, rtol, atol, max_iter, trj)
+        elif method in ('CG', 'auto'):
+            return self.conjugate_gradient(lin, y, x0, rtol, atol, max_iter, trj, preconditioner)
         elif method == 'CG-adaptive':
+            assert preconditioner is None, "CG-adaptive does not support preconditioners. Use method='CG' instead."
             return self.conjugate_gradient_adaptive(lin, y, x0, rtol, atol, max_iter, trj)
+        elif method == 'richardson':
+            return self.richardson(lin, y, x0, rtol, atol, max_iter, trj, preconditioner)
         else:
             raise NotImplementedError(f"Method '{method}' not supported for linear solve.")
 
-    def conjugate_gradient(self, lin, y, x0, rtol, atol, max_iter, trj: bool) -> SolveResult or List[SolveResult]:
-        """ Standard conjugate gradient algorithm. Signature matches to `Backend.linear_solve()`. """
+    def conjugate_gradient(self, lin, y, x0, rtol, atol, max_iter, trj: bool, preconditioner: Callable = None) -> SolveResult or List[SolveResult]:
+        """ Standard conjugate gradient algorithm, preconditioned if `preconditioner` is given. Signature matches to `Backend.linear_solve()`. """
         # Based on "An Introduction to the Conjugate Gradient Method Without the Agonizing Pain" by Jonathan Richard Shewchuk
-        # symbols: dx=d, dy=q, step_size=alpha, residual_squared=delta, residual=r, y=b
-        method = f"Φ-Flow CG ({self.name})"
+        # symbols: dx=d, dy=q, step_size=alpha, residual_squared=delta, residual=r, y=b, preconditioned residual=s
+        method = f"Φ-Flow CG ({self.name})" if preconditioner is None else f"Φ-Flow PCG ({self.name})"
         y = self.to_float(y)
         x0 = self.copy(self.to_float(x0), only_mutable=True)
         batch_size = self.staticshape(y)[0]
@@ -1043,8 +1180,11 @@ class Backend:
         iterations = self.zeros([batch_size], DType(int, 32))
         function_evaluations = self.ones([batch_size], DType(int, 32))
         residual_squared = rsq0 = self.sum(residual ** 2, -1, keepdims=True)
+        if preconditioner is not None:
+            dx = self.linear(preconditioner, residual)
+            residual_squared = self.sum(residual * dx, -1, keepdims=True)  # delta = r · s
         diverged = self.any(~self.isfinite(x), axis=(1,))
-        converged = self.all(residual_squared <= tolerance_sq, axis=(1,))
+        converged = self.all(rsq0 <= tolerance_sq, axis=(1,))
         trajectory = [SolveResult(method, x, residual, iterations, function_evaluations, converged, diverged, "")] if trj else None
         continue_ = ~converged & ~diverged & (iterations < max_iter)
 
@@ -1062,10 +1202,16 @@ class Backend:
             # else:
             residual = residual - step_size * dy  # in-place subtraction affects convergence
             residual_squared_old = residual_squared
-            residual_squared = self.sum(residual ** 2, -1, keepdims=True)
-            dx = residual + self.divide_no_nan(residual_squared, residual_squared_old) * dx
-            diverged = self.any(residual_squared / rsq0 > 100, axis=(1,)) & (iterations >= 8)
-            converged = self.all(residual_squared <= tolerance_sq, axis=(1,))
+            if preconditioner is None:
+                residual_squared = true_residual_squared = self.sum(residual ** 2, -1, keepdims=True)
+                dx = residual + self.divide_no_nan(residual_squared, residual_squared_old) * dx
+            else:
+                true_residual_squared = self.sum(residual ** 2, -1, keepdims=True)
+                s = self.linear(preconditioner, residual)
+                residual_squared = self.sum(residual * s, -1, keepdims=True)
+                dx = s + self.divide_no_nan(residual_squared, residual_squared_old) * dx
+            diverged = self.any(true_residual_squared / rsq0 > 100, axis=(1,)) & (iterations >= 8)
+            converged = self.all(true_residual_squared <= tolerance_sq, axis=(1,))
             if trajectory is not None:
                 trajectory.append(SolveResult(method, x, residual, iterations, function_evaluations, converged, diverged, ""))
                 x = self.copy(x)
@@ -1124,6 +1270,49 @@ class Backend:
         _, _, x, _, _, residual, iterations, function_evaluations, converged, diverged = self.while_loop(acg_loop_body, (continue_, 0, x, dx, dy, residual, iterations, function_evaluations, converged, diverged))
         return trajectory if trj else SolveResult(method, x, residual, iterations, function_evaluations, converged, diverged, "")
 
+    def richardson(self, lin, y, x0, rtol, atol, max_iter, trj: bool, preconditioner: Callable) -> SolveResult or List[SolveResult]:
+        """
+        Preconditioned Richardson iteration *x += M(y - A x)* where *M* is given by `preconditioner`.
+        With a multigrid cycle as preconditioner, this is a standalone multigrid solver.
+        Signature matches to `Backend.linear_solve()`.
+        """
+        assert preconditioner is not None, "Richardson iteration requires a preconditioner"
+        method = f"Φ-Flow Richardson ({self.name})"
+        y = self.to_float(y)
+        x0 = self.copy(self.to_float(x0), only_mutable=True)
+        batch_size = self.staticshape(y)[0]
+        tolerance_sq = self.maximum(rtol ** 2 * self.sum(y ** 2, -1), atol ** 2)
+        x = x0
+        residual = y - self.linear(lin, x)
+        iterations = self.zeros([batch_size], DType(int, 32))
+        function_evaluations = self.ones([batch_size], DType(int, 32))
+        residual_squared = rsq0 = self.sum(residual ** 2, -1, keepdims=True)
+        diverged = self.any(~self.isfinite(x), axis=(1,))
+        converged = self.all(residual_squared <= tolerance_sq, axis=(1,))
+        trajectory = [SolveResult(method, x, residual, iterations, function_evaluations, converged, diverged, "")] if trj else None
+        continue_ = ~converged & ~diverged & (iterations < max_iter)
+
+        def richardson_loop_body(continue_, it_counter, x, residual, iterations, function_evaluations, _converged, _diverged):
+            continue_1 = self.to_int32(continue_)
+            it_counter += 1
+            iterations += continue_1
+            with spatial_derivative_evaluation(1):
+                dx = self.linear(preconditioner, residual)
+            x += dx * self.expand_dims(self.to_float(continue_1), -1)
+            residual = y - self.linear(lin, x); function_evaluations += continue_1
+            residual_squared = self.sum(residual ** 2, -1, keepdims=True)
+            diverged = self.any(residual_squared / rsq0 > 100, axis=(1,)) & (iterations >= 8) | self.any(~self.isfinite(x), axis=(1,))
+            converged = self.all(residual_squared <= tolerance_sq, axis=(1,))
+            if trajectory is not None:
+                trajectory.append(SolveResult(method, x, residual, iterations, function_evaluations, converged, diverged, ""))
+                x = self.copy(x)
+                iterations = self.copy(iterations)
+            continue_ = ~converged & ~diverged & (iterations < max_iter)
+            return continue_, it_counter, x, residual, iterations, function_evaluations, converged, diverged
+
+        _, _, x, residual, iterations, function_evaluations, converged, diverged = self.while_loop(richardson_loop_body, (continue_, 0, x, residual, iterations, function_evaluations, converged, diverged))
+        return trajectory if trj else SolveResult(method, x, residual, iterations, function_evaluations, converged, diverged, "")
+
     def linear(self, lin, vector):
         if callable(lin):
             return lin(vector)
@@ -1234,6 +1423,22 @@ class Backend:
         base, exp = self.auto_cast(base, exp)
         return base ** exp
 
+    def fused_op2(self, op_name: str, a, b, buffers: tuple):
+        """
+        Evaluates an element-wise operator as part of a fused expression, see `phi.math.fuse()`.
+        Backends can override this method to write the result into one of `buffers` instead of allocating a new tensor.
+
+        Args:
+            op_name: One of `'add', 'sub', 'mul', 'truediv', 'pow'`, optionally prefixed by `'r'` to swap the operands, e.g. `'rsub'` computes `b - a`.
+            a: First operand
+            b: Second operand
+            buffers: Intermediate results of the expression that are no longer needed and may be overwritten.
+
+        Returns:
+            Result of the operation or `NotImplemented` if the regular operator should be used instead.
+        """
+        return NotImplemented
+
     def mod(self, dividend, divisor):
         dividend, divisor = self.auto_cast(dividend, divisor)
         return dividend % divisor
@@ -1,14 +1,18 @@
+import functools
+import itertools
 import numbers
 import os
 import sys
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Any, Callable
 
 import numpy as np
 import numpy.random
-import scipy.signal
 import scipy.sparse
 from scipy.sparse import issparse
-from scipy.sparse.linalg import cg, spsolve
+from scipy.sparse.linalg import cg, spsolve, splu, LinearOperator
 
 from . import Backend, ComputeDevice
 from ._backend import combined_dim, SolveResult
@@ -25,6 +29,8 @@ class NumPyBackend(Backend):
             mem_bytes = -1
         processors = os.cpu_count()
         self.cpu = ComputeDevice(self, "CPU", 'CPU', mem_bytes, processors, "")
+        self.factorization_cache = FactorizationCache()
+        """ LU factorizations of sparse matrices reused by direct linear solves. """
         Backend.__init__(self, "NumPy", self.cpu)
 
     def prefers_channels_last(self) -> bool:
@@ -148,12 +154,59 @@ class NumPyBackend(Backend):
 
     def pad(self, value, pad_width, mode='constant', constant_values=0):
         assert mode in ('constant', 'symmetric', 'periodic', 'reflect', 'boundary'), mode
-        if mode == 'constant':
-            return np.pad(value, pad_width, 'constant', constant_values=constant_values)
+        return self.pad_sides(value, pad_width, [(mode, mode)] * len(pad_width), [(constant_values, constant_values)] * len(pad_width))
+
+    def pad_sides(self, value, pad_width, modes, constant_values):
+        value = np.asarray(value)
+        result = np.empty([size + lower + upper for size, (lower, upper) in zip(value.shape, pad_width)], dtype=value.dtype, order='F' if value.flags.fnc else 'C')  # keep memory layout like np.pad
+        filled = [slice(lower, lower + size) for size, (lower, _) in zip(value.shape, pad_width)]
+        result[tuple(filled)] = value
+        # Copy modes: each axis copies from the region filled so far, which includes the padding of previous axes
+        for axis, (size, (lower, upper), side_modes) in enumerate(zip(value.shape, pad_width, modes)):
+            for upper_edge, width, mode in ((False, lower, side_modes[0]), (True, upper, side_modes[1])):
+                if width > 0 and mode != 'constant':
+                    target = slice(lower + size, None) if upper_edge else slice(0, lower)
+                    source = _pad_source_slice([lower + _pad_source_index(i, size, mode) for i in (range(size, size + width) if upper_edge else range(-width, 0))])
+                    result[(*filled[:axis], target, *filled[axis + 1:])] = result[(*filled[:axis], source, *filled[axis + 1:])]
+            filled[axis] = slice(None)
+        # Constant modes cover the full extent of all other axes
+        for axis, (size, (lower, upper), side_modes, side_values) in enumerate(zip(value.shape, pad_width, modes, constant_values)):
+            if lower > 0 and side_modes[0] == 'constant':
+                result[(slice(None),) * axis + (slice(0, lower),)] = side_values[0]
+            if upper > 0 and side_modes[1] == 'constant':
+                result[(slice(None),) * axis + (slice(lower + size, None),)] = side_values[1]
+        return result
+
+    def weighted_sum(self, weights: tuple or list, values: tuple or list):
+        # Factor out the weight of the largest group so that most terms are added or subtracted in place without temporary arrays
+        scale = weights[max(range(len(weights)), key=lambda i: len(values[i]))]
+        if scale == 0:
+            return Backend.weighted_sum(self, weights, values)
+        terms = [(weight / scale, value) for weight, group in zip(weights, values) for value in group]
+        terms.sort(key=lambda term: term[0] in (1, -1))  # multiply the first term while allocating the result
+        if terms[0][0] == -1:
+            scale = -scale
+            terms = [(-ratio, value) for ratio, value in terms]
+        (ratio, value), terms = terms[0], terms[1:]
+        if ratio != 1:
+            result = np.multiply(value, ratio)
+        elif terms:
+            (ratio, value2), terms = terms[0], terms[1:]
+            result = np.add(value, value2) if ratio == 1 else np.subtract(value, value2)
         else:
-            if mode in ('periodic', 'boundary'):
-                mode = {'periodic': 'wrap', 'boundary': 'edge'}[mode]
-            return np.pad(value, pad_width, mode)
+            result = np.array(value)
+        buffer = None
+        for ratio, value in terms:
+            if ratio == 1:
+                np.add(result, value, out=result)
+            elif ratio == -1:
+                np.subtract(result, value, out=result)
+            else:
+                buffer = np.multiply(value, ratio, out=buffer)
+                np.add(result, buffer, out=result)
+        if scale != 1:
+            np.multiply(result, scale, out=result)
+        return result
 
     def sum(self, value, axis=None, keepdims=False):
         return np.sum(value, axis=axis, keepdims=keepdims)
@@ -196,6 +249,19 @@ class NumPyBackend(Backend):
         else:
             return Backend.mul(self, a, b)
 
+    def fused_op2(self, op_name: str, a, b, buffers: tuple):
+        a, b = self.auto_cast(a, b)
+        if op_name.startswith('r'):
+            op_name, a, b = op_name[1:], b, a
+        if not isinstance(a, np.ndarray) or not isinstance(b, np.ndarray) or a.dtype.kind not in 'fc':
+            return NotImplemented
+        shape = np.broadcast(a, b).shape
+        for buffer in buffers:
+            if isinstance(buffer, np.ndarray) and buffer.shape == shape and buffer.dtype == a.dtype and buffer.flags.writeable:
+                if buffer.flags.c_contiguous or all(x.strides == buffer.strides for x in (a, b) if x.shape == shape):  # same memory layout as a new array
+                    return _FUSED_UFUNCS[op_name](a, b, out=buffer)
+        return NotImplemented
+
     def matmul(self, A, b):
         return np.stack([A.dot(b[i]) for i in range(b.shape[0])])
 
@@ -219,6 +285,7 @@ class NumPyBackend(Backend):
         else:
             valid = [value.shape[i + 2] - kernel.shape[i + 3] + 1 for i in range(value.ndim - 2)]
             result = np.zeros([value.shape[0], kernel.shape[1], *valid], dtype=to_numpy_dtype(self.float_type))
+        import scipy.signal  # slow to import, only loaded when needed
         mode = 'same' if zero_padding else 'valid'
         for b in range(value.shape[0]):
             b_kernel = kernel[min(b, kernel.shape[0] - 1)]
@@ -261,6 +328,44 @@ class NumPyBackend(Backend):
     def all(self, boolean_tensor, axis=None, keepdims=False):
         return np.all(boolean_tensor, axis=axis, keepdims=keepdims)
 
+    def grid_sample(self, grid, coordinates, extrapolation: str):
+        if extrapolation not in ('undefined', 'zeros', 'boundary', 'periodic'):
+            return NotImplemented
+        grid, coordinates = self.auto_cast(grid, coordinates)
+        resolution = grid.shape[1:-1]
+        strides = np.cumprod((1,) + resolution[:0:-1])[::-1]
+        lower = np.floor(coordinates)
+        t = coordinates - lower
+        lower = lower.astype(np.int64)
+        indices, weights = [], []  # flat index offsets and weights of the lower and upper neighbor along each dim
+        for dim, (size, stride) in enumerate(zip(resolution, strides)):
+            i0, i1 = lower[..., dim], lower[..., dim] + 1
+            w0, w1 = 1 - t[..., dim], t[..., dim]
+            if extrapolation == 'periodic':
+                i0, i1 = i0 % size, i1 % size
+            elif extrapolation in ('zeros', 'undefined'):
+                w0, w1 = w0 * ((i0 >= 0) & (i0 < size)), w1 * ((i1 >= 0) & (i1 < size))
+            i0, i1 = np.clip(i0, 0, size - 1), np.clip(i1, 0, size - 1)
+            indices.append((i0 * stride, i1 * stride))
+            weights.append((w0, w1))
+        flat_grid = np.reshape(grid, (grid.shape[0], -1, grid.shape[-1]))
+        if grid.shape[0] > 1:
+            batch_offset = np.arange(grid.shape[0]).reshape((-1,) + (1,) * (coordinates.ndim - 2)) * flat_grid.shape[1]
+            flat_grid = np.reshape(flat_grid, (-1, grid.shape[-1]))
+        else:
+            batch_offset = 0
+            flat_grid = flat_grid[0]
+        result = 0
+        for corner in itertools.product((0, 1), repeat=len(resolution)):  # linear interpolation between 2^d closest values
+            index = batch_offset + sum(indices[dim][c] for dim, c in enumerate(corner))
+            weight = functools.reduce(lambda w1, w2: w1 * w2, [weights[dim][c] for dim, c in enumerate(corner)])
+            result = result + weight[..., None] * np.take(flat_grid, index, axis=0)
+        return result
+
+    def bincount(self, x, weights, bins: int):
+        result = np.bincount(x, weights, minlength=bins)
+        return result if weights is None else result.astype(weights.dtype, copy=False)
+
     def scatter(self, base_grid, indices, values, mode: str):
         assert mode in ('add', 'update')
         assert isinstance(base_grid, np.ndarray)
@@ -276,7 +381,15 @@ class NumPyBackend(Backend):
             result = np.tile(base_grid, (batch_size, *[1] * (base_grid.ndim - 1)))
         if not isinstance(indices, (tuple, list)):
             indices = self.unstack(indices, axis=-1)
-        if mode == 'add':
+        if mode == 'add' and values.dtype.kind in 'biuf':  # segmented sum over flat cell indices, much faster than np.add.at
+            cells = int(np.prod(result.shape[1:-1]))
+            flat = np.ravel_multi_index(tuple(indices), result.shape[1:-1]) + np.arange(batch_size)[:, None] * cells
+            flat = np.broadcast_to(flat, (batch_size, max(flat.shape[1], values.shape[1]))).reshape(-1)
+            values = np.broadcast_to(values, (batch_size, flat.size // batch_size, values.shape[-1])).reshape(-1, values.shape[-1])
+            for c in range(result.shape[-1]):
+                summed = np.bincount(flat, values[:, min(c, values.shape[1] - 1)], minlength=batch_size * cells)
+                result[..., c] += summed.reshape(result.shape[:-1]).astype(result.dtype)
+        elif mode == 'add':
             for b in range(batch_size):
                 np.add.at(result, (b, *[i[min(b, i.shape[0]-1)] for i in indices]), values[min(b, values.shape[0]-1)])
         else:  # update
@@ -376,59 +489,73 @@ class NumPyBackend(Backend):
     #             return grads
     #     return gradient
 
-    def linear_solve(self, method: str, lin, y, x0, rtol, atol, max_iter, trj: bool) -> Any:
+    def linear_solve(self, method: str, lin, y, x0, rtol, atol, max_iter, trj: bool, preconditioner=None, batch_strategy: str = None) -> Any:
         if method == 'direct':
-            return self.direct_linear_solve(lin, y)
+            return self.direct_linear_solve(lin, y, batch_strategy)
         elif method == 'CG-native':
-            return self.scipy_iterative_sparse_solve(lin, y, x0, rtol, atol, max_iter, scipy_function=scipy.sparse.linalg.cg)
+            return self.scipy_iterative_sparse_solve(lin, y, x0, rtol, atol, max_iter, preconditioner=preconditioner, batch_strategy=batch_strategy, scipy_function=scipy.sparse.linalg.cg)
         elif method == 'GMres':
-            return self.scipy_iterative_sparse_solve(lin, y, x0, rtol, atol, max_iter, scipy_function=scipy.sparse.linalg.gmres)
+            return self.scipy_iterative_sparse_solve(lin, y, x0, rtol, atol, max_iter, preconditioner=preconditioner, batch_strategy=batch_strategy, scipy_function=scipy.sparse.linalg.gmres)
         elif method == 'biCG':
-            return self.scipy_iterative_sparse_solve(lin, y, x0, rtol, atol, max_iter, scipy_function=scipy.sparse.linalg.bicg)
+            return self.scipy_iterative_sparse_solve(lin, y, x0, rtol, atol, max_iter, preconditioner=preconditioner, batch_strategy=batch_strategy, scipy_function=scipy.sparse.linalg.bicg)
         elif method == 'CGS':
-            return self.scipy_iterative_sparse_solve(lin, y, x0, rtol, atol, max_iter, scipy_function=scipy.sparse.linalg.cgs)
+            return self.scipy_iterative_sparse_solve(lin, y, x0, rtol, atol, max_iter, preconditioner=preconditioner, batch_strategy=batch_strategy, scipy_function=scipy.sparse.linalg.cgs)
         elif method == 'lGMres':
-            return self.scipy_iterative_sparse_solve(lin, y, x0, rtol, atol, max_iter, scipy_function=scipy.sparse.linalg.lgmres)
+            return self.scipy_iterative_sparse_solve(lin, y, x0, rtol, atol, max_iter, preconditioner=preconditioner, batch_strategy=batch_strategy, scipy_function=scipy.sparse.linalg.lgmres)
         # elif method == 'minres':
         #     return self.scipy_iterative_sparse_solve(lin, y, x0, rtol, atol, max_iter, scipy_function=scipy.sparse.linalg.minres)
         elif method == 'QMR':
-            return self.scipy_iterative_sparse_solve(lin, y, x0, rtol, atol, max_iter, scipy_function=scipy.sparse.linalg.qmr)
+            return self.scipy_iterative_sparse_solve(lin, y, x0, rtol, atol, max_iter, preconditioner=preconditioner, batch_strategy=batch_strategy, scipy_function=scipy.sparse.linalg.qmr)
         elif method == 'GCrotMK':
-            return self.scipy_iterative_sparse_solve(lin, y, x0, rtol, atol, max_iter, scipy_function=scipy.sparse.linalg.gcrotmk)
-        elif method == 'auto':
+            return self.scipy_iterative_sparse_solve(lin, y, x0, rtol, atol, max_iter, preconditioner=preconditioner, batch_strategy=batch_strategy, scipy_function=scipy.sparse.linalg.gcrotmk)
+        elif method == 'auto' and preconditioner is None:
             return self.conjugate_gradient_adaptive(lin, y, x0, rtol, atol, max_iter, trj)
             # return self.conjugate_gradient(lin, y, x0, rtol, atol, max_iter, trj)
+        elif method in ('CG', 'auto'):
+            return self.conjugate_gradient(lin, y, x0, rtol, atol, max_iter, trj, preconditioner, batch_strategy)
         else:
-            return Backend.linear_solve(self, method, lin, y, x0, rtol, atol, max_iter, trj)
+            return Backend.linear_solve(self, method, lin, y, x0, rtol, atol, max_iter, trj, preconditioner, batch_strategy)
 
-    def direct_linear_solve(self, lin, y) -> Any:
+    def direct_linear_solve(self, lin, y, batch_strategy: str = None) -> Any:
         batch_size = self.staticshape(y)[0]
-        xs = []
-        converged = []
         if isinstance(lin, (tuple, list)):
             assert all(issparse(l) for l in lin)
         else:
             assert issparse(lin)
             lin = [lin] * batch_size
-        # Solve each example independently
-        for batch in range(batch_size):
-            # use_umfpack=self.precision == 64
-            x = spsolve(lin[batch], y[batch])  # returns nan when diverges
-            xs.append(x)
-            converged.append(np.all(np.isfinite(x)))
-        x = np.stack(xs)
-        converged = np.stack(converged)
+        x = np.zeros(y.shape, dtype=np.result_type(y, *[l.dtype for l in lin]))
+        # Examples sharing a matrix are solved together using a single factorization
+        matrices = list({id(l): l for l in lin}.values())
+        batches = [[b for b in range(batch_size) if lin[b] is matrix] for matrix in matrices]
+        if batch_strategy == 'block-diagonal' and len(matrices) > 1:
+            matrices = [scipy.sparse.block_diag([lin[b] for b in range(batch_size)], format='csc')]
+            y_flat = np.reshape(y, (1, -1))
+            x_flat = self._direct_solve(matrices[0], y_flat)
+            x[:] = np.reshape(x_flat, y.shape)
+        else:
+            def solve_group(matrix, batches):
+                x[batches] = self._direct_solve(matrix, y[batches])
+            _run_batched(solve_group, list(zip(matrices, batches)), batch_strategy)
+        converged = np.all(np.isfinite(x), axis=1)
         diverged = ~converged
-        iterations = [-1] * batch_size  # spsolve does not perform iterations
-        return SolveResult('scipy.sparse.linalg.spsolve', x, None, iterations, iterations, converged, diverged, "")
-
-    def conjugate_gradient(self, lin, y, x0, rtol, atol, max_iter, trj: bool) -> Any:
-        if trj or callable(lin):
-            return Backend.conjugate_gradient(self, lin, y, x0, rtol, atol, max_iter, trj)  # generic implementation
+        iterations = [-1] * batch_size  # direct solves do not perform iterations
+        return SolveResult('scipy.sparse.linalg.splu', x, None, iterations, iterations, converged, diverged, "")
+
+    def _direct_solve(self, matrix, y):
+        """ Solves `matrix · x = y` for all rows of `y` using a single (cached) factorization of `matrix`. """
+        factorization = self.factorization_cache.factorize(matrix)
+        if factorization is not None:
+            return factorization.solve(np.ascontiguousarray(y.T, dtype=matrix.dtype)).T
+        else:  # singular matrix
+            return np.stack([spsolve(matrix, y_b) for y_b in y])  # returns nan when diverges
+
+    def conjugate_gradient(self, lin, y, x0, rtol, atol, max_iter, trj: bool, preconditioner=None, batch_strategy: str = None) -> Any:
+        if trj or callable(lin) or preconditioner is not None:
+            return Backend.conjugate_gradient(self, lin, y, x0, rtol, atol, max_iter, trj, preconditioner)  # generic implementation
         else:
-            return self.scipy_iterative_sparse_solve(lin, y, x0, rtol, atol, max_iter, scipy_function=scipy.sparse.linalg.bicg)  # more stable than cg
+            return self.scipy_iterative_sparse_solve(lin, y, x0, rtol, atol, max_iter, batch_strategy=batch_strategy, scipy_function=scipy.sparse.linalg.bicg)  # more stable than cg
 
-    def scipy_iterative_sparse_solve(self, lin, y, x0, rtol, atol, max_iter, scipy_function=cg) -> Any:
+    def scipy_iterative_sparse_solve(self, lin, y, x0, rtol, atol, max_iter, preconditioner=None, batch_strategy: str = None, scipy_function=cg) -> Any:
         bs_y = self.staticshape(y)[0]
         bs_x0 = self.staticshape(x0)[0]
         batch_size = combined_dim(bs_y, bs_x0)
@@ -439,19 +566,164 @@ class NumPyBackend(Backend):
         else:
             lin = [lin] * batch_size
 
-        def count_callback(x_n):  # called after each step, not with x0
-            iterations[b] += 1
-
-        xs = []
+        assert batch_strategy != 'block-diagonal', f"batch_strategy='block-diagonal' is only supported for direct solves, not {scipy_function.__name__}. Use 'threads' instead."
+        xs = [None] * batch_size
         iterations = [0] * batch_size
-        converged = []
-        diverged = []
-        for b in range(batch_size):
-            x, ret_val = scipy_function(lin[b], y[b], x0=x0[b], tol=rtol[b], atol=atol[b], maxiter=max_iter[b], callback=count_callback)
+        converged = [None] * batch_size
+        diverged = [None] * batch_size
+
+        def solve_example(b):
+            def count_callback(x_n):  # called after each step, not with x0
+                iterations[b] += 1
+
+            if preconditioner is not None:  # preconditioner is assumed to be symmetric
+                dim = self.staticshape(y)[-1]
+                apply_preconditioner = lambda r, b=b: preconditioner(r[None, :], batch_index=b)[0]
+                preconditioner_b = LinearOperator(shape=(dim, dim), dtype=y.dtype, matvec=apply_preconditioner, rmatvec=apply_preconditioner)
+            else:
+                preconditioner_b = None
+            x, ret_val = scipy_function(lin[b], y[b], x0=x0[b], tol=rtol[b], atol=atol[b], maxiter=max_iter[b], M=preconditioner_b, callback=count_callback)
             # ret_val: 0=success, >0=not converged, <0=error
-            xs.append(x)
-            converged.append(ret_val == 0)
-            diverged.append(ret_val < 0 or np.any(~np.isfinite(x)))
+            xs[b] = x
+            converged[b] = ret_val == 0
+            diverged[b] = ret_val < 0 or np.any(~np.isfinite(x))
+
+        _run_batched(solve_example, [(b,) for b in range(batch_size)], batch_strategy)
         x = np.stack(xs)
         f_eval = [i + 1 for i in iterations]
         return SolveResult(f'scipy.sparse.linalg.{scipy_function.__name__}', x, None, iterations, f_eval, converged, diverged, "")
+
+
+_FUSED_UFUNCS = {'add': np.add, 'sub': np.subtract, 'mul': np.multiply, 'truediv': np.true_divide, 'pow': np.power}
+
+
+def _pad_source_index(index: int, size: int, mode: str) -> int:
+    """ Maps an index outside `[0, size)` to the index it copies its value from. """
+    if mode == 'boundary':
+        return min(max(index, 0), size - 1)
+    elif mode == 'periodic':
+        return index % size
+    elif mode == 'symmetric':
+        index = index % (2 * size)
+        return min(index, 2 * size - 1 - index)
+    elif mode == 'reflect':
+        if size == 1:
+            return 0
+        index = index % (2 * size - 2)
+        return min(index, 2 * size - 2 - index)
+    else:
+        raise ValueError(mode)
+
+
+def _pad_source_slice(indices: list):
+    """ Expresses `indices` as a `slice` if possible so that copying them does not require advanced indexing. """
+    step = indices[1] - indices[0] if len(indices) > 1 else 1
+    if step in (-1, 0, 1) and all(j - i == step for i, j in zip(indices[:-1], indices[1:])):
+        if step == 0:
+            return slice(indices[0], indices[0] + 1)  # broadcast single slice
+        stop = indices[-1] + step
+        return slice(indices[0], stop if stop >= 0 else None, step)
+    return np.array(indices)
+
+
+def _run_batched(function: Callable, args: List[tuple], batch_strategy: str or None):
+    """
+    Calls `function(*a)` for all `a` in `args`, either sequentially or using a thread pool.
+    SciPy releases the GIL during sparse factorizations and matrix-vector products so threads can run in parallel.
+    """
+    if batch_strategy in (None, 'sequential', 'block-diagonal') or len(args) <= 1:
+        for a in args:
+            function(*a)
+    elif batch_strategy == 'threads':
+        with ThreadPoolExecutor(max_workers=min(len(args), os.cpu_count() or 1)) as pool:
+            for future in [pool.submit(function, *a) for a in args]:
+                future.result()  # raises errors
+    else:
+        raise NotImplementedError(f"Unsupported batch_strategy '{batch_strategy}'. Use one of ('sequential', 'threads', 'block-diagonal').")
+
+
+class FactorizationCache:
+    """
+    Least-recently-used cache of sparse LU factorizations, bounded by the memory occupied by the factors.
+
+    Matrices are identified by their sparsity pattern and values so that equal matrices share a factorization
+    even when they are rebuilt, e.g. for each time step of a simulation with static obstacles.
+    Entries are looked up by shape, sparsity pattern and a digest of the values. A hit additionally requires the stored matrix to equal the queried one.
+    """
+
+    def __init__(self, max_bytes: int = 512 * 1024 ** 2):
+        """
+        Args:
+            max_bytes: Maximum total size of all cached factorizations in bytes.
+                When exceeded, the least recently used factorizations are evicted.
+                Set to 0 to disable caching.
+        """
+        self.max_bytes = max_bytes
+        self._factorizations = OrderedDict()  # key -> (matrix, factorization, bytes)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(matrix) -> tuple:
+        """ Digest of the sparsity pattern and values of `matrix`. Hash collisions are resolved by comparing the stored matrix. """
+        matrix = matrix.tocsc()
+        return matrix.shape, matrix.dtype.str, matrix.nnz, hash(matrix.indptr.tobytes()), hash(matrix.indices.tobytes()), hash(matrix.data.tobytes())
+
+    @staticmethod
+    def _equal(matrix, cached) -> bool:
+        return np.array_equal(matrix.indptr, cached.indptr) and np.array_equal(matrix.indices, cached.indices) and np.array_equal(matrix.data, cached.data)
+
+    def factorize(self, matrix):
+        """
+        Returns the cached LU factorization of `matrix`, computing it if necessary.
+
+        Args:
+            matrix: SciPy sparse matrix.
+
+        Returns:
+            `scipy.sparse.linalg.SuperLU` or `None` if `matrix` is singular.
+        """
+        matrix = matrix.tocsc()
+        key = FactorizationCache.key(matrix)
+        with self._lock:
+            if key in self._factorizations and FactorizationCache._equal(matrix, self._factorizations[key][0]):
+                self.hits += 1
+                self._factorizations.move_to_end(key)
+                return self._factorizations[key][1]
+            self.misses += 1
+        try:
+            factorization = splu(matrix)
+        except RuntimeError:  # Factor is exactly singular
+            return None
+        matrix = matrix.copy()  # the caller may modify its matrix in-place
+        size = factorization.nnz * (matrix.dtype.itemsize + 4) + 2 * 4 * matrix.shape[0] + matrix.data.nbytes + matrix.indices.nbytes + matrix.indptr.nbytes
+        if size <= self.max_bytes:
+            with self._lock:
+                self._factorizations[key] = (matrix, factorization, size)
+                self._factorizations.move_to_end(key)
+                while self.memory > self.max_bytes:
+                    self._factorizations.popitem(last=False)
+        return factorization
+
+    def invalidate(self, matrix=None):
+        """
+        Removes the factorization of `matrix` from the cache.
+        If `matrix` is `None`, all factorizations are removed.
+        """
+        with self._lock:
+            if matrix is None:
+                self._factorizations.clear()
+            else:
+                self._factorizations.pop(FactorizationCache.key(matrix), None)
+
+    @property
+    def memory(self) -> int:
+        """ Total size of all cached factorizations in bytes. """
+        return sum(size for *_, size in self._factorizations.values())
+
+    def __len__(self):
+        return len(self._factorizations)
+
+    def __repr__(self):
+        return f"FactorizationCache({len(self)} factorizations, {self.memory} / {self.max_bytes} bytes, hits={self.hits}, misses={self.misses})"
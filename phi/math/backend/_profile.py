@@ -1,8 +1,12 @@
 import inspect
 import json
+import os
+import sys
+import threading
+import weakref
 from contextlib import contextmanager
 from time import perf_counter
-from typing import Optional, Callable
+from typing import Optional, Callable, List
 
 from ._backend import Backend, BACKENDS, _DEFAULT
 
@@ -223,6 +227,405 @@ class ExtCall:
             return result
 
 
+class ProfileStatistics:
+    """
+    Aggregated time, call count and output bytes of backend calls, grouped by the Python call stack that issued them.
+
+    Unlike the call tree of a tracing `Profile`, the statistics only store one entry per distinct call stack and backend function.
+    Their memory footprint is therefore independent of the number of recorded calls, which makes them suitable for long runs.
+
+    Statistics are created by `profile(statistics=True)` and accessed via `Profile.statistics`.
+
+    Profiles created with `sample_interval` hold sampled statistics instead.
+    Then, each entry counts the stack samples and the wall time attributed to them, which includes time spent outside of backend calls.
+    This time is listed under the backend function `Python`.
+    """
+
+    def __init__(self, sampled=False):
+        self._entries = {}  # (code objects from innermost to outermost, backend name, function name) -> [calls, time, bytes]
+        self._names = {}  # code -> display name
+        self._sampled = sampled
+
+    def _add(self, backend_call: BackendCall, result):
+        stack = _code_stack(sys._getframe())
+        self._record(stack, backend_call._backend.name, backend_call._function_name, backend_call._stop - backend_call._start, _nbytes(result, backend_call._backend))
+
+    def _record(self, stack: tuple, backend: str or None, function: str or None, time: float, nbytes: int):
+        key = (stack, backend, function)
+        entry = self._entries.get(key)
+        if entry is None:
+            entry = self._entries[key] = [0, 0., 0]
+        entry[0] += 1
+        entry[1] += time
+        entry[2] += nbytes
+
+    @property
+    def sampled(self) -> bool:
+        """ Whether these statistics were estimated from stack samples instead of recording every backend call. """
+        return self._sampled
+
+    @property
+    def call_count(self) -> int:
+        """ Total number of recorded backend calls or number of samples if `sampled`. """
+        return sum(entry[0] for entry in self._entries.values())
+
+    @property
+    def duration(self) -> float:
+        """ Total time spent in backend calls in seconds. If `sampled`, the total sampled wall time. """
+        return sum(entry[1] for entry in self._entries.values())
+
+    def _name(self, code) -> str:
+        name = self._names.get(code)
+        if name is None:
+            name = self._names[code] = _code_name(code)
+        return name
+
+    def table(self, by='backend') -> List[dict]:
+        """
+        Aggregates the statistics into a flat table, sorted by time in descending order.
+
+        Args:
+            by: Either `'backend'` to list backend functions or `'phi'` to list the functions of the `phi` package that issued the backend calls.
+                For `'phi'`, each backend call is attributed to all distinct `phi` functions on its call stack.
+                The time spent in calls where a function is the innermost `phi` function is listed as `self_time`.
+
+        Returns:
+            `list` of `dict`s with the entries `function`, `calls` (number of samples if `sampled`), `time` (seconds) and `bytes` (total size of all outputs)
+            and additionally `self_time` if `by='phi'`.
+        """
+        rows = {}
+        for (stack, backend, function), (calls, time, nbytes) in self._entries.items():
+            if by == 'backend':
+                names = [f"{backend}.{function}" if function is not None else "Python"]
+            elif by == 'phi':
+                names = list(dict.fromkeys(self._name(code) for code in stack if _is_phi_code(code)))
+            else:
+                raise ValueError(f"by must be 'backend' or 'phi' but got '{by}'")
+            for i, name in enumerate(names):
+                row = rows.get(name)
+                if row is None:
+                    row = rows[name] = {'function': name, 'calls': 0, 'time': 0., 'bytes': 0}
+                    if by == 'phi':
+                        row['self_time'] = 0.
+                row['calls'] += calls
+                row['time'] += time
+                row['bytes'] += nbytes
+                if by == 'phi' and i == 0:
+                    row['self_time'] += time
+        return sorted(rows.values(), key=lambda row: row['time'], reverse=True)
+
+    def print(self, by='backend', limit: int or None = 20):
+        """
+        Prints the table returned by `table()` to the console.
+
+        Args:
+            by: Either `'backend'` or `'phi'`, see `table()`.
+            limit: Maximum number of rows to print. `None` to print all.
+        """
+        rows = self.table(by)
+        total = self.duration
+        self_header = f" {'Self [ms]':>10}" if by == 'phi' else ""
+        print(f"{'Samples' if self._sampled else 'Calls':>8} {'Time [ms]':>10} {'%':>6}{self_header} {'Output [MB]':>12}  Function")
+        for row in rows[:limit]:
+            self_time = f" {1000 * row['self_time']:10.2f}" if by == 'phi' else ""
+            share = 100 * row['time'] / total if total > 0 else 0
+            print(f"{row['calls']:8d} {1000 * row['time']:10.2f} {share:6.1f}{self_time} {row['bytes'] / 2 ** 20:12.2f}  {row['function']}")
+        if limit is not None and len(rows) > limit:
+            print(f"... {len(rows) - limit} more")
+
+    def folded_stacks(self, metric='time') -> str:
+        """
+        Exports the statistics as folded stacks which can be rendered by flame graph tools such as `flamegraph.pl` or speedscope.
+        Each line lists the call stack, from outermost to innermost function separated by `;`, followed by the backend function and the value.
+
+        Args:
+            metric: One of `'time'` (microseconds), `'calls'` or `'bytes'`.
+
+        Returns:
+            Folded stacks as `str`, one line per stack.
+        """
+        index = {'calls': 0, 'time': 1, 'bytes': 2}[metric]
+        lines = {}
+        for (stack, backend, function), entry in self._entries.items():
+            line = ';'.join([self._name(code) for code in reversed(stack)] + ([f"{backend}.{function}"] if function is not None else []))
+            lines[line] = lines.get(line, 0) + entry[index]
+        if metric == 'time':
+            lines = {line: int(round(value * 1e6)) for line, value in lines.items()}
+        return "\n".join(f"{line} {value}" for line, value in lines.items() if value > 0)
+
+    def save_folded_stacks(self, file: str, metric='time'):
+        """
+        Writes the result of `folded_stacks()` to `file`.
+
+        Args:
+            file: Path of the text file to write.
+            metric: One of `'time'` (microseconds), `'calls'` or `'bytes'`.
+        """
+        with open(file, 'w') as f:
+            f.write(self.folded_stacks(metric))
+            f.write("\n")
+
+
+_PHI_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))) + os.sep
+
+
+def _code_stack(frame) -> tuple:
+    """ Returns the code objects of `frame` and all its parents, skipping frames of this module. """
+    stack = []
+    while frame is not None:
+        if frame.f_code.co_filename != __file__:
+            stack.append(frame.f_code)
+        frame = frame.f_back
+    return tuple(stack)
+
+
+def _is_phi_code(code) -> bool:
+    return code.co_filename.startswith(_PHI_DIR) and code.co_filename != __file__
+
+
+def _code_name(code) -> str:
+    """ Names functions of the `phi` package by their public module, such as `math.grid_sample` or `physics.advect.mac_cormack`. """
+    name = getattr(code, 'co_qualname', code.co_name)
+    if code.co_filename.startswith(_PHI_DIR):
+        module = os.path.splitext(os.path.relpath(code.co_filename, _PHI_DIR))[0].split(os.sep)
+        module = [m for m in module if not m.startswith('_')]
+        return '.'.join(module + [name])
+    return f"{os.path.basename(code.co_filename)}:{name}"
+
+
+def _nbytes(value, backend) -> int:
+    if isinstance(value, (tuple, list)):
+        return sum(_nbytes(v, backend) for v in value)
+    nbytes = getattr(value, 'nbytes', None)
+    if isinstance(nbytes, int):
+        return nbytes
+    if hasattr(value, 'nnz') and hasattr(value, 'data'):  # SciPy sparse matrix
+        return _nbytes(value.data, backend)
+    try:
+        if backend.is_tensor(value, only_native=True):
+            size = 1
+            for dim in backend.staticshape(value):
+                size *= dim or 0
+            return size * backend.dtype(value).itemsize
+    except BaseException:
+        pass
+    return 0
+
+
+class MemoryTracker:
+    """
+    Tracks the memory allocated by the outputs of backend calls.
+
+    Each output array that owns its memory is registered with a finalizer so that the live bytes drop when the array is garbage-collected.
+    Outputs that are views of other arrays or that are returned more than once are only counted once.
+    Allocations are attributed to the calling function of `phi.field` or `phi.physics`, or to the user code if no such function is involved.
+
+    Memory trackers are created by `profile(memory=True)` and accessed via `Profile.memory`.
+    Call `MemoryTracker.step()` after each simulation step to record per-step numbers.
+    """
+
+    def __init__(self, backends: tuple or list):
+        self._backends = backends
+        self._live = {}  # id -> (bytes, caller code, backend function, finalizer)
+        self._live_bytes = 0
+        self._peak = 0
+        self._allocated = 0
+        self._step_allocated = 0
+        self._step_peak = 0
+        self._steps = []
+        self._callers = {}  # code -> [calls, allocated, live, peak]
+        self._functions = {}  # backend function -> [calls, allocated, live, peak]
+
+    def _add(self, backend_call: BackendCall, result):
+        caller = None
+        function = f"{backend_call._backend.name}.{backend_call._function_name}"
+        for value in (result if isinstance(result, (tuple, list)) else (result,)):
+            nbytes = _allocated_bytes(value, backend_call._backend)
+            if nbytes == 0 or id(value) in self._live:
+                continue
+            try:
+                finalizer = weakref.finalize(value, self._release, id(value))
+            except TypeError:  # no weak references supported, e.g. NumPy scalars
+                continue
+            finalizer.atexit = False
+            caller = caller or _allocating_caller(sys._getframe(1))
+            self._live[id(value)] = (nbytes, caller, function, finalizer)
+            self._live_bytes += nbytes
+            self._allocated += nbytes
+            self._step_allocated += nbytes
+            self._peak = max(self._peak, self._live_bytes)
+            self._step_peak = max(self._step_peak, self._live_bytes)
+            for entry in (_entry(self._callers, caller), _entry(self._functions, function)):
+                entry[0] += 1
+                entry[1] += nbytes
+                entry[2] += nbytes
+                entry[3] = max(entry[3], entry[2])
+
+    def _release(self, key):
+        nbytes, caller, function, _ = self._live.pop(key)
+        self._live_bytes -= nbytes
+        self._callers[caller][2] -= nbytes
+        self._functions[function][2] -= nbytes
+
+    def _finish(self):
+        for *_, finalizer in self._live.values():
+            finalizer.detach()
+
+    def step(self) -> dict:
+        """
+        Ends the current step and starts a new one.
+
+        Returns:
+            `dict` describing the finished step with the entries
+            `allocated` (bytes allocated during the step),
+            `peak` (maximum live bytes during the step),
+            `live` (live bytes at the end of the step)
+            and the device memory usage reported by `Backend.get_memory_usage()` for each profiled backend that supports it.
+        """
+        record = {'allocated': self._step_allocated, 'peak': self._step_peak, 'live': self._live_bytes}
+        for backend in self._backends:
+            usage = backend.get_memory_usage()
+            if usage is not None:
+                record[f"{backend.name} device"] = usage
+        self._steps.append(record)
+        self._step_allocated = 0
+        self._step_peak = self._live_bytes
+        return record
+
+    @property
+    def steps(self) -> List[dict]:
+        """ Records of all steps finished by `step()`. """
+        return self._steps
+
+    @property
+    def allocated(self) -> int:
+        """ Total bytes allocated by all backend calls. """
+        return self._allocated
+
+    @property
+    def peak(self) -> int:
+        """ Maximum number of bytes held by live backend outputs at any time. """
+        return self._peak
+
+    @property
+    def live(self) -> int:
+        """ Bytes held by backend outputs that have not been garbage-collected yet. """
+        return self._live_bytes
+
+    def table(self, by='caller') -> List[dict]:
+        """
+        Lists the allocations per calling function, sorted by allocated bytes in descending order.
+
+        Args:
+            by: Either `'caller'` to group by the calling `phi.field` / `phi.physics` or user function or `'backend'` to group by backend function.
+
+        Returns:
+            `list` of `dict`s with the entries `function`, `calls` (number of allocations),
+            `allocated` (total bytes), `live` (bytes still allocated) and `peak` (maximum live bytes).
+        """
+        if by == 'caller':
+            entries = {_code_name(code) if code is not None else "?": entry for code, entry in self._callers.items()}
+        elif by == 'backend':
+            entries = self._functions
+        else:
+            raise ValueError(f"by must be 'caller' or 'backend' but got '{by}'")
+        rows = [{'function': name, 'calls': calls, 'allocated': allocated, 'live': live, 'peak': peak} for name, (calls, allocated, live, peak) in entries.items()]
+        return sorted(rows, key=lambda row: row['allocated'], reverse=True)
+
+    def print(self, by='caller', limit: int or None = 20):
+        """
+        Prints the table returned by `table()` to the console.
+
+        Args:
+            by: Either `'caller'` or `'backend'`, see `table()`.
+            limit: Maximum number of rows to print. `None` to print all.
+        """
+        rows = self.table(by)
+        print(f"Memory: {self._allocated / 2 ** 20:.2f} MB allocated, {self._peak / 2 ** 20:.2f} MB peak, {self._live_bytes / 2 ** 20:.2f} MB live")
+        print(f"{'Allocs':>8} {'Allocated [MB]':>15} {'Peak [MB]':>10} {'Live [MB]':>10}  Function")
+        for row in rows[:limit]:
+            print(f"{row['calls']:8d} {row['allocated'] / 2 ** 20:15.2f} {row['peak'] / 2 ** 20:10.2f} {row['live'] / 2 ** 20:10.2f}  {row['function']}")
+        if limit is not None and len(rows) > limit:
+            print(f"... {len(rows) - limit} more")
+
+
+def _entry(entries: dict, key) -> list:
+    entry = entries.get(key)
+    if entry is None:
+        entry = entries[key] = [0, 0, 0, 0]
+    return entry
+
+
+def _allocated_bytes(value, backend) -> int:
+    if getattr(value, 'base', None) is not None or getattr(value, '_base', None) is not None:  # NumPy / PyTorch view
+        return 0
+    return _nbytes(value, backend)
+
+
+_ATTRIBUTED_DIRS = tuple(_PHI_DIR + package + os.sep for package in ('field', 'physics'))
+
+
+def _allocating_caller(frame):
+    """ Returns the code of the innermost `phi.field` or `phi.physics` function, or the innermost non-`phi` function if there is none. """
+    user_code = None
+    while frame is not None:
+        code = frame.f_code
+        if code.co_filename.startswith(_ATTRIBUTED_DIRS):
+            return code
+        if user_code is None and not code.co_filename.startswith(_PHI_DIR):
+            user_code = code
+        frame = frame.f_back
+    return user_code
+
+
+class _StackSampler:
+    """
+    Background thread that periodically samples the Python stack of the profiled thread.
+    Running backend calls are identified by the code objects of the backend methods so that backends need not be wrapped.
+    The wall time between two samples is attributed to the stack of the later sample.
+    """
+
+    def __init__(self, statistics: ProfileStatistics, interval: float, backends: tuple or list):
+        self.statistics = statistics
+        self.interval = interval
+        self._backend_code = {}  # code of backend method -> (backend name, method name)
+        for backend in backends:
+            for name in dir(type(backend)):
+                code = getattr(getattr(type(backend), name, None), '__code__', None)
+                if code is not None and not name.startswith('__'):
+                    self._backend_code.setdefault(code, (backend.name, name))
+        self._thread_id = None
+        self._last = None
+        self._stop_event = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="phi-profile-sampler", daemon=True)
+
+    def start(self):
+        self._thread_id = threading.get_ident()
+        self._last = perf_counter()
+        self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop_event.wait(self.interval):
+            frame = sys._current_frames().get(self._thread_id)
+            now = perf_counter()
+            if frame is not None:
+                stack = _code_stack(frame)
+                backend, function = None, None
+                for i in range(len(stack) - 1, -1, -1):  # the outermost backend method is the backend call
+                    call = self._backend_code.get(stack[i])
+                    if call is not None:
+                        backend, function = call
+                        stack = stack[i + 1:]
+                        break
+                self.statistics._record(stack, backend, function, now - self._last, 0)
+            self._last = now
+            del frame
+
+
 class Profile:
     """
     Stores information about calls to backends and their timing.
@@ -230,9 +633,12 @@ class Profile:
     Profile may be created through `profile()` or `profile_function()`.
 
     Profiles can be printed or saved to disc.
+    Profiles created with `statistics=True` only store aggregated `ProfileStatistics` instead of individual calls.
+    Profiles created with `memory=True` additionally track allocations using a `MemoryTracker`.
+    Profiles created with a `sample_interval` hold `ProfileStatistics` estimated from stack samples.
     """
 
-    def __init__(self, trace: bool, backends: tuple or list, subtract_trace_time: bool):
+    def __init__(self, trace: bool, backends: tuple or list, subtract_trace_time: bool, statistics=False, memory=False, sample_interval: float = None):
         self._start = perf_counter()
         self._stop = None
         self._root = ExtCall(None, "", 0, "", "", "", -1)
@@ -245,9 +651,18 @@ class Profile:
         self._backends = backends
         self._subtract_trace_time = subtract_trace_time
         self._total_trace_time = 0
+        self._statistics = ProfileStatistics(sampled=sample_interval is not None) if statistics or sample_interval is not None else None
+        self._memory = MemoryTracker(backends) if memory else None
+        self._sampler = _StackSampler(self._statistics, sample_interval, backends) if sample_interval is not None else None
 
     def _add_call(self, backend_call: BackendCall, args: tuple, kwargs: dict, result):
-        if self._retime_index >= 0:
+        if self._memory is not None:
+            self._memory._add(backend_call, result)
+        if self._sampler is not None:
+            return
+        elif self._statistics is not None:
+            self._statistics._add(backend_call, result)
+        elif self._retime_index >= 0:
             prev_call = self._backend_calls[self._retime_index]
             assert prev_call._function_name == backend_call._function_name
             if self._accumulating:
@@ -285,6 +700,10 @@ class Profile:
 
     def _finish(self):
         self._stop = perf_counter()
+        if self._sampler is not None:
+            self._sampler.stop()
+        if self._memory is not None:
+            self._memory._finish()
         self._children_to_properties()
 
     @property
@@ -292,22 +711,48 @@ class Profile:
         """ Total time passed from creation of the profile to the end of the last operation. """
         return self._stop - self._start if self._stop is not None else None
 
+    @property
+    def statistics(self) -> Optional[ProfileStatistics]:
+        """ Aggregated `ProfileStatistics` if this profile was created with `statistics=True`, else `None`. """
+        return self._statistics
+
+    @property
+    def memory(self) -> Optional[MemoryTracker]:
+        """ `MemoryTracker` if this profile was created with `memory=True`, else `None`. """
+        return self._memory
+
     def print(self, min_duration=1e-3, code_col=80, code_len=50):
         """
         Prints this profile to the console.
+        If this profile only holds `statistics`, prints the tables of backend and `phi` functions instead of the call tree.
+        If memory was tracked, the allocations per calling function are printed as well.
 
         Args:
             min_duration: Hides elements with less time spent on backend calls than `min_duration` (seconds)
             code_col: Formatting option for where the context code is printed.
             code_len: Formatting option for cropping the context code
         """
-        print(f"Profile: {self.duration:.4f} seconds total. Skipping elements shorter than {1000 * min_duration:.2f} ms")
+        if self._statistics is not None:
+            if self._statistics.sampled:
+                print(f"Profile: {self.duration:.4f} seconds total, {self._statistics.call_count} samples")
+            else:
+                print(f"Profile: {self.duration:.4f} seconds total, {self._statistics.duration:.4f} seconds in {self._statistics.call_count} backend calls")
+        else:
+            print(f"Profile: {self.duration:.4f} seconds total. Skipping elements shorter than {1000 * min_duration:.2f} ms")
         if self._messages:
             print("External profiling:")
             for message in self._messages:
                 print(f"  {message}")
             print()
-        self._root.print(min_duration=min_duration, code_col=code_col, code_len=code_len)
+        if self._statistics is not None:
+            self._statistics.print(by='backend')
+            print()
+            self._statistics.print(by='phi')
+        else:
+            self._root.print(min_duration=min_duration, code_col=code_col, code_len=code_len)
+        if self._memory is not None:
+            print()
+            self._memory.print(by='caller')
 
     def save(self, json_file: str):
         """
@@ -316,9 +761,12 @@ class Profile:
 
         This file can be viewed with external applications such as Google chrome.
 
+        Profiles that only hold `statistics` cannot be saved as trace, use `ProfileStatistics.save_folded_stacks()` instead.
+
         Args:
             json_file: filename
         """
+        assert self._statistics is None, "This profile only holds aggregated statistics. Use prof.statistics.save_folded_stacks() instead."
         data = [
             {'name': "process_name", 'ph': 'M', 'pid': 0, 'tid': 0, "args": {"name": "0 Python calls"}},
             {'name': "process_name", 'ph': 'M', 'pid': 1, 'tid': 1, "args": {"name": "1 Operations"}},
@@ -357,6 +805,7 @@ class Profile:
         *Warning:* Internal caching may reduce the number of operations after the first time a function is called.
         To prevent this, run the function before profiling it, see `warmup` in `profile_function()`.
         """
+        assert self._statistics is None, "Profiles holding only statistics cannot be retimed"
         self._retime_index = 0
         restore_data = _start_profiling(self, self._backends)
         try:
@@ -469,7 +918,7 @@ _PROFILE = []
 
 
 @contextmanager
-def profile(backends=None, trace=True, subtract_trace_time=True, save: str or None = None) -> Profile:
+def profile(backends=None, trace=True, subtract_trace_time=True, save: str or None = None, statistics=False, memory=False, sample_interval: float = None) -> Profile:
     """
     To be used in `with` statements, `with math.backend.profile() as prof: ...`.
     Creates a `Profile` for the code executed within the context by tracking calls to the `backends` and optionally tracing the call.
@@ -479,18 +928,33 @@ def profile(backends=None, trace=True, subtract_trace_time=True, save: str or No
         trace: Whether to perform a full stack trace for each backend call. If true, groups backend calls by function.
         subtract_trace_time: If True, subtracts the time it took to trace the call stack from the event times
         save: (Optional) File path to save the profile to. This will call `Profile.save()`.
+            If `statistics=True`, the folded stacks are saved instead, see `ProfileStatistics.save_folded_stacks()`.
+        statistics: If `True`, only aggregates time, call count and output bytes per call stack and backend function instead of recording each call.
+            This has little overhead and constant memory requirements and is suited for long runs.
+            `trace` and `subtract_trace_time` have no effect in this mode.
+            The results can be accessed via `Profile.statistics`.
+        memory: If `True`, tracks the bytes allocated by backend calls and how long they stay alive.
+            The results can be accessed via `Profile.memory`.
+        sample_interval: If set, a background thread samples the stack of the calling thread every `sample_interval` seconds instead of recording each call.
+            Backend calls are identified from the sampled stacks, so the backends are not wrapped unless `memory=True`.
+            This gives statistically accurate time shares, including time spent in Python code, at a small and fixed overhead.
+            Intervals of 10 ms or more keep the overhead below 5%.
+            Samples can be delayed by the Python interpreter while it is running Python code, see `sys.getswitchinterval()`.
+            The sampled statistics can be accessed via `Profile.statistics`.
 
     Returns:
         Created `Profile`
     """
     backends = BACKENDS if backends is None else backends
-    prof = Profile(trace, backends, subtract_trace_time)
+    prof = Profile(trace, backends, subtract_trace_time, statistics, memory, sample_interval)
     restore_data = _start_profiling(prof, backends)
     try:
         yield prof
     finally:
         _stop_profiling(prof, *restore_data)
-        if save is not None:
+        if save is not None and prof.statistics is not None:
+            prof.statistics.save_folded_stacks(save)
+        elif save is not None:
             prof.save(save)
 
 
@@ -542,11 +1006,14 @@ def _start_profiling(prof: Profile, backends: tuple or list):
     _PROFILE.append(prof)
     original_default = _DEFAULT[-1]
     original_backends = tuple(BACKENDS)
-    for i, backend in enumerate(backends):
-        prof_backend = ProfilingBackend(prof, backend, i)
-        BACKENDS[BACKENDS.index(backend)] = prof_backend
-        if _DEFAULT[-1] == backend:
-            _DEFAULT[-1] = prof_backend
+    if prof._sampler is None or prof._memory is not None:  # sampling does not require intercepting backend calls
+        for i, backend in enumerate(backends):
+            prof_backend = ProfilingBackend(prof, backend, i)
+            BACKENDS[BACKENDS.index(backend)] = prof_backend
+            if _DEFAULT[-1] == backend:
+                _DEFAULT[-1] = prof_backend
+    if prof._sampler is not None:
+        prof._sampler.start()
     return original_backends, original_default
 
 
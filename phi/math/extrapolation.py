@@ -736,14 +736,43 @@ class _MixedExtrapolation(Extrapolation):
         Returns:
 
         """
+        value = value._simplify()
+        if isinstance(value, NativeTensor):
+            result = self._pad_native(value, widths)
+            if result is not NotImplemented:
+                return result
         extrapolations = set(sum(self.ext.values(), ()))
         extrapolations = tuple(sorted(extrapolations, key=lambda e: e.pad_rank))
         for ext in extrapolations:
             ext_widths = {ax: (l if self.ext[ax][0] == ext else 0, u if self.ext[ax][1] == ext else 0)
                           for ax, (l, u) in widths.items()}
-            value = ext.pad(value, ext_widths)
+            if any(l > 0 or u > 0 for l, u in ext_widths.values()):
+                value = ext.pad(value, ext_widths)
         return value
 
+    def _pad_native(self, value: NativeTensor, widths: dict):
+        """ Pads all sides with a single call to `Backend.pad_sides()`. Returns `NotImplemented` if the backend or an extrapolation does not support this. """
+        derivative = get_spatial_derivative_order()
+        modes, constant_values = [], []
+        for dim in value.shape.names:
+            dim_modes, dim_values = [], []
+            for ext in self.ext[dim] if dim in widths else (ZERO, ZERO):
+                if isinstance(ext, ConstantExtrapolation) and ext.value.rank == 0:
+                    dim_modes.append('constant')
+                    dim_values.append(ext.value.native() if derivative == 0 else 0)
+                elif isinstance(ext, _CopyExtrapolation):
+                    dim_modes.append(repr(ext))
+                    dim_values.append(0)
+                else:
+                    return NotImplemented
+            modes.append(dim_modes)
+            constant_values.append(dim_values)
+        backend = choose_backend(value._native)
+        result = backend.pad_sides(value._native, order_by_shape(value.shape, widths, default=(0, 0)), modes, constant_values)
+        if result is NotImplemented:
+            return NotImplemented
+        return NativeTensor(result, value.shape.with_sizes(backend.staticshape(result)))
+
     def pad_values(self, value: Tensor, width: int, dimension: str, upper_edge: bool) -> Tensor:
         extrap: Extrapolation = self.ext[dimension][upper_edge]
         return extrap.pad_values(value, width, dimension, upper_edge)
@@ -9,11 +9,14 @@ Examples:
 """
 import warnings
 
+import numpy as np
+
 from phi import math
-from phi.field import SampledField, ConstantField, Field, PointCloud, extrapolate_valid, Grid, sample, reduce_sample
+from phi.field import SampledField, ConstantField, Field, PointCloud, extrapolate_valid, Grid, CenteredGrid, StaggeredGrid, sample, reduce_sample
 from phi.field._field import FieldType
 from phi.field._field_math import GridType
 from phi.geom import Geometry
+from phi.math import channel
 
 
 def euler(elements: Geometry, velocity: Field, dt: float, v0: math.Tensor = None) -> Geometry:
@@ -93,6 +96,9 @@ def semi_lagrangian(field: GridType,
     to determine the lookup location for each grid point by walking backwards along the velocity vectors.
     The new values are then determined by sampling `field` at these lookup locations.
 
+    If `velocity` is a `StaggeredGrid` with the same resolution and bounds as `field` and `integrator=euler`,
+    the lookup is computed in index space and all components are interpolated directly from their value tensors.
+
     Args:
         field: quantity to be advected, stored on a grid (CenteredGrid or StaggeredGrid)
         velocity: vector field, need not be compatible with with `field`.
@@ -103,11 +109,82 @@ def semi_lagrangian(field: GridType,
         Field with same sample points as `field`
 
     """
+    if integrator is euler and _is_index_space_compatible(field, velocity):
+        return _index_space_semi_lagrangian(field, velocity, dt)
     lookup = integrator(field.elements, velocity, -dt)
     interpolated = reduce_sample(field, lookup)
     return field.with_values(interpolated)
 
 
+def _is_index_space_compatible(field: Field, velocity: Field) -> bool:
+    return isinstance(velocity, StaggeredGrid) and isinstance(field, (CenteredGrid, StaggeredGrid))\
+        and field.resolution == velocity.resolution and field.bounds == velocity.bounds
+
+
+def _sample_origins(grid: Grid) -> list:
+    """
+    Returns the components of `grid` as tuples `(values, extrapolation, origin)`.
+    The sample point `i` of each component lies at `origin + i` in units of cells where cell centers have integer coordinates.
+    """
+    if isinstance(grid, CenteredGrid):
+        return [(grid.values, grid.extrapolation, [0.] * grid.resolution.rank)]
+    components = []
+    for i, dim in enumerate(grid.resolution.names):
+        lower_valid, _ = grid.extrapolation.valid_outer_faces(dim)
+        origin = [(-.5 if lower_valid else .5) if d == dim else 0. for d in grid.resolution.names]
+        components.append((grid.values.vector[i], grid.extrapolation[{'vector': i}], origin))
+    return components
+
+
+def _sample_shifted(values: math.Tensor, extrapolation: math.Extrapolation, offset: list, resolution: math.Shape) -> math.Tensor:
+    """ Linearly interpolates `values` at the points `offset + i` for all indices `i` of `resolution`. """
+    widths = {dim: (max(0, int(np.ceil(-o))), max(0, int(np.ceil(o + size - values.shape.get_size(dim))))) for dim, o, size in zip(resolution.names, offset, resolution.sizes)}
+    if not any(offset) and values.shape.spatial == resolution:
+        return values
+    if any(lo or up for lo, up in widths.values()):
+        values = math.pad(values, widths, extrapolation)
+    start = math.wrap([o + widths[dim][0] for dim, o in zip(resolution.names, offset)], channel('vector'))
+    return math.sample_subgrid(values, start, resolution)
+
+
+def _index_space_velocity(field: GridType, velocity: StaggeredGrid) -> list:
+    """
+    Samples a `StaggeredGrid` with the same resolution and bounds as `field` at the sample points of each component of `field` without creating sample geometries.
+
+    Returns:
+        `list` of tuples `(values, extrapolation, index, velocity)` for each component of `field`
+        where `index` holds the index-space coordinates of the sample points and `velocity` is measured in cells per unit time.
+    """
+    dims = field.resolution.names
+    vector = channel(vector=dims)
+    velocity_components = _sample_origins(velocity)
+    components = []
+    for values, extrapolation, origin in _sample_origins(field):
+        index = math.to_float(math.meshgrid(stack_dim=vector, **{dim: values.shape.get_size(dim) for dim in dims}))
+        v = []
+        for v_values, v_extrapolation, v_origin in velocity_components:
+            offset = [o - v_o for o, v_o in zip(origin, v_origin)]
+            v.append(_sample_shifted(v_values, v_extrapolation, offset, values.shape.spatial))
+        components.append((values, extrapolation, index, math.stack(v, vector) / field.dx))
+    return components
+
+
+def _with_components(field: GridType, components: list) -> GridType:
+    if isinstance(field, CenteredGrid):
+        return field.with_values(components[0])
+    return field.with_values(math.stack(components, channel(vector=field.resolution.names)))
+
+
+def _index_space_semi_lagrangian(field: GridType, velocity: StaggeredGrid, dt) -> GridType:
+    """
+    Semi-Lagrangian advection of a grid by a `StaggeredGrid` with the same resolution and bounds.
+    Backtracing and interpolation are performed directly in index space, one `math.grid_sample()` per component,
+    without creating the intermediate sample geometries.
+    """
+    advected = [math.grid_sample(values, index - v * dt, extrapolation) for values, extrapolation, index, v in _index_space_velocity(field, velocity)]
+    return _with_components(field, advected)
+
+
 def mac_cormack(field: GridType,
                 velocity: Field,
                 dt: float,
@@ -118,6 +195,10 @@ def mac_cormack(field: GridType,
     It then uses that error estimate to correct the field values.
     To avoid overshoots, the resulting value is bounded by the neighbouring grid cells of the backward lookup.
 
+    The bounds are taken from the same interpolation stencil as the backward lookup,
+    using the neighbourhood minima and maxima of `field` instead of gathering all 2^d neighbours for each sample point.
+    As in `semi_lagrangian()`, lookups are performed in index space if `velocity` is a compatible `StaggeredGrid` and `integrator=euler`.
+
     Args:
         field: Field to be advected, one of `(CenteredGrid, StaggeredGrid)`
         velocity: Vector field, need not be sampled at same locations as `field`.
@@ -130,21 +211,55 @@ def mac_cormack(field: GridType,
         Advected field of type `type(field)`
 
     """
-    v0 = sample(velocity, field.elements)
-    points_bwd = integrator(field.elements, velocity, -dt, v0=v0)
-    points_fwd = integrator(field.elements, velocity, dt, v0=v0)
-    # Semi-Lagrangian advection
-    field_semi_la = field.with_values(reduce_sample(field, points_bwd))
-    # Inverse semi-Lagrangian advection
-    field_inv_semi_la = field.with_values(reduce_sample(field_semi_la, points_fwd))
-    # correction
-    new_field = field_semi_la + correction_strength * 0.5 * (field - field_inv_semi_la)
-    # Address overshoots
-    limits = field.closest_values(points_bwd)
-    lower_limit = math.min(limits, [f'closest_{dim}' for dim in field.shape.spatial.names])
-    upper_limit = math.max(limits, [f'closest_{dim}' for dim in field.shape.spatial.names])
-    values_clamped = math.clip(new_field.values, lower_limit, upper_limit)
-    return new_field.with_values(values_clamped)
+    if integrator is euler and _is_index_space_compatible(field, velocity):
+        with math.fuse():
+            lookups = [(values, extrapolation, index - v * dt, index + v * dt) for values, extrapolation, index, v in _index_space_velocity(field, velocity)]
+    else:
+        v0 = sample(velocity, field.elements)
+        points_bwd = integrator(field.elements, velocity, -dt, v0=v0)
+        points_fwd = integrator(field.elements, velocity, dt, v0=v0)
+        lookups = [(values, extrapolation, _global_to_index(field, bwd, origin), _global_to_index(field, fwd, origin))
+                   for (values, extrapolation, origin), bwd, fwd in zip(_sample_origins(field), _unstack_staggered(points_bwd.center), _unstack_staggered(points_fwd.center))]
+    advected = []
+    for values, extrapolation, lookup_bwd, lookup_fwd in lookups:
+        # Semi-Lagrangian advection
+        semi_la = math.grid_sample(values, lookup_bwd, extrapolation)
+        # Inverse semi-Lagrangian advection
+        inv_semi_la = math.grid_sample(semi_la, lookup_fwd, extrapolation)
+        # correction
+        with math.fuse():
+            corrected = semi_la + correction_strength * 0.5 * (values - inv_semi_la)
+        # Address overshoots
+        lower_limit, upper_limit = _stencil_limits(values, lookup_bwd, extrapolation)
+        advected.append(math.clip(corrected, lower_limit, upper_limit))
+    return _with_components(field, advected)
+
+
+def _unstack_staggered(location: math.Tensor) -> tuple:
+    return location.staggered_direction.unstack() if 'staggered_direction' in location.shape else (location,)
+
+
+def _global_to_index(grid: Grid, location: math.Tensor, origin: list) -> math.Tensor:
+    """ Converts physical locations to the index space of the grid component whose sample points lie at `origin + i`, see `_sample_origins()`. """
+    return (location - grid.bounds.lower) / grid.dx - 0.5 - math.wrap(origin, channel(vector=grid.resolution.names))
+
+
+def _stencil_limits(values: math.Tensor, coordinates: math.Tensor, extrapolation: math.Extrapolation) -> tuple:
+    """
+    Computes the minimum and maximum of the 2^d grid values that are combined when linearly interpolating `values` at `coordinates`.
+
+    Instead of gathering all neighbours for each sample point, the extrema of each 2^d neighbourhood are computed once on the grid
+    and looked up at the lower neighbour of each sample point.
+    """
+    dims = values.shape.spatial.names
+    widths = {dim: (0, 1) if extrapolation[dim, 0] == math.extrapolation.PERIODIC else (1, 1) for dim in dims}
+    lower = upper = math.pad(values, widths, extrapolation)
+    for dim in dims:
+        lower = math.minimum(lower[{dim: slice(0, -1)}], lower[{dim: slice(1, None)}])
+        upper = math.maximum(upper[{dim: slice(0, -1)}], upper[{dim: slice(1, None)}])
+    cell = math.floor(coordinates) + math.wrap([widths[dim][0] for dim in dims], channel('vector'))
+    limits = math.grid_sample(math.stack([lower, upper], channel('_limits')), cell, extrapolation)
+    return math.unstack(limits, '_limits')
 
 
 def runge_kutta_4(cloud: SampledField, velocity: Field, dt: float, accessible: Field = None, occupied: Field = None):
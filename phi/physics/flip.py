@@ -31,7 +31,7 @@ def make_incompressible(velocity: StaggeredGrid,
       divergence: divergence field of input velocity, `CenteredGrid`
       occupation_mask: StaggeredGrid
     """
-    points = particles.with_values(math.tensor(1., convert=True))
+    points = particles.with_values(math.tensor(1., convert=True)).with_kernel('nearest')  # occupancy is binary per cell
     occupied_centered = points @ domain.scalar_grid()
     occupied_staggered = points @ domain.staggered_grid()
 
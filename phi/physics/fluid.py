@@ -1,14 +1,16 @@
 """
 Definition of Fluid, IncompressibleFlow as well as fluid-related functions.
 """
-from typing import Tuple
+import threading
+from typing import Tuple, Callable, List, Any
 
 from phi import math, field
 from phi.field import SoftGeometryMask, AngularVelocity, Grid, divergence, spatial_gradient, where, HardGeometryMask, CenteredGrid
 from phi.geom import union
 from ..field._grid import GridType
 from ..math import extrapolation
-from ..math._tensors import copy_with
+from ..math.backend import NoBackendFound
+from ..math._tensors import copy_with, disassemble_tree
 from ..math.extrapolation import combine_sides
 
 
@@ -31,10 +33,8 @@ def make_incompressible(velocity: GridType,
     """
     assert isinstance(obstacles, (tuple, list)), f"obstacles must be a tuple or list but got {type(obstacles)}"
     input_velocity = velocity
-    accessible_extrapolation = _accessible_extrapolation(input_velocity.extrapolation)
-    active = CenteredGrid(HardGeometryMask(~union(*[obstacle.geometry for obstacle in obstacles])), resolution=velocity.resolution, bounds=velocity.bounds, extrapolation=extrapolation.NONE)
-    accessible = active.with_extrapolation(accessible_extrapolation)
-    hard_bcs = field.stagger(accessible, math.minimum, input_velocity.extrapolation, type=type(velocity))
+    geometries = tuple(obstacle.geometry for obstacle in obstacles)
+    active, hard_bcs = _cached_mask(('hard', geometries), velocity, lambda: _hard_masks(velocity, geometries))
     velocity = apply_boundary_conditions(velocity, obstacles)
     div = divergence(velocity) * active
     if not input_velocity.extrapolation.connects_to_outside:
@@ -58,6 +58,13 @@ def masked_laplace(pressure: CenteredGrid, hard_bcs: Grid, active: CenteredGrid)
     return lap
 
 
+def _hard_masks(velocity: Grid, geometries: tuple) -> Tuple[CenteredGrid, Grid]:
+    active = CenteredGrid(HardGeometryMask(~union(*geometries)), resolution=velocity.resolution, bounds=velocity.bounds, extrapolation=extrapolation.NONE)
+    accessible = active.with_extrapolation(_accessible_extrapolation(velocity.extrapolation))
+    hard_bcs = field.stagger(accessible, math.minimum, velocity.extrapolation, type=type(velocity))
+    return active, hard_bcs
+
+
 def _balance_divergence(div, active):
     return div - active * (field.mean(div) / field.mean(active))
 
@@ -77,7 +84,7 @@ def apply_boundary_conditions(velocity: Grid, obstacles: tuple or list):
     """
     # velocity = field.bake_extrapolation(velocity)  # TODO we should bake only for divergence but keep correct extrapolation for velocity. However, obstacles should override extrapolation.
     for obstacle in obstacles:
-        obs_mask = SoftGeometryMask(obstacle.geometry, balance=1) @ velocity
+        obs_mask = _cached_mask(('soft', obstacle.geometry, 1), velocity, lambda: SoftGeometryMask(obstacle.geometry, balance=1) @ velocity)
         if obstacle.is_stationary:
             velocity = (1 - obs_mask) * velocity
         else:
@@ -86,6 +93,50 @@ def apply_boundary_conditions(velocity: Grid, obstacles: tuple or list):
     return velocity
 
 
+_MASK_CACHE: List[Tuple[tuple, Any]] = []  # (key, masks), most recently used last
+_MASK_CACHE_SIZE = 16
+_MASK_CACHE_LOCK = threading.Lock()  # make_incompressible() may be called from multiple threads
+
+
+def _cached_mask(geometry_key: tuple, grid: Grid, rasterize: Callable):
+    """
+    Returns the masks created by `rasterize()`, reusing the result of a previous call with equal geometries and grid.
+
+    The cache is keyed on the geometries, the sample points and extrapolation of `grid` and the backend.
+    Moving an obstacle changes its geometry and thereby invalidates the cached masks.
+    Masks are not cached while tracing or if the geometries are not `TensorLike`.
+
+    Args:
+        geometry_key: Hashable `tuple` holding the geometries and rasterization parameters, compared using `==`.
+        grid: Grid on which the masks are sampled.
+        rasterize: Function computing the masks.
+    """
+    try:
+        _, geometry_tensors = disassemble_tree(geometry_key)
+    except NoBackendFound:  # geometry holds tensors that cannot be listed, e.g. RotatedGeometry
+        return rasterize()
+    if not math.all_available(*geometry_tensors, grid.values):  # jit tracing
+        return rasterize()
+    key = (geometry_key, type(grid), grid.resolution, grid.bounds, grid.extrapolation, grid.values.default_backend)
+    with _MASK_CACHE_LOCK:
+        for i, (cached_key, masks) in enumerate(_MASK_CACHE):
+            if _keys_equal(cached_key, key):
+                _MASK_CACHE.append(_MASK_CACHE.pop(i))
+                return masks
+    masks = rasterize()  # outside the lock so that threads rasterize different geometries in parallel
+    with _MASK_CACHE_LOCK:
+        _MASK_CACHE.append((key, masks))
+        if len(_MASK_CACHE) > _MASK_CACHE_SIZE:
+            _MASK_CACHE.pop(0)
+    return masks
+
+
+def _keys_equal(key1, key2) -> bool:
+    if isinstance(key1, tuple) and isinstance(key2, tuple):
+        return len(key1) == len(key2) and all(_keys_equal(k1, k2) for k1, k2 in zip(key1, key2))
+    return type(key1) == type(key2) and bool(key1 == key2)
+
+
 def _pressure_extrapolation(vext: math.Extrapolation):
     if vext == extrapolation.PERIODIC:
         return extrapolation.PERIODIC
@@ -39,6 +39,15 @@ class TFBackend(Backend):
                                              ref=tf.device(device.name)))
         return devices
 
+    def get_memory_usage(self, device: ComputeDevice = None) -> int or None:
+        device = device or self.get_default_device()
+        if device.device_type != 'GPU':
+            return None
+        try:
+            return tf.config.experimental.get_memory_info(device.name.replace('/device:', ''))['current']
+        except (AttributeError, ValueError):  # not supported by this TensorFlow version
+            return None
+
     def _device_for(self, *values):
         devices = set(v.device for v in values if hasattr(v, 'device'))
         if len(devices) == 0:
@@ -447,6 +456,12 @@ class TFBackend(Backend):
                 result.append(scatter(b_grid, b_indices, b_values))
             return self.stack(result, axis=0)
 
+    def bincount(self, x, weights, bins: int):
+        with self._device_for(x, weights):
+            if weights is None:
+                return tf.math.bincount(x, minlength=bins, maxlength=bins)
+            return tf.math.unsorted_segment_sum(weights, x, bins)
+
     def fft(self, x, axes: tuple or list):
         if not axes:
             return x
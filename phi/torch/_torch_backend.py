@@ -41,6 +41,12 @@ class TorchBackend(Backend):
                                              ref=f'cuda:{index}'))
         return devices
 
+    def get_memory_usage(self, device: ComputeDevice = None) -> int or None:
+        device = device or self.get_default_device()
+        if device.device_type == 'GPU':
+            return torch.cuda.memory_allocated(device.ref)
+        return None
+
     def is_module(self, obj):
         return isinstance(obj, (JITFunction, torch.nn.Module))
 
@@ -529,6 +535,13 @@ class TorchBackend(Backend):
         result = scatter(base_grid_flat, dim=1, index=indices, src=values)
         return torch.reshape(result, base_grid.shape)
 
+    def bincount(self, x, weights, bins: int):
+        x = self.as_tensor(x).long()
+        if weights is None:
+            return torch.bincount(x, minlength=bins)
+        weights = self.as_tensor(weights)
+        return torch.zeros(bins, dtype=weights.dtype, device=weights.device).index_add_(0, x, weights)  # differentiable w.r.t. weights
+
     def fft(self, x, axes: tuple or list):
         if not x.is_complex():
             x = self.to_complex(x)
@@ -603,10 +616,10 @@ class TorchBackend(Backend):
         idx = self.unstack(idx, axis=0)
         return idx, tensor._values()
 
-    def conjugate_gradient(self, lin, y, x0, rtol, atol, max_iter, trj: bool) -> SolveResult or List[SolveResult]:
-        if callable(lin) or trj:
+    def conjugate_gradient(self, lin, y, x0, rtol, atol, max_iter, trj: bool, preconditioner=None) -> SolveResult or List[SolveResult]:
+        if callable(lin) or trj or preconditioner is not None:
             assert self.is_available(y), "Tracing conjugate_gradient with linear operator is not yet supported."
-            return Backend.conjugate_gradient(self, lin, y, x0, rtol, atol, max_iter, trj)
+            return Backend.conjugate_gradient(self, lin, y, x0, rtol, atol, max_iter, trj, preconditioner)
         assert isinstance(lin, torch.Tensor) and lin.is_sparse, "Batched matrices are not yet supported"
         y = self.to_float(y)
         x0 = self.copy(self.to_float(x0))
@@ -8,10 +8,17 @@ Use `plot()` to plot fields using Matplotlib.
 See the user interface documentation at https://tum-pbs.github.io/PhiFlow/Visualization.html
 """
 from ._viewer import Viewer
-from ._matplotlib import plot_scalars
 from ._vis import view, control, show, action, plot, overlay, write_image, write_image as savefig
 
-__all__ = [key for key in globals().keys() if not key.startswith('_')]
+__all__ = [key for key in globals().keys() if not key.startswith('_')] + ['plot_scalars']
+
+
+def __getattr__(name: str):
+    # Matplotlib is only imported when first needed since importing it takes longer than importing the rest of PhiFlow.
+    if name == 'plot_scalars':
+        from ._matplotlib import plot_scalars
+        return plot_scalars
+    raise AttributeError(f"module '{__name__}' has no attribute '{name}'")
 
 __pdoc__ = {
     'Viewer.actions': False,
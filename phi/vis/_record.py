@@ -0,0 +1,284 @@
+import bisect
+import os
+import shutil
+import tempfile
+import warnings
+import weakref
+from collections import deque
+
+import numpy as np
+
+from .. import field, math
+from ..math import batch, Tensor, Shape, EMPTY_SHAPE
+from ..math._tensors import disassemble_tree, assemble_tree
+
+
+class Record:
+    """
+    Recorded values of all variables viewed by a `Viewer` during `Viewer.range()`.
+
+    By default, all frames are kept in memory.
+    If `memory_frames` is set, only the most recent frames are kept in memory and older frames are written to disk in chunks of `chunk_size` frames.
+
+    Recorded values can be accessed lazily through `Record.view()` which only loads the requested frames,
+    or stacked along `dim` as `Record.<name>` or `Record['<name>']`.
+    """
+
+    def __init__(self, dim: str or None, memory_frames: int = None, directory: str = None, chunk_size: int = 16):
+        """
+        Args:
+            dim: Name of the batch dimension along which frames are stacked.
+            memory_frames: Number of most recent frames to keep in memory. `None` to keep all frames in memory.
+            directory: Directory to write older frames to. If `None`, a temporary directory is created and deleted together with this `Record`.
+            chunk_size: Number of frames written to disk together.
+        """
+        self.dim = dim
+        self.memory_frames = memory_frames
+        self.chunk_size = chunk_size
+        if memory_frames is not None and directory is None:
+            directory = tempfile.mkdtemp(prefix='phi-record-')
+            weakref.finalize(self, shutil.rmtree, directory, ignore_errors=True)
+        self.directory = directory
+        self.history = {}  # name -> _FrameStore
+
+    def append(self, variables: dict, warn_missing=True):
+        if not self.history:
+            self.history = {name: _FrameStore(self._store_path(name), self.memory_frames, self.chunk_size) for name in variables.keys()}
+        for name, val in variables.items():
+            if val is None and warn_missing:
+                warnings.warn(f"None value encountered for variable '{name}' at frame {len(self.history[name])}. This value will not show up in the recording.", RuntimeWarning)
+            self.history[name].append(val)
+
+    def _store_path(self, name: str):
+        if self.directory is None:
+            return None
+        path = os.path.join(self.directory, name)
+        os.makedirs(path, exist_ok=True)
+        return path
+
+    @property
+    def recorded_fields(self):
+        return tuple(self.history.keys())
+
+    def get_snapshot(self, name: str, frame: int):
+        return self.history[name][frame]
+
+    def recording_size(self, name: str):
+        return len(self.history[name])
+
+    def view(self, name: str) -> 'RecordView':
+        """
+        Returns a lazy view of the frames recorded for `name`.
+        Frames are only loaded from memory or disk when selected.
+        """
+        assert name in self.history, f"No recording available for '{name}'. The following fields were recorded: {self.recorded_fields}"
+        return RecordView(self.history[name], self.dim)
+
+    def __getattr__(self, item: str):
+        if item.startswith('__') or item == 'history':  # not a recorded variable, e.g. during unpickling
+            raise AttributeError(item)
+        return self.view(item).stack()
+
+    def __getitem__(self, item):
+        assert isinstance(item, str)
+        return self.__getattr__(item)
+
+    def __repr__(self):
+        return ", ".join([f"{name} ({len(values)})" for name, values in self.history.items()])
+
+
+class RecordView:
+    """
+    Lazy view of the frames recorded for one variable.
+
+    Frames recorded as `None` are skipped, i.e. the view numbers only the frames holding a value, like `Record.<name>` does.
+    Select frames using `int` or `slice` indices or a `dict` containing the record dimension, e.g. `view[{'frames': slice(100, 200)}]`.
+    Only the selected frames are loaded and stacked.
+    """
+
+    def __init__(self, store: '_FrameStore', dim: str):
+        self._store = store
+        self._dim = dim
+
+    def __len__(self):
+        return len(self._store.present)
+
+    def __getitem__(self, item):
+        if isinstance(item, dict):
+            selection = item.get(self._dim, None)
+            item = {dim: sel for dim, sel in item.items() if dim != self._dim}
+        else:
+            selection, item = item, {}
+        if isinstance(selection, int):
+            value = self._store[self._store.present[selection]]
+        else:
+            value = self.stack(selection)
+        if item and isinstance(value, (field.SampledField, Tensor)):
+            value = value[item]
+        return value
+
+    @property
+    def shape(self) -> Shape:
+        """
+        Shape of the stacked frames, determined from the most recent frame without loading the others.
+        """
+        value = self._store[self._store.present[-1]] if self._store.present else None
+        if isinstance(value, (field.SampledField, Tensor)):
+            return batch(**{self._dim: len(self)}) & value.shape
+        return EMPTY_SHAPE
+
+    def stack(self, frames: slice = None):
+        """
+        Loads the frames in the range `frames` and stacks them along the record dimension.
+
+        Args:
+            frames: Range of frames to load. `None` to load all frames.
+
+        Returns:
+            Stacked `SampledField` or `None` if no value was recorded in the range.
+        """
+        indices = self._store.present[frames if frames is not None else slice(None)]
+        snapshots = self._store.load(indices)
+        if snapshots:
+            return field.stack(snapshots, batch(self._dim))
+        else:
+            return None
+
+    def __repr__(self):
+        return f"{len(self)} frames along '{self._dim}'"
+
+
+class _FrameStore:
+    """
+    Frames of one recorded variable.
+    At most `memory_frames` recent frames are kept in memory, older frames are written to disk in chunks.
+    Each chunk stores one `.npy` file per array of the frames, stacked along the first axis, and is read using memory mapping.
+    Frames that cannot be written to disk, such as `None` or values not made up of tensors, stay in memory.
+    """
+
+    def __init__(self, path: str or None, memory_frames: int or None, chunk_size: int):
+        self.path = path
+        self.memory_frames = memory_frames
+        self.chunk_size = chunk_size
+        self.chunks = []  # _Chunk, consecutive starting from frame 0
+        self.chunk_starts = []
+        self.pending = []  # (signature, payload) of frames to be written with the next chunk
+        self.recent = deque()  # most recent frames
+        self.spilled = 0  # number of frames in chunks
+        self.present = []  # indices of frames not recorded as None
+
+    def __len__(self):
+        return self.spilled + len(self.pending) + len(self.recent)
+
+    def append(self, value):
+        if value is not None:
+            self.present.append(len(self))
+        self.recent.append(value)
+        if self.memory_frames is not None and len(self.recent) > self.memory_frames:
+            signature, payload = _disassemble_frame(self.recent.popleft())
+            if self.pending and signature != self.pending[0][0]:
+                self._write_chunk()  # frames of one chunk must consist of arrays with matching shapes
+            self.pending.append((signature, payload))
+            if len(self.pending) >= self.chunk_size:
+                self._write_chunk()
+
+    def _write_chunk(self):
+        self.chunk_starts.append(self.spilled)
+        self.chunks.append(_Chunk.write(os.path.join(self.path, f"{len(self.chunks):06d}"), self.pending))
+        self.spilled += len(self.pending)
+        self.pending = []
+
+    def __getitem__(self, frame: int):
+        return self.load([range(len(self))[frame]])[0]
+
+    def load(self, frames) -> list:
+        """ Loads the given frames. Consecutive frames from the same chunk are read together. """
+        result = []
+        for frame in frames:
+            if frame < self.spilled:
+                chunk = bisect.bisect_right(self.chunk_starts, frame) - 1
+                if result and isinstance(result[-1], tuple) and result[-1][0] == chunk:
+                    result[-1][1].append(frame - self.chunk_starts[chunk])
+                else:
+                    result.append((chunk, [frame - self.chunk_starts[chunk]]))
+            elif frame < self.spilled + len(self.pending):
+                result.append([_assemble_frame(*self.pending[frame - self.spilled])])
+            else:
+                result.append([self.recent[frame - self.spilled - len(self.pending)]])
+        return [value for item in result for value in (self.chunks[item[0]].read(item[1]) if isinstance(item, tuple) else item)]
+
+
+class _Chunk:
+
+    def __init__(self, signature, payloads: list, files: list):
+        self.signature = signature
+        self.payloads = payloads  # templates if written to disk, else the frame values
+        self.files = files
+        self.size = len(payloads)
+
+    @staticmethod
+    def write(path: str, frames: list) -> '_Chunk':
+        signature = frames[0][0]
+        if signature is None:
+            return _Chunk(None, [value for _, value in frames], [])
+        files = []
+        for i in range(len(signature[1])):
+            file = f"{path}_{i}.npy"
+            np.save(file, np.stack([arrays[i] for _, (_, arrays) in frames]))
+            files.append(file)
+        return _Chunk(signature, [template for _, (template, _) in frames], files)
+
+    def read(self, indices: list) -> list:
+        if self.signature is None:
+            return [self.payloads[i] for i in indices]
+        stored = [np.load(file, mmap_mode='r') for file in self.files]
+        return [_assemble_frame(self.signature, (self.payloads[i], [np.array(array[i]) for array in stored])) for i in indices]
+
+
+def _disassemble_frame(value):
+    """
+    Splits a recorded value into a template without tensors and a list of NumPy arrays.
+
+    Returns:
+        signature: Recipes to rebuild the tensors from the arrays plus the array shapes and data types. `None` if `value` cannot be written to disk.
+        payload: `(template, arrays)` or `value` if `signature` is `None`.
+    """
+    if value is None:
+        return None, None
+    try:
+        template, tensors = disassemble_tree(value)
+        recipes, arrays = [], []
+        for t in tensors:
+            recipe, tensor_arrays = _disassemble_tensor(t)
+            recipes.append(recipe)
+            arrays.extend(tensor_arrays)
+    except (ValueError, NotImplementedError, AssertionError):
+        return None, value
+    return (tuple(recipes), tuple((a.shape, a.dtype) for a in arrays)), (template, arrays)
+
+
+def _disassemble_tensor(t: Tensor):
+    if t.shape.is_uniform:
+        return t.shape, [t.numpy(t.shape)]
+    dim = t.shape.shape.without('dims').names[0]  # dimension along which the sizes vary
+    recipes, arrays = [], []
+    for part in t.unstack(dim):
+        recipe, part_arrays = _disassemble_tensor(part)
+        recipes.append(recipe)
+        arrays.extend(part_arrays)
+    return (t.shape.only(dim), tuple(recipes)), arrays
+
+
+def _assemble_frame(signature, payload):
+    if signature is None:
+        return payload
+    template, arrays = payload
+    arrays = list(arrays)
+    return assemble_tree(template, [_assemble_tensor(recipe, arrays) for recipe in signature[0]])
+
+
+def _assemble_tensor(recipe, arrays: list) -> Tensor:
+    if isinstance(recipe, math.Shape):
+        return math.tensor(arrays.pop(0), recipe)
+    dim, recipes = recipe
+    return math.stack([_assemble_tensor(r, arrays) for r in recipes], dim)
@@ -1,17 +1,16 @@
 import itertools
 import sys
 import time
-import warnings
 from functools import partial
 from threading import Event
 from typing import Tuple
 
 from ._log import SceneLog
+from ._record import Record
 from ._user_namespace import UserNamespace
 from ._vis_base import VisModel, Control, Action
-from .. import field
 from ..field import Scene, SampledField
-from ..math import batch, Tensor
+from ..math import Tensor, Shape
 from ..math.backend import PHI_LOGGER
 
 
@@ -101,15 +100,19 @@ class Viewer(VisModel):
         if name not in self.initial_field_values:
             raise KeyError(name)
         if self._rec:
-            value = self._rec[name]
-        else:
-            value = self.namespace.get_variable(name)
+            return self._rec.view(name)[dim_selection]  # only loads the selected frames
+        value = self.namespace.get_variable(name)
         if callable(value):
             value = value()
         if isinstance(value, (SampledField, Tensor)):
             value = value[dim_selection]
         return value
 
+    def get_field_shape(self, name: str) -> Shape:
+        if self._rec and name in self.initial_field_values:
+            return self._rec.view(name).shape  # avoids loading all frames
+        return VisModel.get_field_shape(self, name)
+
     @property
     def curve_names(self) -> tuple:
         return self._log.scalar_curve_names
@@ -138,7 +141,7 @@ class Viewer(VisModel):
                 return
         raise KeyError(name)
 
-    def range(self, *args, warmup=0, **rec_dim):
+    def range(self, *args, warmup=0, rec_memory_frames: int = None, rec_directory: str = None, **rec_dim):
         """
         Similarly to `range()`, returns a generator that can be used in a `for` loop.
 
@@ -161,6 +164,11 @@ class Viewer(VisModel):
             **rec_dim: Can be used instead of `*args` to record values along a new batch dimension of this name.
                 The recorded values can be accessed as `Viewer.rec.<name>` or `Viewer.rec['<name>']`.
             warmup: Number of uncounted loop iterations to perform before `step()` is invoked for the first time.
+            rec_memory_frames: Only used when recording. Maximum number of recent frames to keep in memory.
+                Older frames are written to disk and only loaded when accessed, see `Record`.
+                If `None`, all frames are kept in memory.
+            rec_directory: Only used when recording with `rec_memory_frames`. Directory to write older frames to.
+                If `None`, a temporary directory is used which is deleted once the recording is no longer referenced.
 
         Yields:
             Step count of `Viewer`.
@@ -177,7 +185,7 @@ class Viewer(VisModel):
             rec_dim_name = next(iter(rec_dim.keys()))
             size = rec_dim[rec_dim_name]
             assert isinstance(size, int)
-            self._rec = Record(rec_dim_name)
+            self._rec = Record(rec_dim_name, memory_frames=rec_memory_frames, directory=rec_directory)
             self._rec.append(self.initial_field_values, warn_missing=False)
             args = [size]
             self.growing_dims = [rec_dim_name]
@@ -276,42 +284,3 @@ class AsyncViewer(Viewer):
     def can_progress(self) -> bool:
         return True
 
-
-class Record:
-
-    def __init__(self, dim: str or None):
-        self.dim = dim
-        self.history = {}
-
-    def append(self, variables: dict, warn_missing=True):
-        if not self.history:
-            self.history = {name: [] for name in variables.keys()}
-        for name, val in variables.items():
-            self.history[name].append(val)
-            if val is None and warn_missing:
-                warnings.warn(f"None value encountered for variable '{name}' at step {self.viewer.steps}. This value will not show up in the recording.", RuntimeWarning)
-
-    @property
-    def recorded_fields(self):
-        return tuple(self.history.keys())
-
-    def get_snapshot(self, name: str, frame: int):
-        return self.history[name][frame]
-
-    def recording_size(self, name: str):
-        return len(self.history[name])
-
-    def __getattr__(self, item: str):
-        assert item in self.history, f"No recording available for '{item}'. The following fields were recorded: {self.recorded_fields}"
-        snapshots = [v for v in self.history[item] if v is not None]
-        if snapshots:
-            return field.stack(snapshots, batch(self.dim))
-        else:
-            return None
-
-    def __getitem__(self, item):
-        assert isinstance(item, str)
-        return self.__getattr__(item)
-
-    def __repr__(self):
-        return ", ".join([f"{name} ({len(values)})" for name, values in self.history.items()])
@@ -131,6 +131,7 @@ setup(
     version=version,
     download_url='https://github.com/tum-pbs/PhiFlow/archive/%s.tar.gz' % version,
     packages=['phi',
+              'phi.benchmarks',
               'phi.field',
               'phi.geom',
               'phi.jax',
@@ -0,0 +1,41 @@
+import os
+import tempfile
+from unittest import TestCase
+
+from phi import benchmarks
+from phi.math.backend import NUMPY
+
+
+class TestBenchmarks(TestCase):
+
+    def test_run_all_scenarios(self):
+        results = benchmarks.run(resolutions=[8], batch_sizes=[1], backends=['numpy'], steps=1, warmup=0)
+        self.assertEqual(list(benchmarks.SCENARIOS), [r['scenario'] for r in results])
+        for result in results:
+            self.assertEqual('NumPy', result['backend'])
+            self.assertGreater(result['steps_per_second'], 0)
+        self.assertGreater([r for r in results if r['scenario'] == 'diffusion_implicit'][0]['solver_iterations'], 0)
+        self.assertIsNone([r for r in results if r['scenario'] == 'diffusion_fourier'][0]['solver_iterations'])
+
+    def test_skip_unsupported_batch_size(self):
+        self.assertEqual([], benchmarks.run(['flip_liquid'], resolutions=[8], batch_sizes=[2], backends=['numpy']))
+        self.assertEqual(2, benchmarks.run(['diffusion_fourier'], resolutions=[8], batch_sizes=[2], backends=['numpy'], steps=1)[0]['batch_size'])
+
+    def test_save_load_compare(self):
+        baseline = [benchmarks.run_scenario(benchmarks.SCENARIOS['diffusion_fourier'], 8, 1, NUMPY, steps=1, warmup=0)]
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'benchmark.json')
+            benchmarks.save(baseline, path)
+            loaded = benchmarks.load(path)
+        self.assertEqual(baseline, loaded)
+        self.assertEqual([], benchmarks.compare(baseline, loaded))
+        slower = [dict(loaded[0], steps_per_second=loaded[0]['steps_per_second'] / 2, peak_memory=loaded[0]['peak_memory'] * 2 + 1)]
+        self.assertEqual(2, len(benchmarks.compare(baseline, slower)))
+
+    def test_run_import(self):
+        # Matplotlib and scipy.signal must only be imported when used, run_import() raises an error if the statement fails
+        result = benchmarks.run_import("import sys; from phi.flow import *; assert 'matplotlib' not in sys.modules and 'scipy.signal' not in sys.modules", repeat=1)
+        self.assertGreater(result['import_seconds'], 0)
+        self.assertIn('phi.flow', result['modules'])
+        self.assertEqual([], benchmarks.compare([result], [result]))
+        self.assertEqual(1, len(benchmarks.compare([result], [dict(result, import_seconds=result['import_seconds'] * 2)])))
@@ -147,6 +147,13 @@ class TestFieldMath(TestCase):
             self.assertEqual(converted.elements.center.default_backend, backend)
             self.assertEqual(converted.elements.radius.default_backend, backend)
 
+    def test_point_cloud_kernel(self):
+        loc = math.random_uniform(instance(points=20), channel(vector='x,y')) * 6 + 1
+        points = PointCloud(loc, math.random_uniform(instance(points=20)), add_overlapping=True)
+        for kernel in ['nearest', 'linear', 'quadratic']:
+            grid = points.with_kernel(kernel) @ CenteredGrid(0, x=8, y=8)
+            math.assert_close(math.sum(grid.values), math.sum(points.values), msg=kernel)
+
     def test_center_of_mass(self):
         density = CenteredGrid(HardGeometryMask(Box[0:1, 1:2]), x=4, y=3)
         math.assert_close(field.center_of_mass(density), (0.5, 1.5))
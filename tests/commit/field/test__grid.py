@@ -102,3 +102,10 @@ class GridTest(TestCase):
         self.assertEqual(2, len(slices))
         self.assertFalse(slices[0].shape.non_spatial)
         self.assertEqual(('x', 'y'), slices[0].bounds.size.vector.item_names)
+
+    def test_soft_geometry_mask_exact(self):
+        mask = field.SoftGeometryMask(Sphere(x=5, y=5, radius=2.3), method='exact')
+        grid = CenteredGrid(mask, x=10, y=10, bounds=Box(x=10, y=10))
+        math.assert_close(field.mean(grid) * 100, math.PI * 2.3 ** 2)
+        grid = StaggeredGrid(mask, x=10, y=10, bounds=Box(x=10, y=10))
+        math.assert_close(math.sum(grid.values.vector['x']), math.PI * 2.3 ** 2)
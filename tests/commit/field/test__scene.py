@@ -2,6 +2,8 @@ from unittest import TestCase
 
 from os.path import dirname, abspath, join, basename
 
+import numpy as np
+
 from phi import math
 from phi import field
 from phi.field import Scene, CenteredGrid, StaggeredGrid
@@ -84,6 +86,35 @@ class TestScene(TestCase):
         field.assert_close(vel, vel__)
         scene.remove()
 
+    def test_write_read_memmap(self):
+        smoke = CenteredGrid(1, extrapolation.BOUNDARY, x=32, y=32)
+        vel = StaggeredGrid(2, 0, x=32, y=32)
+        scene = Scene.create(DIR, storage='memmap')
+        self.assertEqual('memmap', Scene.at(scene.path).storage)
+        for frame in range(3):
+            scene.write(smoke=smoke * frame, vel=vel * frame, frame=frame)
+        self.assertEqual((0, 1, 2), scene.frames)
+        self.assertEqual(('smoke', 'vel'), scene.fieldnames)
+        smoke_, vel_ = scene.read('smoke', 'vel', frame=2)
+        field.assert_close(smoke * 2, smoke_)
+        field.assert_close(vel * 2, vel_)
+        self.assertEqual(vel.extrapolation, vel_.extrapolation)
+        scene.write(smoke=smoke * 5, frame=1)  # overwrite
+        smoke_ = scene.read('smoke', frame=1, convert_to_backend=False)
+        self.assertIsInstance(smoke_.values.native('x,y'), np.memmap)
+        field.assert_close(smoke * 5, smoke_)
+        math.assert_close(5, smoke_.x[10:20].values)
+        with self.assertRaises(ValueError):
+            scene.write(smoke=CenteredGrid(1, x=16, y=16), frame=3)
+        scene.remove()
+
+    def test_write_read_memmap_batch(self):
+        smoke = CenteredGrid(1, extrapolation.BOUNDARY, x=32, y=32) * math.random_uniform(batch(count=2))
+        scene = Scene.create(DIR, count=2, storage='memmap')
+        scene.write(smoke=smoke, frame=4)
+        field.assert_close(smoke, scene.read('smoke', frame=4))
+        scene.remove()
+
     def test_write_read_batch_matching(self):
         smoke = CenteredGrid(1, extrapolation.BOUNDARY, x=32, y=32) * math.random_uniform(batch(count=2))
         vel = StaggeredGrid(2, 0, x=32, y=32) * math.random_uniform(batch(count=2))
@@ -95,3 +95,24 @@ class TestGeom(TestCase):
         self.assertEqual(2, ab.spatial_rank)
         math.assert_close(ab.size, (4, 3))
         math.assert_close(ab.lower, (0, 1))
+
+    def test_accelerate_union(self):
+        center = math.random_uniform(math.instance(union=200), channel(vector='x,y')) * 10
+        spheres = geom.union(*Sphere(center, radius=math.random_uniform(math.instance(union=200)) * 0.5 + 0.1).unstack('union'))
+        indexed = geom.accelerate(spheres)
+        loc = math.random_uniform(spatial(x=20, y=20), channel(vector='x,y')) * 12 - 1
+        math.assert_close(spheres.lies_inside(loc), indexed.lies_inside(loc))
+        max_distance = indexed._index.max_distance
+        math.assert_close(math.minimum(spheres.approximate_signed_distance(loc), max_distance), indexed.approximate_signed_distance(loc), abs_tolerance=1e-5)
+        mixed = geom.accelerate(spheres + Box(x=(0, 1), y=(0, 1)))
+        math.assert_close((spheres + Box(x=(0, 1), y=(0, 1))).lies_inside(loc), mixed.lies_inside(loc))
+
+    def test_coverage(self):
+        cells = geom.GridCell(spatial(x=16, y=16), Box(x=4, y=4))
+        box = Box(x=(0.3, 2.7), y=(1.1, 3.05))
+        math.assert_close(math.sum(geom.coverage(box, cells)) * 0.25 ** 2, 2.4 * 1.95)
+        math.assert_close(math.sum(geom.coverage(Sphere(x=2.1, y=1.9, radius=1.3), cells)) * 0.25 ** 2, math.PI * 1.3 ** 2)
+        rotated = geom.coverage(box.rotated(0.4), cells, samples=8)
+        self.assertLess(abs(float(math.sum(rotated)) * 0.25 ** 2 - 2.4 * 1.95), 0.05)
+        math.assert_close(0 <= rotated, True)
+        math.assert_close(rotated <= 1, True)
@@ -1,6 +1,7 @@
+import time
 from unittest import TestCase
 
-from phi import math
+from phi import math, field
 from phi.math.backend import profile
 
 
@@ -10,3 +11,62 @@ class TestProfile(TestCase):
         with profile() as prof:
             math.ones() + math.ones()
         prof.print(min_duration=0)
+
+    def test_profile_statistics(self):
+        def f():
+            return math.ones(math.spatial(x=4)) * 2 + math.ones()
+        with profile(statistics=True) as prof:
+            for _ in range(3):
+                f()
+        stats = prof.statistics
+        self.assertEqual(0, len(prof._backend_calls))
+        backend_rows = {row['function']: row for row in stats.table('backend')}
+        self.assertEqual(stats.call_count, sum(row['calls'] for row in backend_rows.values()))
+        self.assertGreater(backend_rows['NumPy.mul']['bytes'], 0)
+        self.assertEqual(0, backend_rows['NumPy.mul']['calls'] % 3)
+        phi_rows = {row['function']: row for row in stats.table('phi')}
+        self.assertTrue(any(name.startswith('math.') and name.endswith('__mul__') for name in phi_rows))
+        self.assertTrue(all(row['self_time'] <= row['time'] for row in phi_rows.values()))
+        folded = stats.folded_stacks('calls').splitlines()
+        self.assertEqual(stats.call_count, sum(int(line.rsplit(' ', 1)[1]) for line in folded))
+        self.assertTrue(all('test_profile_statistics;' in line for line in folded))
+        prof.print()
+
+    def test_profile_memory(self):
+        def step():
+            grid = field.CenteredGrid(1, x=32, y=32)
+            return field.laplace(grid)
+        with profile(memory=True, trace=False) as prof:
+            result = step()
+            first = prof.memory.step()
+            del result
+            second = prof.memory.step()
+        self.assertGreater(first['allocated'], 0)
+        self.assertGreaterEqual(first['peak'], first['live'])
+        self.assertEqual(0, second['allocated'])
+        self.assertLessEqual(second['live'], first['live'])
+        self.assertEqual(prof.memory.allocated, sum(row['allocated'] for row in prof.memory.table('backend')))
+        callers = [row['function'] for row in prof.memory.table('caller')]
+        self.assertTrue(all(name.startswith('field.') for name in callers), callers)
+        prof.memory.print()
+
+    def test_profile_sampling(self):
+        def busy():
+            t0 = time.perf_counter()
+            x = math.random_normal(math.spatial(x=256, y=256))
+            while time.perf_counter() - t0 < 0.2:
+                x = math.sin(x) * math.cos(x)
+            return x
+        with profile(sample_interval=1e-2) as prof:
+            self.assertIs(math.backend.default_backend(), math.backend.NUMPY)  # backends are not wrapped when sampling
+            busy()
+        stats = prof.statistics
+        self.assertTrue(stats.sampled)
+        self.assertGreater(stats.call_count, 0)
+        self.assertLessEqual(stats.duration, prof.duration)
+        backend_rows = {row['function']: row for row in stats.table('backend')}
+        self.assertTrue(any(name.startswith('NumPy.') for name in backend_rows), backend_rows)
+        folded = [line.rsplit(' ', 1) for line in stats.folded_stacks().splitlines()]
+        self.assertTrue(all(stack and int(value) >= 0 for stack, value in folded), folded)
+        self.assertTrue(any('busy' in stack for stack, _ in folded), folded)
+        prof.print()
@@ -100,6 +100,20 @@ class TestExtrapolation(TestCase):
                 math.assert_close(p.x[0].y[:-1], a.x[-1])  # periodic
                 math.assert_close(p.x[-2:].y[:-1], a.x[:2])  # periodic
 
+    def test_pad_mixed(self):
+        a = math.random_uniform(spatial(x=4, y=5, z=3), batch(b=2))
+        widths = {'x': (1, 2), 'y': (2, 1), 'z': (0, 2)}
+        for ext in [combine_sides(x=PERIODIC, y=(ONE, REFLECT), z=BOUNDARY),
+                    combine_sides(x=(BOUNDARY, SYMMETRIC), y=PERIODIC, z=(ZERO, REFLECT)),
+                    combine_sides(x=(PERIODIC, ZERO), y=(BOUNDARY, ZERO), z=ZERO)]:
+            # Reference: pad with one extrapolation at a time, constants last
+            expected = a
+            for single_ext in sorted(set(sum(ext.ext.values(), ())), key=lambda e: e.pad_rank):
+                expected = single_ext.pad(expected, {dim: (lo if ext.ext[dim][0] == single_ext else 0, up if ext.ext[dim][1] == single_ext else 0) for dim, (lo, up) in widths.items()})
+            for backend in BACKENDS:
+                with backend:
+                    math.assert_close(expected, ext.pad(math.tensor(a), widths), msg=backend.name)
+
     def test_pad_collapsed(self):
         a = math.zeros(spatial(b=2, x=10, y=10) & batch(batch=10))
         p = math.pad(a, {'x': (1, 2)}, ZERO)
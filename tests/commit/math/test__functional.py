@@ -1,5 +1,7 @@
 from unittest import TestCase
 
+import numpy as np
+
 import phi
 from phi import math, field
 from phi.field import CenteredGrid
@@ -71,6 +73,56 @@ class TestFunctional(TestCase):
             jit_result = jit_f(x)
             math.assert_close(direct_result, jit_result)
 
+    def test_jit_compile_linear_trace_cache(self):
+        import os
+        import tempfile
+        x = math.random_normal(batch(batch=3) & spatial(x=4, y=3))
+        weight = math.random_uniform(spatial(x=4, y=3))
+
+        def weighted_laplace(val, weight):
+            return math.laplace(val, padding=math.extrapolation.ZERO) * weight + val
+
+        with tempfile.TemporaryDirectory() as directory:
+            math.set_trace_cache_directory(directory)
+            try:
+                expected = weighted_laplace(x, weight)
+                math.assert_close(expected, math.jit_compile_linear(weighted_laplace)(x, weight), abs_tolerance=1e-5)
+                self.assertEqual(1, len(os.listdir(directory)))
+                math.assert_close(expected, math.jit_compile_linear(weighted_laplace)(x, weight), abs_tolerance=1e-5)  # loaded from disk
+                self.assertEqual(1, len(os.listdir(directory)))
+                math.jit_compile_linear(weighted_laplace)(x, weight * 2)  # different condition argument
+                self.assertEqual(2, len(os.listdir(directory)))
+            finally:
+                math.set_trace_cache_directory(None)
+
+    def test_trace_cache_key_independent_of_hash_seed(self):
+        import os
+        import subprocess
+        import sys
+        script = "import hashlib; from phi.math._trace_cache import _hash_tree; d = hashlib.sha256(); _hash_tree(d, ({'dims': {'x', 'y', 'z', 'vector'}}, {'mode': 'b', 'axes': 'x'})); print(d.hexdigest())"
+        root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+        digests = {subprocess.check_output([sys.executable, '-c', script], env=dict(os.environ, PYTHONHASHSEED=str(seed), PYTHONPATH=root), universal_newlines=True) for seed in range(4)}
+        self.assertEqual(1, len(digests))
+
+    def test_jit_compile_linear_max_traces(self):
+        f = math.jit_compile_linear(math.laplace, max_traces=2)
+        for size in [4, 5, 4, 6, 4, 5]:
+            f(math.random_normal(spatial(x=size)))
+        info = math.jit_cache_info(f)
+        self.assertEqual(2, info.traces)
+        self.assertEqual(2, info.max_traces)
+        self.assertEqual(2, info.hits)  # second and third call with x=4
+        self.assertEqual(4, info.misses)
+        self.assertEqual(2, info.evictions)
+        self.assertIn(f, math.jit_cache_info())
+
+    def test_jit_compile_linear_warm_up(self):
+        f = math.jit_compile_linear(math.laplace)
+        f.warm_up(spatial(x=8), spatial(x=16))
+        self.assertEqual(2, math.jit_cache_info(f).traces)
+        f(math.random_normal(spatial(x=16)))
+        self.assertEqual(1, math.jit_cache_info(f).hits)
+
     def test_functional_gradient(self):
         def f(x: math.Tensor, y: math.Tensor):
             assert isinstance(x, math.Tensor)
@@ -153,6 +205,8 @@ class TestFunctional(TestCase):
                     math.assert_close(solves[0].residual, 0, abs_tolerance=1e-4)
                     assert (solves[0].iterations <= (4, 0)).all
                     assert (solves[0].function_evaluations <= (30, 1)).all
+                    assert solves[0].example_times.shape == batch(batch=2)
+                    assert (solves[0].example_times >= 0).all
 
                     with math.SolveTape(record_trajectories=True) as trajectories:
                         x, y = math.minimize(loss, math.Solve('L-BFGS-B', 0, 1e-3, x0=x0))
@@ -163,6 +217,25 @@ class TestFunctional(TestCase):
                     assert trajectories[0].residual.trajectory.size == trajectories[0].x[0].trajectory.size
                     assert trajectories[0].residual.trajectory.size > 1
 
+    def test_minimize_scheduler(self):
+        from phi.math.backend._numpy_backend import NumPyBackend
+        target = np.array([[0., 0], [3, -2], [1, 1]])
+
+        class AnalyticGradientBackend(NumPyBackend):
+            def supports(self, feature):
+                return feature == Backend.functional_gradient or NumPyBackend.supports(self, feature)
+
+            def functional_gradient(self, f, wrt, get_output):
+                return lambda x: (*f(x), 2 * (x - target))
+
+        def loss(x):
+            return np.sum((x - target) ** 2), np.sum((x - target) ** 2, -1)
+        result = AnalyticGradientBackend().minimize('L-BFGS-B', loss, np.zeros((3, 2)), np.full(3, 1e-6), np.full(3, 100), False)
+        np.testing.assert_allclose(target, result.x, atol=1e-5)
+        self.assertEqual([True] * 3, list(result.converged))
+        self.assertEqual(1, result.function_evaluations[0])  # already at the minimum, finishes before the others
+        self.assertLessEqual(result.wall_time[0], result.wall_time[1])
+
     def test_solve_linear_matrix(self):
         for backend in BACKENDS:
             with backend:
@@ -173,6 +246,117 @@ class TestFunctional(TestCase):
                     x = field.solve_linear(math.jit_compile_linear(field.laplace), y, solve)
                     math.assert_close(x.values, [-1.5, -2, -1.5], abs_tolerance=1e-3, msg=backend)
 
+    def test_solve_linear_matrix_preconditioned(self):
+        for backend in BACKENDS:
+            with backend:
+                y = CenteredGrid(1, extrapolation.ZERO, x=3) * (1, 2)
+                x0 = CenteredGrid(0, extrapolation.ZERO, x=3)
+                for preconditioner in ['jacobi', 'ilu', lambda r: r * -0.5]:
+                    for method in ['CG', 'auto']:
+                        solve = math.Solve(method, 0, 1e-3, x0=x0, max_iterations=100, preconditioner=preconditioner)
+                        x = field.solve_linear(math.jit_compile_linear(field.laplace), y, solve)
+                        math.assert_close(x.values, [[-1.5, -2, -1.5], [-3, -4, -3]], abs_tolerance=1e-3, msg=f"{backend} {preconditioner}")
+
+    def test_solve_linear_preconditioner_per_example(self):
+        y = CenteredGrid(1, extrapolation.ZERO, x=3) * (1, 2)
+        x0 = CenteredGrid(0, extrapolation.ZERO, x=3)
+        residual_shapes = []
+
+        def preconditioner(r):
+            residual_shapes.append(r.values.shape)
+            return r * -0.5
+        laplace = math.jit_compile_linear(field.laplace)
+        x = field.solve_linear(laplace, y, math.Solve('CG-native', 0, 1e-3, x0=x0, max_iterations=100, preconditioner=preconditioner))
+        math.assert_close(x.values, [[-1.5, -2, -1.5], [-3, -4, -3]], abs_tolerance=1e-3)
+        self.assertTrue(residual_shapes)
+        self.assertTrue(all(shape == spatial(x=3) for shape in residual_shapes), residual_shapes)
+        solve = math.Solve('CG-native', 0, 1e-3, x0=x0, max_iterations=100, preconditioner='ilu')
+        field.solve_linear(laplace, y, solve)
+        matrix, _ = laplace.sparse_matrix_and_bias(x0)
+        factors = matrix._incomplete_lu[2]
+        field.solve_linear(laplace, y, solve)
+        self.assertIs(factors, matrix._incomplete_lu[2])
+
+    def test_jacobi_preconditioner_batched_matrix(self):
+        from phi.math._functional import SparseMatrixContainer, _native_preconditioner
+        from phi.math.backend import NUMPY
+        values = math.tensor([[1., 5, 2, 4], [2., 5, 4, 8]], batch('b'), math.instance('nnz'))
+        matrix = SparseMatrixContainer('coo', (3, 3), None, spatial(x=3), values, np.array([0, 1, 1, 2]), np.array([0, 0, 1, 2]))
+        math.assert_close(math.tensor([[1, 2, 4], [2, 4, 8]], batch('b'), spatial('x')), matrix.diagonal())
+        y = math.ones(batch(b=2), spatial(x=3))
+        preconditioner = _native_preconditioner(Solve('CG', 0, 1e-3, x0=0 * y, preconditioner='jacobi'), matrix, y, spatial(x=3), NUMPY)
+        np.testing.assert_allclose([[1, .5, .25], [.5, .25, .125]], preconditioner(np.ones((2, 3))))
+        np.testing.assert_allclose([[.5, .25, .125]], preconditioner(np.ones((1, 3)), batch_index=1))
+
+    def test_ilu_level_scheduled(self):
+        import scipy.sparse
+        from phi.math._functional import _incomplete_lu, _ilu_substitution, _ilu_level_scheduled
+        from phi.math.backend import NUMPY
+        tridiagonal = scipy.sparse.diags([-1, 2.1, -1], [-1, 0, 1], (6, 6))
+        matrix = scipy.sparse.kron(tridiagonal, scipy.sparse.identity(6)) + scipy.sparse.kron(scipy.sparse.identity(6), tridiagonal)
+        factors = _incomplete_lu(matrix)
+        vectors = np.random.default_rng(0).normal(size=(2, 36))
+        with math.precision(64):
+            np.testing.assert_allclose(_ilu_substitution(factors)(vectors), _ilu_level_scheduled(factors, NUMPY)(vectors))
+
+    def test_solve_linear_matrix_free(self):
+        for backend in BACKENDS:
+            with backend:
+                y = CenteredGrid(1, extrapolation.ZERO, x=3) * (1, 2)
+                x0 = CenteredGrid(0, extrapolation.ZERO, x=3)
+                for preconditioner in [None, 'jacobi']:
+                    for method in ['CG', 'auto']:
+                        solve = math.Solve(method, 0, 1e-3, x0=x0, max_iterations=100, preconditioner=preconditioner, matrix_free=True)
+                        x = field.solve_linear(math.jit_compile_linear(field.laplace), y, solve)
+                        math.assert_close(x.values, tensor([[-1.5, -2, -1.5], [-3, -4, -3]], channel('vector'), spatial('x')), abs_tolerance=1e-3, msg=f"{backend} {method} {preconditioner}")
+
+    def test_solve_linear_direct_factorization_cache(self):
+        from phi.math.backend import NUMPY
+        cache = NUMPY.factorization_cache
+        cache.invalidate()
+        y = CenteredGrid(1, extrapolation.ZERO, x=3) * (1, 2)
+        x0 = CenteredGrid(0, extrapolation.ZERO, x=3)
+        solve = math.Solve('direct', 0, 1e-3, x0=x0)
+        for i in range(2):
+            hits = cache.hits
+            x = field.solve_linear(math.jit_compile_linear(field.laplace), y, solve)
+            math.assert_close(x.values, [[-1.5, -2, -1.5], [-3, -4, -3]], abs_tolerance=1e-3)
+            self.assertEqual(1, len(cache))
+            self.assertEqual(hits + i, cache.hits)
+        import scipy.sparse
+        matrix = scipy.sparse.csc_matrix(np.diag([1., 2, 3]))
+        scaled = matrix * 2
+        cache.factorize(matrix)
+        misses = cache.misses
+        np.testing.assert_allclose(cache.factorize(scaled).solve(np.ones(3)), [.5, .25, 1 / 6])
+        self.assertEqual(misses + 1, cache.misses)
+        hits = cache.hits
+        np.testing.assert_allclose(cache.factorize(matrix).solve(np.ones(3)), [1, .5, 1 / 3])  # same pattern, both cached
+        self.assertEqual(hits + 1, cache.hits)
+        cache.invalidate()
+        self.assertEqual(0, len(cache))
+        self.assertEqual(0, cache.memory)
+
+    def test_solve_linear_batch_strategy(self):
+        y = CenteredGrid(1, extrapolation.ZERO, x=3) * (1, 2)
+        x0 = CenteredGrid(0, extrapolation.ZERO, x=3)
+        for method in ['CG', 'biCG', 'direct']:
+            results = []
+            for batch_strategy in ['sequential', 'threads']:
+                solve = math.Solve(method, 0, 1e-3, x0=x0, max_iterations=100, batch_strategy=batch_strategy)
+                results.append(field.solve_linear(math.jit_compile_linear(field.laplace), y, solve).values)
+            math.assert_close(*results, [[-1.5, -2, -1.5], [-3, -4, -3]], abs_tolerance=1e-3)
+        # distinct matrices per example, solved as one block-diagonal system by the backend
+        import scipy.sparse
+        from phi.math.backend import NUMPY
+        matrices = [scipy.sparse.csc_matrix(np.diag([1., 2, 4]) + np.eye(3, k=1)), scipy.sparse.csc_matrix(np.diag([2., 1, 8]))]
+        y = np.array([[1., 2, 4], [2., 2, 4]])
+        results = [NUMPY.linear_solve('direct', matrices, y, y, None, None, None, False, batch_strategy=batch_strategy).x for batch_strategy in ['sequential', 'block-diagonal']]
+        np.testing.assert_allclose(results[0], [[.5, .5, 1], [1, 2, .5]])
+        np.testing.assert_allclose(results[1], results[0])
+        self.assertNotEqual(math.Solve('direct', 0, 0, batch_strategy='threads'), math.Solve('direct', 0, 0, batch_strategy='sequential'))
+        self.assertRaises(AssertionError, lambda: math.Solve('direct', 0, 0, batch_strategy='block-diagonal'))
+
     def test_linear_solve_matrix_batched(self):  # TODO also test batched matrix
         y = CenteredGrid(1, extrapolation.ZERO, x=3) * (1, 2)
         x0 = CenteredGrid(0, extrapolation.ZERO, x=3)
@@ -328,6 +512,23 @@ class TestFunctional(TestCase):
                     self.assertEqual(f, matrix.indexing_type)
                     self.assertEqual((5, 5), matrix.shape)
 
+    def test_sparse_matrix_formats_agree(self):
+        def linear_function(x, weight):
+            x = math.pad(x, {'x': (1, 2), 'y': (1, 0)}, extrapolation.PERIODIC)
+            return x.x[:-3].y[1:] * weight - x.x[3:].y[:-1] + 2 * x.x[1:-2].y[1:]
+
+        x = math.zeros(spatial(x=6, y=4))
+        weight = math.random_uniform(spatial(x=6, y=4))
+        f = math.jit_compile_linear(linear_function)
+        dense = [f.sparse_matrix(x, weight, format=fmt).native().toarray() for fmt in ['coo', 'csr', 'csc']]
+        np.testing.assert_allclose(dense[0], dense[1])
+        np.testing.assert_allclose(dense[0], dense[2])
+        csr = f.sparse_matrix(x, weight, format='csr')
+        self.assertTrue(all((np.diff(csr.cols[start:end]) > 0).all() for start, end in zip(csr.rows[:-1], csr.rows[1:])))
+        v = np.random.randn(24)
+        expected = linear_function(tensor(v.reshape(6, 4), spatial('x,y')), weight).numpy('x,y').flatten()
+        np.testing.assert_allclose(expected, dense[0] @ v, rtol=1e-5)
+
     def test_loss_batch_not_reduced(self):
         def loss_function(x):
             return math.l2_loss(x)
@@ -341,3 +542,16 @@ class TestFunctional(TestCase):
                     loss_direct = loss_function(x_test)
                     loss_g, _ = gradient_function(x_test)
                     math.assert_close([0, 0.5], loss_g, loss_direct)
+
+    def test_multigrid_reuses_hierarchy(self):
+        @math.jit_compile_linear
+        def laplace(x):
+            return math.laplace(x, padding=extrapolation.ZERO)
+
+        y = math.random_normal(spatial(x=16, y=16))
+        solve = Solve('CG-multigrid', 1e-5, 1e-5, x0=0 * y)
+        x1 = math.solve_linear(laplace, y, solve)
+        x2 = math.solve_linear(laplace, y, solve)
+        math.assert_close(x1, x2)
+        self.assertEqual(1, math.jit_cache_info(laplace).misses)
+        self.assertRaises(AssertionError, lambda: math.solve_linear(laplace.f, y, solve))
@@ -298,3 +298,15 @@ class TestMathNDNumpy(TestCase):
         math.assert_close(le, [0, 1.41421356237, 1])
         le = math.vec_length(v, eps=0.01)
         math.assert_close(le, [1e-1, 1.41421356237, 1])
+
+    def test_stencils_match_shift(self):
+        math.seed(0)
+        x = math.random_normal(spatial(x=5, y=4), channel(vector='x,y'))
+        for padding in (extrapolation.ZERO, extrapolation.BOUNDARY, extrapolation.PERIODIC, extrapolation.combine_sides(x=extrapolation.PERIODIC, y=(extrapolation.ONE, extrapolation.SYMMETRIC)), None):
+            if padding is not None:
+                left, center, right = math.shift(x, (-1, 0, 1), padding=padding, stack_dim=batch('_laplace'))
+                math.assert_close(math.sum((left + right - 2 * center) / 0.25, '_laplace'), math.laplace(x, dx=0.5, padding=padding))
+            for difference, offsets in [('central', (-1, 1)), ('forward', (0, 1)), ('backward', (-1, 0))]:
+                lower, upper = math.shift(x, offsets, padding=padding, stack_dim=channel('gradient'))
+                expected = (upper - lower) / (tensor([0.5, 2.], channel(gradient='x,y')) * (offsets[1] - offsets[0]))
+                math.assert_close(expected, math.spatial_gradient(x, tensor([0.5, 2.], channel(gradient='x,y')), difference, padding))
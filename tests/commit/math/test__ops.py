@@ -386,6 +386,22 @@ class TestMathFunctions(TestCase):
                 updated = math.scatter(base, indices, values, mode='update', outside_handling='undefined')
                 math.assert_close(updated, math.tensor([[11, 1, 1], [12, 1, 13]], spatial('y,x')))
 
+    def test_splat(self):
+        for backend in BACKENDS:
+            with backend:
+                indices = math.wrap([(0.25, 1), (2, 0.5)], instance('points'), channel(vector='x,y'))
+                values = math.wrap([1., 2.], instance('points'))
+                linear = math.splat(spatial(x=3, y=2), indices, values, kernel='linear')
+                math.assert_close(linear, math.tensor([[0, 0, 1], [.75, .25, 1]], spatial('y,x')), msg=backend.name)
+                quadratic = math.splat(spatial(x=8, y=8), indices + 3, values, kernel='quadratic')
+                math.assert_close(math.sum(quadratic), 3, msg=backend.name)
+                mean = math.splat(math.ones(spatial(x=3, y=2)) * 5, indices, values, kernel='linear', mode='mean')
+                math.assert_close(mean, math.tensor([[5, 5, 2], [1, 1, 2]], spatial('y,x')), msg=backend.name)
+                grid = math.random_normal(spatial(x=5, y=6))
+                points = math.random_uniform(instance(points=7), channel(vector='x,y')) * (4, 5)
+                weights = math.random_normal(instance(points=7))
+                math.assert_close(math.sum(math.grid_sample(grid, points, math.extrapolation.ZERO) * weights), math.sum(math.splat(grid.shape, points, weights) * grid), abs_tolerance=1e-4, msg=backend.name)
+
     def test_scatter_add_2d(self):
         for backend in BACKENDS:
             with backend:
@@ -407,3 +407,53 @@ class TestTensors(TestCase):
     def test_iter_dim(self):
         slices = tuple(math.zeros(channel(vector='x,y')).vector)
         self.assertEqual(2, len(slices))
+
+    def test_fuse(self):
+        for backend in BACKENDS:
+            with backend:
+                math.seed(0)
+                a = math.random_normal(spatial(x=4, y=3))
+                b = math.random_normal(spatial(y=3, x=4), channel(vector='x,y'))
+                c = math.random_normal(batch(b=2))
+                expected = a + 0.5 * (b - a) / 2 - c ** 2
+                with math.fuse():
+                    diff = b - a
+                    fused = a + 0.5 * diff / 2 - c ** 2
+                    reversed_ops = 2 - 1 / (a * c)
+                    stack = math.stack([a, a], channel('s')) * diff  # expressions combine with other tensor types
+                math.assert_close(b - a, diff)
+                math.assert_close(expected, fused)
+                self.assertEqual(expected.shape, fused.shape)
+                self.assertEqual(expected.dtype, fused.dtype)
+                math.assert_close(2 - 1 / (a * c), reversed_ops)
+                math.assert_close(a * (b - a), stack.s[1])
+                with math.fuse():
+                    reuse = diff * 2  # diff has already been evaluated and must not be overwritten
+                math.assert_close(2 * (b - a), reuse)
+                math.assert_close(b - a, diff)
+                with math.precision(64), math.fuse():
+                    double = a * 2
+                math.assert_close(a * 2, double)
+                self.assertEqual(64, double.dtype.precision)
+
+    def test_fuse_shared_operands(self):
+        a = math.random_normal(spatial(x=4))
+        b = math.random_normal(spatial(x=4))
+        with math.fuse():
+            shared = a + b
+            product = (shared + 1) * (shared - 1)
+        math.assert_close((a + b + 1) * (a + b - 1), product)
+        self.assertIsNotNone(shared._cached)  # evaluated once for both operands
+        math.assert_close(a + b, shared)
+
+    def test_fuse_thread_local(self):
+        from threading import Thread
+        from phi.math._tensors import FusedExpression
+        a = math.random_normal(spatial(x=4))
+        results = []
+        with math.fuse():
+            thread = Thread(target=lambda: results.append(a * 2))
+            thread.start()
+            thread.join()
+            self.assertIsInstance(a * 2, FusedExpression)
+        self.assertNotIsInstance(results[0], FusedExpression)
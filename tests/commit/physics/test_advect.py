@@ -1,7 +1,8 @@
 from unittest import TestCase
 
-from phi import field
-from phi.field import Noise, CenteredGrid, StaggeredGrid
+from phi import field, math
+from phi.field import Noise, CenteredGrid, StaggeredGrid, reduce_sample
+from phi.geom import Box
 from phi.physics import advect
 from phi.physics._boundaries import Domain
 
@@ -23,9 +24,28 @@ class TestAdvect(TestCase):
     def test_semi_lagrangian(self):
         _test_advection(advect.semi_lagrangian)
 
+    def test_semi_lagrangian_staggered_index_space(self):
+        for ext in [math.extrapolation.ZERO, math.extrapolation.BOUNDARY, math.extrapolation.PERIODIC]:
+            v = StaggeredGrid(Noise(vector=2), ext, x=5, y=4, bounds=Box(x=2, y=1)) * 2
+            for f in [v, CenteredGrid(Noise(), math.extrapolation.BOUNDARY, x=5, y=4, bounds=Box(x=2, y=1))]:
+                generic = f.with_values(reduce_sample(f, advect.euler(f.elements, v, -0.2)))
+                field.assert_close(generic, advect.semi_lagrangian(f, v, 0.2), abs_tolerance=1e-5)
+
     def test_mac_cormack(self):
         _test_advection(advect.mac_cormack)
 
+    def test_mac_cormack_index_space(self):
+        generic_euler = lambda *args, **kwargs: advect.euler(*args, **kwargs)
+        for ext in [math.extrapolation.ZERO, math.extrapolation.BOUNDARY, math.extrapolation.PERIODIC]:
+            v = StaggeredGrid(Noise(vector=2), ext, x=5, y=4, bounds=Box(x=2, y=1)) * 2
+            for f in [v, CenteredGrid(Noise(), math.extrapolation.BOUNDARY, x=5, y=4, bounds=Box(x=2, y=1))]:
+                advected = advect.mac_cormack(f, v, 0.2)
+                field.assert_close(advect.mac_cormack(f, v, 0.2, integrator=generic_euler), advected, abs_tolerance=1e-5)
+                limits = f.closest_values(advect.euler(f.elements, v, -0.2))
+                lower = math.min(limits, [f'closest_{dim}' for dim in f.shape.spatial.names])
+                upper = math.max(limits, [f'closest_{dim}' for dim in f.shape.spatial.names])
+                self.assertTrue(math.all((advected.values >= lower - 1e-5) & (advected.values <= upper + 1e-5)))
+
     def test_advect_points(self):
         domain = Domain(x=4, y=3)
         v = domain.distribute_points(domain.bounds, points_per_cell=2) * (1, -1)
@@ -8,6 +8,7 @@ from phi.math import batch
 from phi.math.backend import Backend
 from phi.math.extrapolation import BOUNDARY, ZERO, PERIODIC, combine_sides
 from phi.physics import fluid
+from phi.physics._boundaries import Obstacle
 
 
 BACKENDS = phi.detect_backends()
@@ -66,3 +67,53 @@ class FluidTest(TestCase):
                         assert math.isfinite(grad).all
                         grads.append(grad)
         math.assert_close(*grads, abs_tolerance=1e-5)
+
+    def test_make_incompressible_multigrid(self):
+        obstacle = Obstacle(Box[20:40, 30:50])
+        for backend in BACKENDS:
+            with backend:
+                for extrapolation in [ZERO, combine_sides(x=BOUNDARY, y=ZERO)]:
+                    velocity = StaggeredGrid(Noise(), extrapolation, x=33, y=20, bounds=Box[0:100, 0:100])
+                    for method in ['multigrid', 'multigrid-W', 'CG-multigrid', 'CG-multigrid-F']:
+                        solve = math.Solve(method, 1e-5, 1e-5, max_iterations=300)
+                        result, _ = fluid.make_incompressible(velocity, [obstacle], solve)
+                        math.assert_close(divergence(result).values, 0, abs_tolerance=2e-4, msg=method)
+
+    def test_make_incompressible_matrix_free(self):
+        obstacle = Obstacle(Box[20:40, 30:50])
+        for backend in BACKENDS:
+            with backend:
+                velocity = StaggeredGrid(Noise(), ZERO, x=33, y=20, bounds=Box[0:100, 0:100])
+                reference, _ = fluid.make_incompressible(velocity, [obstacle], math.Solve('CG', 1e-5, 1e-5))
+                result, _ = fluid.make_incompressible(velocity, [obstacle], math.Solve('CG', 1e-5, 1e-5, matrix_free=True))
+                math.assert_close(divergence(result).values, 0, abs_tolerance=2e-4)
+                math.assert_close(reference.values, result.values, abs_tolerance=1e-3)
+
+    def test_make_incompressible_mask_cache(self):
+        fluid._MASK_CACHE.clear()
+        velocity = StaggeredGrid(Noise(), ZERO, x=33, y=20, bounds=Box[0:100, 0:100])
+        obstacle = Obstacle(Box[20:40, 30:50])
+        result1, _ = fluid.make_incompressible(velocity, [obstacle])
+        cached = list(fluid._MASK_CACHE)
+        self.assertEqual(2, len(cached))  # hard masks and soft obstacle mask
+        result2, _ = fluid.make_incompressible(velocity, [obstacle])
+        self.assertTrue(all(m1 is m2 for (_, m1), (_, m2) in zip(cached, fluid._MASK_CACHE)))
+        field.assert_close(result1, result2)
+        moved, _ = fluid.make_incompressible(velocity, [Obstacle(Box[30:50, 30:50])])
+        self.assertEqual(4, len(fluid._MASK_CACHE))
+        fluid._MASK_CACHE.clear()
+        expected, _ = fluid.make_incompressible(velocity, [Obstacle(Box[30:50, 30:50])])
+        field.assert_close(expected, moved)
+
+    def test_make_incompressible_mask_cache_threads(self):
+        from concurrent.futures import ThreadPoolExecutor
+        fluid._MASK_CACHE.clear()
+        velocity = StaggeredGrid(Noise(), ZERO, x=16, y=16, bounds=Box[0:100, 0:100])
+        obstacles = [Obstacle(Box[10 * i:10 * i + 20, 30:50]) for i in range(6)]
+        expected = [fluid.make_incompressible(velocity, [obstacle])[0] for obstacle in obstacles]
+        with ThreadPoolExecutor(4) as pool:
+            results = list(pool.map(lambda obstacle: fluid.make_incompressible(velocity, [obstacle])[0], obstacles * 3))
+        for result, expected_result in zip(results, expected * 3):
+            field.assert_close(expected_result, result)
+        self.assertLessEqual(len(fluid._MASK_CACHE), fluid._MASK_CACHE_SIZE)
+        fluid._MASK_CACHE.clear()
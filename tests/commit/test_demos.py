@@ -1,4 +1,6 @@
+import os
 import sys
+import tempfile
 from os.path import join, dirname, abspath
 from unittest import TestCase
 
@@ -86,7 +88,14 @@ class TestDemos(TestCase):
         demo_run('point_cloud')
 
     def test_profile_navier_stokes(self):
-        demo_run('profile_navier_stokes')
+        working_dir = os.getcwd()
+        with tempfile.TemporaryDirectory() as directory:  # the demo saves its profile to the working directory
+            os.chdir(directory)
+            try:
+                demo_run('profile_navier_stokes')
+                self.assertTrue(os.listdir(directory))
+            finally:
+                os.chdir(working_dir)
 
     def test_rotating_bar(self):
         demo_run('rotating_bar')
@@ -0,0 +1,53 @@
+import os
+from unittest import TestCase
+
+from phi import math
+from phi.field import CenteredGrid, StaggeredGrid, Noise
+from phi.math import extrapolation
+from phi.vis._record import Record
+
+
+def _record(memory_frames, frames=40):
+    math.seed(0)
+    rec = Record('frames', memory_frames=memory_frames, chunk_size=4)
+    velocity = StaggeredGrid(Noise(vector='x,y'), extrapolation.ZERO, x=8, y=6)
+    smoke = CenteredGrid(Noise(), extrapolation.BOUNDARY, x=8, y=6)
+    for i in range(frames):
+        velocity = velocity * 0.9
+        smoke = smoke @ CenteredGrid(0, smoke.extrapolation, x=9, y=6) if i == 25 else smoke + 1  # resolution change starts a new chunk
+        rec.append({'velocity': velocity, 'smoke': smoke, 'missing': None if i % 10 == 3 else smoke}, warn_missing=False)
+    return rec
+
+
+class TestRecord(TestCase):
+
+    def test_spilled_frames_match_memory(self):
+        in_memory = _record(None)
+        spilled = _record(5)
+        self.assertIsNone(in_memory.directory)
+        self.assertTrue(os.listdir(os.path.join(spilled.directory, 'velocity')))
+        for name in ['velocity', 'smoke', 'missing']:
+            self.assertEqual(40, spilled.recording_size(name))
+            for frame in [0, 3, 13, 25, 26, 34, 39, -1]:
+                expected, actual = in_memory.get_snapshot(name, frame), spilled.get_snapshot(name, frame)
+                if expected is None:
+                    self.assertIsNone(actual)
+                else:
+                    self.assertEqual(type(expected), type(actual))
+                    self.assertEqual(expected.resolution, actual.resolution)
+                    math.assert_close(expected.values, actual.values)
+        math.assert_close(in_memory.velocity.values, spilled.velocity.values)
+        math.assert_close(in_memory.view('smoke')[{'frames': slice(2, 20, 3), 'x': 1}].values, spilled.view('smoke')[{'frames': slice(2, 20, 3), 'x': 1}].values)
+        self.assertEqual(36 - 10, spilled.view('missing').stack(slice(10, 40)).shape.get_size('frames'))
+        self.assertEqual(36, len(spilled.view('missing')))
+        self.assertEqual(36, spilled.view('missing').shape.get_size('frames'))
+        for frame in [0, 3, 12, 35, -1]:
+            math.assert_close(in_memory.missing[{'frames': frame}].values, spilled.view('missing')[frame].values)
+        self.assertEqual(in_memory.velocity.shape, spilled.view('velocity').shape)
+
+    def test_temporary_directory_removed(self):
+        rec = _record(2, frames=10)
+        directory = rec.directory
+        self.assertTrue(os.path.isdir(directory))
+        del rec
+        self.assertFalse(os.path.exists(directory))